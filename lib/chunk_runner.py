@@ -0,0 +1,169 @@
+"""Runs chunks through unmunch and tokenisation so that one bad .dic line can't bring down a whole build.
+
+A chunk that fails is retried with exponential backoff, in case the failure was transient (e.g. the machine ran out of
+memory). If it keeps failing, it is split in halves and each half is run on its own, down to single lines; a line that
+still fails is quarantined, i.e. left out of the build and named in a report at the end of the run.
+
+The result of every chunk is stored under a key made from its lines, the .aff file and the processing options, so that
+a build that stopped half-way can be resumed without redoing the chunks that were done.
+"""
+import hashlib
+import json
+import os
+import shutil
+import time
+from os import path
+from tempfile import NamedTemporaryFile, mkdtemp
+from typing import Callable, Dict, List, Optional, Tuple
+
+from lib.dic_chunk import DicChunk
+from lib.logger import LOGGER
+from lib.shell_command import ShellCommandException
+from lib.variant import Variant
+
+# Takes a variant and a chunk, and returns the variant and the temp file with the chunk's output.
+Processor = Callable[[Variant, DicChunk], Tuple[Variant, NamedTemporaryFile]]
+
+
+class QuarantineLimitExceeded(Exception):
+    """Raised when so many lines fail that the problem is clearly not with the lines themselves."""
+
+
+class ChunkRunner:
+    """Runs chunks with retries, bisection of failing chunks, and stored results.
+
+    Attributes:
+        processor (Processor): what to run on each chunk, e.g. unmunch and tokenisation
+        results_dir (str): where the output of completed chunks is stored
+        options (str): anything else the output depends on (e.g. the tokeniser), to be part of the result keys
+        retries (int): how many times to retry a chunk before bisecting it
+        backoff_seconds (float): the wait before the first retry, doubled on every further retry
+        max_quarantine (int): how many lines may be quarantined before the build is aborted
+        delete_chunks (bool): whether to remove chunk files (and the halves they are split into) once their lines have
+                              been processed or quarantined; the processor must then leave them in place
+        quarantine (List[dict]): the lines quarantined so far, with their variant, chunk and error
+    """
+    def __init__(self, processor: Processor, results_dir: str, options: str = '', retries: int = 2,
+                 backoff_seconds: float = 5.0, max_quarantine: int = 100, delete_chunks: bool = False):
+        self.processor = processor
+        self.results_dir = results_dir
+        self.options = options
+        self.retries = retries
+        self.backoff_seconds = backoff_seconds
+        self.max_quarantine = max_quarantine
+        self.delete_chunks = delete_chunks
+        self.quarantine: List[dict] = []
+        self._aff_digests: Dict[str, str] = {}
+        # Halves are written next to the results rather than next to the chunk, which may be in a shared directory;
+        # each bisection gets a directory of its own, since chunks that fail at the same time may share a name.
+        self.bisection_dir = path.join(results_dir, 'bisection')
+        os.makedirs(self.bisection_dir, exist_ok=True)
+
+    def clear(self) -> None:
+        """Forget the results of previous runs."""
+        shutil.rmtree(self.results_dir)
+        os.makedirs(self.bisection_dir)
+
+    def result_key(self, variant: Variant, lines: List[str], compounds: bool, aff_path: Optional[str] = None) -> str:
+        aff_path = aff_path or variant.aff()
+        if aff_path not in self._aff_digests:
+            with open(aff_path, 'rb') as aff_file:
+                self._aff_digests[aff_path] = hashlib.sha1(aff_file.read()).hexdigest()
+        digest = hashlib.sha1(f"{variant}\0{compounds}\0{self.options}\0{self._aff_digests[aff_path]}\0".encode())
+        digest.update("".join(lines).encode('utf-8'))
+        return digest.hexdigest()
+
+    def run(self, variant: Variant, chunk: DicChunk, aff_path: Optional[str] = None,
+            remove_chunk: Optional[bool] = None) -> str:
+        """Process a chunk, or reuse its stored result.
+
+        Args:
+            aff_path: the .aff file the processor uses, if not the variant's own (e.g. a copy in a shared directory)
+            remove_chunk: whether to remove the chunk file once done; defaults to `delete_chunks`
+
+        Returns:
+            the path to the stored output of the chunk, without the output of any quarantined lines
+        """
+        lines = DicChunk.read_dic_lines(chunk.filepath)
+        result_path = path.join(self.results_dir, self.result_key(variant, lines, chunk.compounds, aff_path))
+        quarantine_path = f"{result_path}.quarantine"
+        if path.exists(result_path):
+            LOGGER.debug(f"Reusing the result of {chunk} from {result_path}.")
+            if path.exists(quarantine_path):
+                with open(quarantine_path, 'r', encoding='utf-8') as quarantine_file:
+                    self.quarantine.extend(json.load(quarantine_file))
+            self._remove(chunk, remove_chunk)
+            return result_path
+        outputs, quarantined = self._run_lines(variant, chunk, lines, chunk.name, self.retries)
+        tmp_path = f"{result_path}.tmp"
+        with open(tmp_path, 'wb') as result_file:
+            for output in outputs:
+                with open(output.name, 'rb') as output_file:
+                    shutil.copyfileobj(output_file, result_file)
+                output.close()
+        if quarantined:
+            with open(quarantine_path, 'w', encoding='utf-8') as quarantine_file:
+                json.dump(quarantined, quarantine_file, ensure_ascii=False)
+        os.replace(tmp_path, result_path)
+        self._remove(chunk, remove_chunk)
+        return result_path
+
+    def _remove(self, chunk: DicChunk, remove: Optional[bool] = None) -> None:
+        if self.delete_chunks if remove is None else remove:
+            chunk.rm()
+
+    def _attempt(self, variant: Variant, chunk: DicChunk, retries: int) -> Tuple[Optional[NamedTemporaryFile], str]:
+        """Run the processor on a chunk, retrying with backoff; returns the output, or None and the last error."""
+        error = ''
+        for attempt in range(retries + 1):
+            if attempt:
+                wait = self.backoff_seconds * 2 ** (attempt - 1)
+                LOGGER.warning(f"Processing {chunk} failed, retrying in {wait:.0f}s ({attempt}/{retries})...")
+                time.sleep(wait)
+            try:
+                return self.processor(variant, chunk)[1], ''
+            except ShellCommandException as e:
+                error = e.message
+        return None, error
+
+    def _run_lines(self, variant: Variant, chunk: DicChunk, lines: List[str], name: str, retries: int,
+                   directory: Optional[str] = None) -> Tuple[List[NamedTemporaryFile], List[dict]]:
+        output, error = self._attempt(variant, chunk, retries)
+        if output is not None:
+            return [output], []
+        if len(lines) == 1:
+            entry = {'variant': str(variant), 'chunk': str(chunk), 'line': lines[0].rstrip("\n"), 'error': error}
+            LOGGER.error(f"Quarantining \"{entry['line']}\" from {entry['chunk']}: {error}")
+            self.quarantine.append(entry)
+            if len(self.quarantine) > self.max_quarantine:
+                raise QuarantineLimitExceeded(f"More than {self.max_quarantine} lines failed, giving up.")
+            return [], [entry]
+        LOGGER.warning(f"{chunk} keeps failing, splitting its {len(lines)} lines in halves...")
+        outputs, quarantined = [], []
+        middle = len(lines) // 2
+        own_directory = directory is None
+        if own_directory:
+            directory = mkdtemp(prefix=f"{name}_", dir=self.bisection_dir)
+        for suffix, half in (('a', lines[:middle]), ('b', lines[middle:])):
+            half_chunk = DicChunk.from_lines(half, f"{name}{suffix}", directory, chunk.compounds)
+            # Halves are only retried once they are down to a single line, since bisection mostly hits the bad line
+            half_outputs, half_quarantined = self._run_lines(variant, half_chunk, half, f"{name}{suffix}",
+                                                             self.retries if len(half) == 1 else 0, directory)
+            self._remove(half_chunk)
+            outputs.extend(half_outputs)
+            quarantined.extend(half_quarantined)
+        if own_directory and self.delete_chunks:
+            shutil.rmtree(directory)
+        return outputs, quarantined
+
+    def report(self, report_path: str) -> None:
+        """Log the quarantined lines and write them to a file, one JSON object per line."""
+        if not self.quarantine:
+            LOGGER.info("No .dic lines were quarantined.")
+            return
+        with open(report_path, 'w', encoding='utf-8') as report_file:
+            for entry in self.quarantine:
+                report_file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        lines = "\n".join(f"  {entry['variant']} {entry['chunk']}: {entry['line']}" for entry in self.quarantine)
+        LOGGER.warning(f"{len(self.quarantine)} .dic lines failed and were left out of the build (details in "
+                       f"{report_path}):\n{lines}")
@@ -1,10 +1,11 @@
-import shutil
+import os
 from os import path
 from tempfile import NamedTemporaryFile
-from typing import List
+from typing import List, Optional
 
 from lib.constants import LATIN_1_ENCODING
 from lib.logger import LOGGER
+from lib.resource_governor import GOVERNOR
 from lib.shell_command import ShellCommand
 from lib.variant import Variant
 
@@ -32,11 +33,43 @@ class DicChunk:
     def rm(self) -> None:
         """Remove the chunk file."""
         LOGGER.debug(f"Removing {self} ...")
-        shutil.rmtree(self.filepath)
+        os.remove(self.filepath)
+
+    @staticmethod
+    def read_dic_lines(dic_path: str, sample_size: int = 0) -> List[str]:
+        """Read the entries of a .dic file, skipping the count on the first line and comment lines.
+
+        Args:
+            dic_path (str): the path to the .dic file
+            sample_size (int): the number of lines to read from the dictionary file; if 0 or negative, read all lines
+
+        Returns:
+            the lines, each still ending with a newline
+        """
+        with open(dic_path, 'r', encoding=LATIN_1_ENCODING) as dic_file:
+            lines = dic_file.readlines()[1:]  # Skip the first line
+        lines = [line for line in lines if not line.startswith("#")]  # Filter out comment lines
+        if sample_size > 0:
+            lines = lines[0:sample_size]
+        return lines
+
+    @classmethod
+    def from_lines(cls, lines: List[str], chunk_name: str, target_dir: str, compounds: bool = False):
+        """Writes the given .dic lines (each ending with a newline) into a new chunk file.
+
+        Returns:
+            the DicChunk object for the new file
+        """
+        chunk_path = path.join(target_dir, chunk_name + ".dic")
+        with open(chunk_path, 'w', encoding=LATIN_1_ENCODING) as chunk_file:
+            # Prepend the count of lines in this chunk and then write all lines
+            chunk_file.write(f"{len(lines)}\n")
+            chunk_file.writelines(lines)
+        return cls(chunk_path, chunk_name, compounds)
 
     @classmethod
     def from_hunspell_dic(cls, variant: Variant, chunk_size: int, target_dir: str, sample_size: int,
-                          compounds: bool = False) -> List:
+                          compounds: bool = False, lines: Optional[List[str]] = None) -> List:
         """Splits a dictionary file into smaller files (chunks) of a given number of lines.
 
         Args:
@@ -45,6 +78,8 @@ class DicChunk:
             target_dir (str): the directory where the chunks will be saved
             sample_size (int): the number of lines to read from the dictionary file; if 0 or negative, read all lines
             compounds (bool): whether this is a file containing compounds or not
+            lines (List[str]): the lines to split, if already read (e.g. by lib.dic_normaliser); each must end with a
+                               newline
 
         Returns:
             A list of DicChunk objects, each representing a chunk of the dictionary file
@@ -56,32 +91,25 @@ class DicChunk:
             tmp_dir = target_dir
             dic_path = variant.dic()
         LOGGER.debug(f"Splitting dictionary file \"{dic_path}\" into chunks...")
-        with open(dic_path, 'r', encoding=LATIN_1_ENCODING) as dic_file:
-            lines = dic_file.readlines()[1:]  # Skip the first line
-        lines = [line for line in lines if not line.startswith("#")]  # Filter out comment lines
-        if sample_size > 0:
-            lines = lines[0:sample_size]
+        if lines is None:
+            lines = cls.read_dic_lines(dic_path, sample_size)
         total_lines = len(lines)
         str_chunks: List[List[str]] = [lines[i:i + chunk_size] for i in range(0, total_lines, chunk_size)]
         chunks: List[cls] = []
         for index, chunk in enumerate(str_chunks):
-            chunk_name = f"{variant.underscored}_chunk{index}"
-            filename = chunk_name + ".dic"
-            chunk_path = path.join(tmp_dir, filename)
-            with open(chunk_path, 'w', encoding=LATIN_1_ENCODING) as chunk_file:
-                # Prepend the count of lines in this chunk and then write all lines
-                chunk_file.write(f"{len(chunk)}\n")
-                chunk_file.writelines(chunk)
-            chunks.append(cls(chunk_path, chunk_name, compounds))
+            chunks.append(cls.from_lines(chunk, f"{variant.underscored}_chunk{index}", tmp_dir, compounds))
         LOGGER.debug(f"Split into {len(chunks)} chunks.")
         return chunks
 
-    def unmunch(self, aff_path: str, delete_tmp: bool = False) -> NamedTemporaryFile:
+    def unmunch(self, aff_path: str, delete_tmp: bool = False,
+                remove_chunk: Optional[bool] = None) -> NamedTemporaryFile:
         """Create all forms from Hunspell dictionaries.
 
         Args:
             aff_path: the path to the .aff file
             delete_tmp: whether to delete the temporary file after use
+            remove_chunk: whether to remove the chunk file once it is unmunched; defaults to `delete_tmp`. Callers that
+                          may need to run the chunk again (e.g. lib.chunk_runner) should remove it themselves.
 
         Returns:
             the temp file containing the unmunched dictionary
@@ -90,9 +118,10 @@ class DicChunk:
                                            prefix=f"{self.name}_unmunched_")
         LOGGER.debug(f"Unmunching {self} into {unmunched_tmp.name} ...")
         cmd_unmunch = f"unmunch {self.filepath} {aff_path}"
-        unmunch_result = ShellCommand(cmd_unmunch).run()
+        with GOVERNOR.acquire('unmunch'):
+            unmunch_result = ShellCommand(cmd_unmunch).run()
         unmunched_tmp.write(unmunch_result)
         unmunched_tmp.flush()
-        if delete_tmp:
+        if delete_tmp if remove_chunk is None else remove_chunk:
             self.rm()
         return unmunched_tmp
@@ -0,0 +1,131 @@
+"""A pass over the .dic lines of a variant before they are chunked, to avoid expanding the same forms more than once.
+
+- Exact duplicate lines are dropped.
+- Lines with the same stem are merged into one line with the union of their flags, when that can't change the forms
+  generated: none of the flags is special (NEEDAFFIX, ONLYINCOMPOUND, etc.) or unknown, neither line has morphological
+  fields, and the union doesn't let a prefix from one line combine with a suffix from the other.
+- Lines of the main .dic that are also in the compounds .dic are dropped from the main one, when none of their forms
+  can be split by the tokeniser (so that tokenising them would not have produced anything else). This is checked before
+  lines are merged.
+"""
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+
+from lib.hunspell_aff import AffixTable, parse_dic_line
+from lib.word_tokeniser import can_split
+
+
+class NormalisationStats:
+    """What the normalisation saved, for the report."""
+    def __init__(self):
+        self.lines_in = 0
+        self.lines_out = 0
+        self.duplicates = 0
+        self.merged = 0
+        self.in_compounds = 0
+
+    def __str__(self) -> str:
+        saved = self.lines_in - self.lines_out
+        percent = 100 * saved / self.lines_in if self.lines_in else 0
+        return (f"{self.lines_in} -> {self.lines_out} lines ({saved} fewer, {percent:.1f}%): {self.duplicates} "
+                f"duplicates, {self.merged} merged into lines with the same stem, {self.in_compounds} already in the "
+                f"compounds")
+
+
+class DicNormaliser:
+    """Normalises .dic lines given the rules of the .aff file they go with.
+
+    Attributes:
+        table (AffixTable): the parsed .aff file
+        split_chars (FrozenSet[str]): the characters on which the tokeniser may split forms (see `bypass_characters`)
+    """
+    def __init__(self, table: AffixTable, split_chars: FrozenSet[str]):
+        self.table = table
+        self.split_chars = split_chars
+        self.special_flags = set(table.special_flags.values())
+
+    def mergeable_flags(self, line: str) -> Optional[List[str]]:
+        """The flags of a line if it may be merged with others, or None."""
+        stem, flags, morphology = parse_dic_line(line)
+        if morphology or self.table.aliases:  # flags can't be written as a union when lines refer to AF aliases
+            return None
+        parsed = self.table.parse_flags(flags)
+        if any(flag in self.special_flags or flag not in self.table.rules for flag in parsed):
+            return None
+        return parsed
+
+    def cross_products(self, flags: List[str]) -> Set[Tuple[str, str]]:
+        """The (prefix, suffix) flag pairs that unmunch combines for a line with these flags."""
+        prefixes = [flag for flag in flags if self.table.kind(flag) == 'PFX' and self.table.cross_product.get(flag)]
+        suffixes = [flag for flag in flags if self.table.kind(flag) == 'SFX' and self.table.cross_product.get(flag)]
+        return {(prefix, suffix) for prefix in prefixes for suffix in suffixes}
+
+    def can_merge(self, flags: List[str], other: List[str]) -> bool:
+        union = list(dict.fromkeys(flags + other))
+        return self.cross_products(union) <= self.cross_products(flags) | self.cross_products(other)
+
+    def affix_additions(self, flags: List[str]) -> Set[str]:
+        """Everything the affixes of these flags (and their continuation classes) may add to the stem."""
+        additions = set()
+        for flag in flags:
+            for rule in self.table.rules.get(flag, []):
+                additions.add(rule.add)
+                for continuation in self.table.parse_flags(rule.continuation):
+                    additions.update(twofold.add for twofold in self.table.rules.get(continuation, []))
+        return additions
+
+    def never_split(self, line: str) -> bool:
+        stem, flags, _ = parse_dic_line(line)
+        if not stem or can_split(stem.replace("\\/", "/"), self.split_chars):
+            return False
+        return not any(addition and can_split(addition, self.split_chars)
+                       for addition in self.affix_additions(self.table.parse_flags(flags)))
+
+    def merge_lines(self, lines: List[str], stats: NormalisationStats) -> List[str]:
+        """Drop duplicates and merge lines with the same stem, keeping the position of the first line of each stem."""
+        output: List[str] = []
+        seen: Set[str] = set()
+        # stem -> indices in `output` of the lines with that stem that may still take more flags
+        open_lines: Dict[str, List[int]] = {}
+        merged_flags: Dict[int, List[str]] = {}
+        for line in lines:
+            if line in seen:
+                stats.duplicates += 1
+                continue
+            seen.add(line)
+            flags = self.mergeable_flags(line)
+            if flags is None:
+                output.append(line)
+                continue
+            stem = parse_dic_line(line)[0]
+            for index in open_lines.get(stem, []):
+                if self.can_merge(merged_flags[index], flags):
+                    merged = merged_flags[index] = list(dict.fromkeys(merged_flags[index] + flags))
+                    output[index] = f"{stem}/{self.table.format_flags(merged)}" if merged else stem
+                    stats.merged += 1
+                    break
+            else:
+                open_lines.setdefault(stem, []).append(len(output))
+                merged_flags[len(output)] = flags
+                output.append(line)
+        return output
+
+    def normalise(self, main_lines: List[str],
+                  compound_lines: List[str]) -> Tuple[List[str], List[str], NormalisationStats]:
+        """Normalise the lines (without newlines) of the main and the compounds .dic files of a variant.
+
+        Returns:
+            the normalised main lines, the normalised compound lines, and the statistics
+        """
+        stats = NormalisationStats()
+        stats.lines_in = len(main_lines) + len(compound_lines)
+        compound_set = set(compound_lines)
+        main = []
+        for line in main_lines:
+            if line in compound_set and self.never_split(line):
+                stats.in_compounds += 1
+            else:
+                main.append(line)
+        main = self.merge_lines(main, stats)
+        compounds = self.merge_lines(compound_lines, stats)
+        stats.lines_out = len(main) + len(compounds)
+        return main, compounds, stats
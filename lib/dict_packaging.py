@@ -0,0 +1,248 @@
+"""Packages the dictionary resources into a jar and installs it into the local Maven repository, without Maven.
+
+The jar holds what `mvn install` would put in it for a resources-only project: everything under `src/main/resources`,
+a manifest, and the pom under META-INF/maven. Entries are sorted and have fixed timestamps, so the same resources always
+produce the same jar, byte for byte. A digest of the resources is kept next to the jar, and nothing is repackaged or
+reinstalled while it matches.
+"""
+import hashlib
+import io
+import os
+import re
+import shutil
+import zipfile
+from os import path
+from typing import Dict, List, Optional
+from xml.etree import ElementTree
+
+from lib.logger import LOGGER
+
+ZIP_TIMESTAMP = (1980, 1, 1, 0, 0, 0)
+MANIFEST = "Manifest-Version: 1.0\r\nCreated-By: dictionary-tools\r\n\r\n"
+PROPERTY_PATTERN = re.compile(r"\$\{([^}]+)}")
+
+
+class PackagingError(Exception):
+    """Raised when the project can't be packaged without Maven, e.g. because its pom needs a plugin."""
+
+
+def file_digest(filepath: str, algorithm: str) -> str:
+    digest = hashlib.new(algorithm)
+    with open(filepath, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def local_repository() -> str:
+    """The local Maven repository, as set in ~/.m2/settings.xml, or its default location."""
+    settings_path = path.expanduser(path.join('~', '.m2', 'settings.xml'))
+    if path.exists(settings_path):
+        with open(settings_path, 'r', encoding='utf-8') as settings_file:
+            match = re.search(r"<localRepository>\s*(.+?)\s*</localRepository>", settings_file.read())
+        if match:
+            return path.expanduser(match.group(1))
+    return path.expanduser(path.join('~', '.m2', 'repository'))
+
+
+class PomInfo:
+    """The coordinates of a project, read from its pom.xml.
+
+    Attributes:
+        group_id (str): the groupId of the project (or of its parent)
+        artifact_id (str): the artifactId of the project
+        version (str): the version of the project, with properties and ${env.*} references resolved
+        text (str): the pom, with the version resolved
+    """
+    def __init__(self, pom_path: str, env: Optional[Dict[str, str]] = None):
+        with open(pom_path, 'r', encoding='utf-8') as pom_file:
+            original = pom_file.read()
+        root = ElementTree.fromstring(original)
+        namespace = root.tag[:root.tag.index('}') + 1] if root.tag.startswith('{') else ''
+        properties = {child.tag[len(namespace):]: (child.text or '').strip()
+                      for child in root.findall(f"{namespace}properties/*")}
+
+        def field(name: str) -> Optional[str]:
+            element = root.find(f"{namespace}{name}")
+            if element is None:
+                element = root.find(f"{namespace}parent/{namespace}{name}")
+            return None if element is None else (element.text or '').strip()
+
+        def resolve(value: str) -> str:
+            def replace(match):
+                name = match.group(1)
+                if name.startswith('env.'):
+                    resolved = (env or {}).get(name[4:], os.environ.get(name[4:]))
+                else:
+                    resolved = properties.get(name)
+                if resolved is None:
+                    raise PackagingError(f"Can't resolve ${{{name}}} in {pom_path}")
+                return resolve(resolved)
+            return PROPERTY_PATTERN.sub(replace, value)
+
+        packaging = field('packaging') or 'jar'
+        if packaging != 'jar':
+            raise PackagingError(f"{pom_path} has packaging \"{packaging}\", only \"jar\" is supported.")
+        if root.find(f"{namespace}build/{namespace}plugins") is not None:
+            raise PackagingError(f"{pom_path} configures build plugins, which only Maven can run.")
+        self.group_id = resolve(field('groupId') or '')
+        self.artifact_id = resolve(field('artifactId') or '')
+        raw_version = field('version') or ''
+        self.version = resolve(raw_version)
+        if not self.group_id or not self.artifact_id or not self.version:
+            raise PackagingError(f"{pom_path} is missing its groupId, artifactId or version.")
+        version_tag = f"<version>{raw_version}</version>"
+        project_start = original.index('<project')
+        if root.find(f"{namespace}parent") is not None and root.find(f"{namespace}version") is not None:
+            # the first <version> belongs to the parent, so skip past it
+            project_start = original.index('</parent>')
+        index = original.find(version_tag, project_start)
+        self.text = original if index == -1 else \
+            original[:index] + f"<version>{self.version}</version>" + original[index + len(version_tag):]
+
+    @property
+    def basename(self) -> str:
+        return f"{self.artifact_id}-{self.version}"
+
+
+class DictPackager:
+    """Builds and installs the jar of a dictionary project, such as JAVA_RESULTS_DIR.
+
+    Attributes:
+        project_dir (str): the directory with the pom.xml and src/main/resources
+        pom (PomInfo): the coordinates of the project
+        repository (str): the local Maven repository to install into
+    """
+    def __init__(self, project_dir: str, env: Optional[Dict[str, str]] = None, repository: Optional[str] = None):
+        self.project_dir = project_dir
+        self.pom = PomInfo(path.join(project_dir, 'pom.xml'), env)
+        self.repository = repository or local_repository()
+        self.resources_dir = path.join(project_dir, 'src', 'main', 'resources')
+        self.target_dir = path.join(project_dir, 'target')
+
+    @property
+    def jar_path(self) -> str:
+        return path.join(self.target_dir, f"{self.pom.basename}.jar")
+
+    @property
+    def install_dir(self) -> str:
+        return path.join(self.repository, *self.pom.group_id.split('.'), self.pom.artifact_id, self.pom.version)
+
+    def resource_files(self) -> List[str]:
+        """The resource files, as sorted paths relative to the resources directory, with forward slashes."""
+        files = []
+        for root, _, filenames in os.walk(self.resources_dir):
+            for filename in filenames:
+                files.append(path.relpath(path.join(root, filename), self.resources_dir).replace(os.sep, '/'))
+        return sorted(files)
+
+    def resources_digest(self) -> str:
+        """A digest of the coordinates, the pom and every resource file, to tell whether the jar is up to date."""
+        digest = hashlib.sha256(self.pom.text.encode('utf-8'))
+        for relative_path in self.resource_files():
+            digest.update(f"\0{relative_path}\0".encode('utf-8'))
+            digest.update(bytes.fromhex(file_digest(path.join(self.resources_dir, relative_path), 'sha256')))
+        return digest.hexdigest()
+
+    @staticmethod
+    def add_entry(jar: zipfile.ZipFile, name: str, data: bytes = None, source: str = None) -> None:
+        info = zipfile.ZipInfo(name, ZIP_TIMESTAMP)
+        if name.endswith('/'):
+            info.external_attr = (0o40755 << 16) | 0x10
+            jar.writestr(info, b'')
+            return
+        info.external_attr = 0o100644 << 16
+        info.compress_type = zipfile.ZIP_DEFLATED
+        if source is not None:
+            with open(source, 'rb') as source_file, jar.open(info, 'w') as entry:
+                shutil.copyfileobj(source_file, entry, 1 << 20)
+        else:
+            jar.writestr(info, data)
+
+    def write_jar(self, jar_path: str) -> None:
+        files = self.resource_files()
+        directories = sorted({'/'.join(relative_path.split('/')[:i]) + '/' for relative_path in files
+                              for i in range(1, relative_path.count('/') + 1)})
+        maven_dir = f"META-INF/maven/{self.pom.group_id}/{self.pom.artifact_id}/"
+        pom_properties = (f"artifactId={self.pom.artifact_id}\ngroupId={self.pom.group_id}\n"
+                          f"version={self.pom.version}\n")
+        with zipfile.ZipFile(jar_path, 'w') as jar:
+            self.add_entry(jar, 'META-INF/')
+            self.add_entry(jar, 'META-INF/MANIFEST.MF', MANIFEST.encode('utf-8'))
+            for directory in directories:
+                self.add_entry(jar, directory)
+            for relative_path in files:
+                self.add_entry(jar, relative_path, source=path.join(self.resources_dir, relative_path))
+            for directory in ['META-INF/maven/', f"META-INF/maven/{self.pom.group_id}/", maven_dir]:
+                self.add_entry(jar, directory)
+            self.add_entry(jar, maven_dir + 'pom.xml', self.pom.text.encode('utf-8'))
+            self.add_entry(jar, maven_dir + 'pom.properties', pom_properties.encode('utf-8'))
+
+    @staticmethod
+    def write_checksums(filepath: str) -> None:
+        for algorithm in ('sha1', 'md5'):
+            with open(f"{filepath}.{algorithm}", 'w') as checksum_file:
+                checksum_file.write(file_digest(filepath, algorithm))
+
+    def package(self) -> bool:
+        """Build the jar, its pom and their checksums in target/, unless the resources haven't changed.
+
+        Returns:
+            whether the jar was (re)built
+        """
+        digest = self.resources_digest()
+        digest_path = f"{self.jar_path}.resources"
+        if path.exists(self.jar_path) and path.exists(digest_path):
+            with open(digest_path, 'r') as digest_file:
+                if digest_file.read() == digest:
+                    LOGGER.info(f"Resources unchanged since {self.jar_path} was built, not repackaging.")
+                    return False
+        os.makedirs(self.target_dir, exist_ok=True)
+        LOGGER.info(f"Packaging {len(self.resource_files())} resource files into {self.jar_path} ...")
+        tmp_jar = f"{self.jar_path}.tmp"
+        self.write_jar(tmp_jar)
+        os.replace(tmp_jar, self.jar_path)
+        pom_path = path.join(self.target_dir, f"{self.pom.basename}.pom")
+        with open(pom_path, 'w', encoding='utf-8') as pom_file:
+            pom_file.write(self.pom.text)
+        for filepath in (self.jar_path, pom_path):
+            self.write_checksums(filepath)
+        with open(digest_path, 'w') as digest_file:
+            digest_file.write(digest)
+        return True
+
+    def install(self) -> bool:
+        """Copy the jar, pom and checksums into the local repository, unless the same jar is already there.
+
+        Returns:
+            whether anything was copied
+        """
+        installed_jar = path.join(self.install_dir, f"{self.pom.basename}.jar")
+        if path.exists(installed_jar) and file_digest(installed_jar, 'sha1') == file_digest(self.jar_path, 'sha1'):
+            LOGGER.info(f"{installed_jar} is already up to date.")
+            return False
+        os.makedirs(self.install_dir, exist_ok=True)
+        for extension in ('jar', 'pom'):
+            for suffix in ('', '.sha1', '.md5'):
+                filename = f"{self.pom.basename}.{extension}{suffix}"
+                shutil.copyfile(path.join(self.target_dir, filename), path.join(self.install_dir, filename))
+        self.write_metadata()
+        LOGGER.info(f"Installed {self.pom.group_id}:{self.pom.artifact_id}:{self.pom.version} into {self.install_dir}")
+        return True
+
+    def write_metadata(self) -> None:
+        """Add the version to the artifact's maven-metadata-local.xml, as `mvn install` does."""
+        metadata_path = path.join(path.dirname(self.install_dir), 'maven-metadata-local.xml')
+        versions = set()
+        if path.exists(metadata_path):
+            versions = {element.text for element in ElementTree.parse(metadata_path).iter('version') if element.text}
+        versions.add(self.pom.version)
+        buffer = io.StringIO()
+        buffer.write('<?xml version="1.0" encoding="UTF-8"?>\n<metadata>\n')
+        buffer.write(f"  <groupId>{self.pom.group_id}</groupId>\n  <artifactId>{self.pom.artifact_id}</artifactId>\n")
+        buffer.write("  <versioning>\n    <versions>\n")
+        for version in sorted(versions):
+            buffer.write(f"      <version>{version}</version>\n")
+        buffer.write("    </versions>\n  </versioning>\n</metadata>\n")
+        with open(metadata_path, 'w', encoding='utf-8') as metadata_file:
+            metadata_file.write(buffer.getvalue())
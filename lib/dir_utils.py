@@ -37,6 +37,10 @@ class DirUtils:
         self.SORTED_POS_DICT_FILEPATH = path.join(self.LT_RESULTS_DIR, "dict_sorted.txt")
         self.POS_DICT_DIFF_FILEPATH = path.join(self.LT_RESULTS_DIR, "dict.diff")
         self.OLD_POS_DICT_FILEPATH = path.join(self.LT_RESULTS_DIR, "dict.old")
+        # Class Data Sharing archives for the LT jars, to speed up JVM startup
+        self.CDS_DIR = path.join(self.RESULTS_DIR, 'cds')
+        # Indices and merged word lists kept between runs of incremental spelling builds
+        self.INCREMENTAL_DIR = path.join(self.RESULTS_DIR, 'incremental')
 
         # Paths to Jar files. These are the ones we will use to compile the Morfologik-format dictionaries to be used
         # by LT.
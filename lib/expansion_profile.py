@@ -0,0 +1,119 @@
+"""Statistics on how much each .dic entry and each affix flag contributes to the expansion of a Hunspell dictionary.
+
+For every entry, we count the forms unmunch generates from it, the distinct tokens left after tokenisation, and how
+many of those tokens are also produced by some other entry (and so cost unmunch time without adding to the binary).
+
+The cost of a flag is measured by expanding every stem that uses it with that flag alone, and counting what it adds to
+the bare stem; forms that only come from combining a prefix with a suffix are not attributed to either of them.
+"""
+from collections import Counter
+from typing import Dict, List, Set, Tuple
+
+from lib.hunspell_aff import AffixTable, parse_dic_line
+
+Forms = Dict[int, Set[str]]
+# (flag, index of the entry with the stem and that flag alone, index of the entry with the bare stem)
+FlagEntry = Tuple[str, int, int]
+
+
+def single_flag_entries(lines: List[str], table: AffixTable) -> Tuple[List[str], List[FlagEntry]]:
+    """The entries needed to measure the cost of each flag: every stem on its own, and with each of its affix flags.
+
+    Returns:
+        the distinct entries to expand, and a FlagEntry for each use of an affix flag in the lines
+    """
+    entries: Dict[str, int] = {}
+    flag_entries = []
+    for line in lines:
+        stem, flags, _ = parse_dic_line(line)
+        stem_index = entries.setdefault(stem, len(entries))
+        for flag in table.parse_flags(flags):
+            if flag in table.rules:
+                flag_entries.append((flag, entries.setdefault(f"{stem}/{table.format_flags([flag])}", len(entries)),
+                                     stem_index))
+    return list(entries.keys()), flag_entries
+
+
+def histogram(values: List[int]) -> Dict[str, int]:
+    """Count the values in power-of-two buckets: "0", "1", "2-3", "4-7", etc."""
+    buckets: Dict[str, int] = {}
+    for value in sorted(values):
+        if value == 0:
+            bucket = "0"
+        else:
+            low = 1 << (value.bit_length() - 1)
+            bucket = str(low) if low == 1 else f"{low}-{2 * low - 1}"
+        buckets[bucket] = buckets.get(bucket, 0) + 1
+    return buckets
+
+
+def profile_entries(lines: List[str], generated: Forms, tokenised: Forms) -> Tuple[List[dict], Counter]:
+    """Profile each .dic line.
+
+    Returns:
+        a dict of statistics for each line, and the number of lines producing each token
+    """
+    token_counts = Counter()
+    for tokens in tokenised.values():
+        token_counts.update(tokens)
+    profiles = []
+    for index, line in enumerate(lines):
+        tokens = tokenised.get(index, set())
+        profiles.append({
+            'entry': line,
+            'generated': len(generated.get(index, ())),
+            'tokens': len(tokens),
+            'duplicates': sum(1 for token in tokens if token_counts[token] > 1),
+        })
+    return profiles, token_counts
+
+
+def profile_flags(table: AffixTable, flag_entries: List[FlagEntry], generated: Forms, tokenised: Forms,
+                  token_counts: Counter) -> List[dict]:
+    """Profile each affix flag from the expansion of the entries returned by `single_flag_entries`.
+
+    Args:
+        token_counts: the number of .dic lines producing each token, as returned by `profile_entries`
+    """
+    costs: Dict[str, List[Tuple[int, int, int]]] = {}
+    for flag, entry_index, stem_index in flag_entries:
+        added_forms = generated.get(entry_index, set()) - generated.get(stem_index, set())
+        added_tokens = tokenised.get(entry_index, set()) - tokenised.get(stem_index, set())
+        duplicates = sum(1 for token in added_tokens if token_counts[token] > 1)
+        costs.setdefault(flag, []).append((len(added_forms), len(added_tokens), duplicates))
+    profiles = []
+    for flag, flag_costs in costs.items():
+        profiles.append({
+            'flag': flag,
+            'kind': table.kind(flag),
+            'rules': len(table.rules.get(flag, [])),
+            'entries': len(flag_costs),
+            'generated': sum(cost[0] for cost in flag_costs),
+            'tokens': sum(cost[1] for cost in flag_costs),
+            'duplicates': sum(cost[2] for cost in flag_costs),
+            'max_per_entry': max(cost[0] for cost in flag_costs),
+            'histogram': histogram([cost[0] for cost in flag_costs]),
+        })
+    return profiles
+
+
+def format_table(report: dict, top: int) -> str:
+    """A plain-text rendering of a profile report, with the top entries and flags by number of generated forms."""
+    approximate = " (approximate: Python tokeniser)" if report.get('tokeniser') == 'python' else ""
+    out = [f"{report['variant']}: {report['lines']} lines, {report['generated']} generated forms, "
+           f"{report['tokens']} distinct tokens{approximate}", "",
+           f"Top {top} entries by generated forms:",
+           f"{'generated':>10} {'tokens':>8} {'dupes':>8}  entry"]
+    for entry in report['top_entries']:
+        compounds = " (compounds)" if entry.get('compounds') else ""
+        out.append(f"{entry['generated']:>10} {entry['tokens']:>8} {entry['duplicates']:>8}  "
+                   f"{entry['entry']}{compounds}")
+    out += ["", f"Top {top} flags by generated forms:",
+            f"{'flag':>6} {'kind':>4} {'rules':>6} {'entries':>8} {'generated':>10} {'tokens':>8} {'dupes':>8} "
+            f"{'max':>6}  forms per entry"]
+    for flag in report['top_flags']:
+        buckets = ", ".join(f"{bucket}: {count}" for bucket, count in flag['histogram'].items())
+        out.append(f"{flag['flag']:>6} {flag['kind'] or '?':>4} {flag['rules']:>6} {flag['entries']:>8} "
+                   f"{flag['generated']:>10} {flag['tokens']:>8} {flag['duplicates']:>8} {flag['max_per_entry']:>6}  "
+                   f"{buckets}")
+    return "\n".join(out)
@@ -0,0 +1,127 @@
+"""Watches directories for changed files, with inotify where available and by polling modification times otherwise.
+
+Changes are debounced: a batch is only reported once no further change has been seen for `debounce_seconds`, so that
+an editor saving several files (or one file in several writes) triggers a single rebuild.
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+from os import path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from lib.logger import LOGGER
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, length of the name that follows
+
+
+class InotifyBackend:
+    """Reports the files changed in a set of (non-recursively) watched directories, using the Linux inotify API."""
+    def __init__(self, directories: List[str]):
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.directories: Dict[int, str] = {}
+        for directory in directories:
+            wd = libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+            if wd < 0:
+                os.close(self.fd)
+                raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+            self.directories[wd] = directory
+
+    def poll(self, timeout: float) -> Set[str]:
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+        changed = set()
+        data = os.read(self.fd, 64 * 1024)
+        offset = 0
+        while offset < len(data):
+            wd, _, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            if wd in self.directories and name:
+                changed.add(path.join(self.directories[wd], os.fsdecode(name)))
+        return changed
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class PollingBackend:
+    """Reports the files changed in a set of directories by comparing their modification times and sizes."""
+    def __init__(self, directories: List[str], poll_interval: float = 1.0):
+        self.directories = directories
+        self.poll_interval = poll_interval
+        self.snapshot = self.take_snapshot()
+
+    def take_snapshot(self) -> Dict[str, Tuple[int, int]]:
+        snapshot = {}
+        for directory in self.directories:
+            for entry in os.scandir(directory):
+                if entry.is_file():
+                    stat = entry.stat()
+                    snapshot[entry.path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def poll(self, timeout: float) -> Set[str]:
+        time.sleep(min(timeout, self.poll_interval))
+        snapshot = self.take_snapshot()
+        changed = {filepath for filepath in snapshot.keys() | self.snapshot.keys()
+                   if snapshot.get(filepath) != self.snapshot.get(filepath)}
+        self.snapshot = snapshot
+        return changed
+
+    def close(self) -> None:
+        pass
+
+
+class FileWatcher:
+    """Yields batches of changed files in the given directories.
+
+    Attributes:
+        directories (List[str]): the directories to watch; those that don't exist are skipped
+        debounce_seconds (float): how long to wait after the last change before reporting a batch
+    """
+    def __init__(self, directories: List[str], debounce_seconds: float = 1.0, poll_interval: float = 1.0,
+                 use_inotify: bool = True):
+        self.directories = sorted({path.abspath(directory) for directory in directories if path.isdir(directory)})
+        self.debounce_seconds = debounce_seconds
+        self.backend: Optional[InotifyBackend] = None
+        if use_inotify:
+            try:
+                self.backend = InotifyBackend(self.directories)
+            except (OSError, AttributeError, TypeError) as e:  # not Linux, or the watch limit was reached
+                LOGGER.info(f"inotify is not available ({e}), polling for changes instead.")
+        if self.backend is None:
+            self.backend = PollingBackend(self.directories, poll_interval)
+        LOGGER.info(f"Watching {', '.join(self.directories)} with {type(self.backend).__name__}.")
+
+    def changes(self) -> Iterator[Tuple[Set[str], float]]:
+        """Yield each debounced batch of changed paths, with the time.monotonic() of the first change in it."""
+        while True:
+            changed = self.backend.poll(timeout=60)
+            if not changed:
+                continue
+            first_change = last_change = time.monotonic()
+            while time.monotonic() - last_change < self.debounce_seconds:
+                more = self.backend.poll(timeout=self.debounce_seconds)
+                if more:
+                    changed |= more
+                    last_change = time.monotonic()
+            yield changed, first_change
+
+    def close(self) -> None:
+        self.backend.close()
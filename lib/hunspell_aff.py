@@ -0,0 +1,169 @@
+"""Just enough of a Hunspell .aff parser to reason about which affix flags a .dic line uses and what those flags do."""
+import hashlib
+from typing import Dict, List, Optional, Set, Tuple
+
+from lib.constants import LATIN_1_ENCODING
+
+# Flags with a special meaning that changes which forms an entry produces, or how they can be used.
+SPECIAL_FLAG_DIRECTIVES = ('NEEDAFFIX', 'PSEUDOROOT', 'ONLYINCOMPOUND', 'FORBIDDENWORD', 'KEEPCASE', 'CIRCUMFIX',
+                           'NOSUGGEST', 'WARN', 'SUBSTANDARD', 'COMPOUNDFLAG', 'COMPOUNDBEGIN', 'COMPOUNDMIDDLE',
+                           'COMPOUNDEND', 'COMPOUNDPERMITFLAG', 'COMPOUNDFORBIDFLAG', 'COMPOUNDROOT', 'LEMMA_PRESENT')
+# Directives that only affect suggestions, and so never change the forms unmunch generates.
+SUGGESTION_DIRECTIVES = ('TRY', 'KEY', 'REP', 'MAP', 'PHONE', 'NOSPLITSUGS', 'MAXNGRAMSUGS', 'MAXCPDSUGS', 'MAXDIFF',
+                         'ONLYMAXDIFF', 'SUGSWITHDOTS', 'FORBIDWARN', 'WORDCHARS')
+
+
+class AffixRule:
+    """A single PFX or SFX rule line.
+
+    Attributes:
+        kind (str): 'PFX' or 'SFX'
+        flag (str): the flag the rule belongs to
+        strip (str): the characters removed from the stem ('' for none)
+        add (str): the characters added to the stem, without any continuation flags
+        continuation (str): the flags of the affix itself (twofold affixes), unparsed
+        condition (str): the condition the stem must match
+    """
+    def __init__(self, kind: str, flag: str, strip: str, add: str, condition: str):
+        self.kind = kind
+        self.flag = flag
+        self.strip = '' if strip == '0' else strip
+        add, _, continuation = add.partition('/')
+        self.add = '' if add == '0' else add
+        self.continuation = continuation
+        self.condition = condition
+
+
+class AffixTable:
+    """The affix flags of a Hunspell .aff file.
+
+    .aff and .dic files are read as Latin-1 throughout, so with FLAG UTF-8 each non-ASCII flag arrives as the several
+    characters of its UTF-8 bytes. Flags are decoded before they are split or used as keys, so the attributes below
+    hold the actual flags, and `format_flags` turns them back into the form they have in the lines read.
+
+    Attributes:
+        flag_type (str): the FLAG directive ('short' if absent, 'long', 'num' or 'UTF-8')
+        aliases (List[str]): the flag sets of AF directives; .dic lines may refer to them by their 1-based index
+        rules (Dict[str, List[AffixRule]]): the rules of each affix flag
+        cross_product (Dict[str, bool]): whether each affix flag combines with affixes of the other kind
+        special_flags (Dict[str, str]): the flag assigned to each of SPECIAL_FLAG_DIRECTIVES present in the file
+    """
+    def __init__(self):
+        self.flag_type = 'short'
+        self.aliases: List[str] = []
+        self.rules: Dict[str, List[AffixRule]] = {}
+        self.cross_product: Dict[str, bool] = {}
+        self.special_flags: Dict[str, str] = {}
+        self._flag_lines: Dict[str, List[str]] = {}
+        self._other_lines: List[str] = []
+
+    @classmethod
+    def from_file(cls, aff_path: str) -> 'AffixTable':
+        with open(aff_path, 'r', encoding=LATIN_1_ENCODING) as aff_file:
+            return cls.parse(aff_file.read())
+
+    @classmethod
+    def parse(cls, aff_content: str) -> 'AffixTable':
+        table = cls()
+        # The flag type is needed to read flags, and nothing stops FLAG from coming after the first affix rules.
+        for raw_line in aff_content.split("\n"):
+            parts = raw_line.split()
+            if len(parts) > 1 and parts[0] == 'FLAG':
+                table.flag_type = parts[1]
+        for raw_line in aff_content.split("\n"):
+            line = raw_line.strip()
+            if not line or line.startswith('#'):
+                continue
+            parts = line.split()
+            directive = parts[0]
+            if directive in ('PFX', 'SFX') and len(parts) >= 4:
+                flag = table.decode_flags(parts[1])
+                table._flag_lines.setdefault(flag, []).append(line)
+                if len(parts) == 4 and parts[2] in ('Y', 'N') and parts[3].isdigit():  # the header of an affix block
+                    table.cross_product[flag] = parts[2] == 'Y'
+                    table.rules.setdefault(flag, [])
+                else:
+                    condition = parts[4] if len(parts) > 4 else '.'
+                    table.rules.setdefault(flag, []).append(AffixRule(directive, flag, parts[2], parts[3], condition))
+                continue
+            if directive == 'AF' and len(parts) > 1 and not parts[1].isdigit():
+                table.aliases.append(parts[1])
+            elif directive in SPECIAL_FLAG_DIRECTIVES and len(parts) > 1:
+                table.special_flags[directive] = table.decode_flags(parts[1])
+            if directive not in SUGGESTION_DIRECTIVES:
+                table._other_lines.append(line)
+        return table
+
+    def kind(self, flag: str) -> Optional[str]:
+        rules = self._flag_lines.get(flag)
+        return rules[0].split()[0] if rules else None
+
+    def decode_flags(self, flags: str) -> str:
+        """Turn flags read as Latin-1 back into the characters they stand for, under FLAG UTF-8."""
+        if self.flag_type != 'UTF-8':
+            return flags
+        try:
+            return flags.encode(LATIN_1_ENCODING).decode('utf-8')
+        except (UnicodeEncodeError, UnicodeDecodeError):  # not read as Latin-1 in the first place
+            return flags
+
+    def format_flags(self, flags: List[str]) -> str:
+        """The reverse of `parse_flags` (without AF aliases): the flags as they would appear in a .dic line."""
+        if self.flag_type == 'num':
+            return ",".join(flags)
+        if self.flag_type == 'UTF-8':
+            return "".join(flags).encode('utf-8').decode(LATIN_1_ENCODING)
+        return "".join(flags)
+
+    def parse_flags(self, flags: str) -> List[str]:
+        """Split the flags of a .dic entry (the part after the slash) into individual flags."""
+        if not flags:
+            return []
+        if self.aliases and flags.isdigit():
+            index = int(flags) - 1
+            flags = self.aliases[index] if 0 <= index < len(self.aliases) else ''
+        if self.flag_type == 'long':
+            return [flags[i:i + 2] for i in range(0, len(flags), 2)]
+        if self.flag_type == 'num':
+            return [flag for flag in flags.split(',') if flag]
+        return list(self.decode_flags(flags))
+
+    def with_dependents(self, flags: Set[str]) -> Set[str]:
+        """The given flags plus every affix flag whose rules lead to one of them through continuation classes."""
+        result = set(flags)
+        added = True
+        while added:
+            added = False
+            for flag, rules in self.rules.items():
+                if flag not in result and any(set(self.parse_flags(rule.continuation)) & result for rule in rules):
+                    result.add(flag)
+                    added = True
+        return result
+
+    def flag_hashes(self) -> Dict[str, str]:
+        """A hash of the rule lines of every affix flag, to tell which flags were edited between two versions."""
+        return {flag: hashlib.sha1("\n".join(lines).encode('utf-8')).hexdigest()
+                for flag, lines in self._flag_lines.items()}
+
+    def header_hash(self) -> str:
+        """A hash of everything in the file that is not an affix rule (flag type, aliases, special flags, etc.)."""
+        return hashlib.sha1("\n".join(self._other_lines).encode('utf-8')).hexdigest()
+
+
+def parse_dic_line(line: str) -> Tuple[str, str, str]:
+    """Split a .dic line into its stem, its (unparsed) flags, and any morphological fields after them.
+
+    A slash in the stem can be escaped with a backslash, e.g. "km\\/h/X".
+    """
+    entry, _, morphology = line.partition('\t')
+    index = entry.find('/')
+    while index > 0 and entry[index - 1] == '\\':
+        index = entry.find('/', index + 1)
+    if index == -1:
+        stem, flags = entry, ''
+    else:
+        stem, flags = entry[:index], entry[index + 1:]
+    if ' ' in flags:
+        flags, _, extra = flags.partition(' ')
+        morphology = f"{extra}\t{morphology}" if morphology else extra
+    return stem, flags, morphology
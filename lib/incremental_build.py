@@ -0,0 +1,204 @@
+"""Line-level incremental builds of the merged spelling word list.
+
+Every .dic line (stem and flags, as written) is mapped to the tokenised forms it expands to, and that index is kept
+between runs together with a hash of the .aff file. On the next run, only lines that were added, removed or changed,
+and lines that use an affix flag whose rules were edited, are expanded again. The merged word list is then patched
+using reference counts, since the same form is usually produced by more than one line.
+
+To tell which forms came from which line, the lines are expanded with a sentinel entry (a plain word without flags,
+which unmunch and the tokeniser leave untouched) in front of each of them.
+"""
+import gzip
+import json
+import os
+import re
+from collections import Counter
+from os import path
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from lib.dic_chunk import DicChunk
+from lib.hunspell_aff import AffixTable, parse_dic_line
+from lib.logger import LOGGER
+from lib.variant import Variant
+
+SENTINEL_PREFIX = "qqdictoolsentry"
+# Sentinels are spelled with letters only, so that no tokeniser ever splits them.
+SENTINEL_PATTERN = re.compile(f"^{SENTINEL_PREFIX}([a-j]+)$")
+INDEX_VERSION = 2
+
+# Takes .dic lines (without newlines) and whether they are compounds, and returns the forms of each line by position.
+Expander = Callable[[List[str], bool], Dict[int, Set[str]]]
+
+
+def sentinel(index: int) -> str:
+    return SENTINEL_PREFIX + "".join(chr(ord('a') + int(digit)) for digit in str(index))
+
+
+def sentinel_index(word: str) -> Optional[int]:
+    match = SENTINEL_PATTERN.match(word)
+    if match is None:
+        return None
+    return int("".join(str(ord(letter) - ord('a')) for letter in match.group(1)))
+
+
+def delimit(lines: List[str]) -> List[str]:
+    """Put a sentinel line in front of each .dic line, so that even positions hold sentinels; newlines are added."""
+    delimited = []
+    for index, line in enumerate(lines):
+        delimited.append(sentinel(index) + "\n")
+        delimited.append(line + "\n")
+    return delimited
+
+
+def split_delimited(filepath: str, encoding: str = 'utf-8') -> Dict[int, Set[str]]:
+    """Read the expansion of delimited lines back into the forms of each line, by the position of the line."""
+    forms: Dict[int, Set[str]] = {}
+    current: Optional[Set[str]] = None
+    with open(filepath, 'r', encoding=encoding) as expanded:
+        for word in expanded.read().split("\n"):
+            if not word:
+                continue
+            index = sentinel_index(word)
+            if index is not None:
+                current = forms.setdefault(index, set())
+            elif current is not None:
+                current.add(word)
+    return forms
+
+
+def read_entries(dic_path: str, sample_size: int = 0) -> List[str]:
+    """The distinct lines of a .dic file, in their original order and without newlines."""
+    if not path.exists(dic_path):
+        return []
+    lines = (line.rstrip("\n") for line in DicChunk.read_dic_lines(dic_path, sample_size))
+    return list(dict.fromkeys(line for line in lines if line.strip()))
+
+
+class IncrementalIndex:
+    """What the previous run produced, as saved between runs.
+
+    Attributes:
+        header_hash (str): the hash of the non-affix part of the .aff file
+        flag_hashes (Dict[str, str]): the hash of the rules of each affix flag
+        tokeniser (str): the tokeniser the forms went through, since switching tokeniser invalidates all of them
+        entries (Dict[str, Dict[str, List[str]]]): for 'main' and 'compounds', the forms each .dic line expanded to
+    """
+    def __init__(self, header_hash: str, flag_hashes: Dict[str, str], tokeniser: str,
+                 entries: Dict[str, Dict[str, List[str]]]):
+        self.header_hash = header_hash
+        self.flag_hashes = flag_hashes
+        self.tokeniser = tokeniser
+        self.entries = entries
+
+    @classmethod
+    def load(cls, filepath: str) -> Optional['IncrementalIndex']:
+        if not path.exists(filepath):
+            return None
+        with gzip.open(filepath, 'rt', encoding='utf-8') as index_file:
+            data = json.load(index_file)
+        if data.get('version') != INDEX_VERSION:
+            return None
+        return cls(data['header_hash'], data['flag_hashes'], data['tokeniser'], data['entries'])
+
+    def save(self, filepath: str) -> None:
+        os.makedirs(path.dirname(filepath), exist_ok=True)
+        tmp_path = f"{filepath}.tmp"
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as index_file:
+            json.dump({'version': INDEX_VERSION, 'header_hash': self.header_hash, 'flag_hashes': self.flag_hashes,
+                       'tokeniser': self.tokeniser, 'entries': self.entries}, index_file, ensure_ascii=False)
+        os.replace(tmp_path, filepath)
+
+    def counts(self) -> Counter:
+        """How many .dic lines produce each form."""
+        counts = Counter()
+        for entries in self.entries.values():
+            for forms in entries.values():
+                counts.update(forms)
+        return counts
+
+
+class IncrementalBuild:
+    """Brings the merged word list of a variant up to date with its .dic and .aff files.
+
+    Attributes:
+        variant (Variant): the variant to build
+        expander (Expander): expands and tokenises .dic lines
+        tokeniser (str): the name of the tokeniser the expander uses
+        sample_size (int): the number of lines to read from each .dic file; if 0 or negative, read all lines
+    """
+    def __init__(self, variant: Variant, expander: Expander, tokeniser: str, sample_size: int = 0):
+        self.variant = variant
+        self.expander = expander
+        self.tokeniser = tokeniser
+        self.sample_size = sample_size
+        # Kept in memory after a run, so that a long-running process (see --watch) does not reload them every time.
+        self.index: Optional[IncrementalIndex] = None
+        self.counts: Optional[Counter] = None
+        self._table: Optional[AffixTable] = None
+        self._aff_mtime: Optional[int] = None
+
+    def affix_table(self) -> AffixTable:
+        """The parsed .aff file, parsed again only if the file was modified since the last call."""
+        mtime = os.stat(self.variant.aff()).st_mtime_ns
+        if self._table is None or mtime != self._aff_mtime:
+            self._table = AffixTable.from_file(self.variant.aff())
+            self._aff_mtime = mtime
+        return self._table
+
+    def expand(self, lines: Iterable[str], compounds: bool) -> Dict[str, List[str]]:
+        lines = list(lines)
+        if not lines:
+            return {}
+        forms = self.expander(lines, compounds)
+        return {line: sorted(forms.get(index, ())) for index, line in enumerate(lines)}
+
+    @staticmethod
+    def affected_lines(lines: Iterable[str], table: AffixTable, flags: Set[str]) -> List[str]:
+        """The lines using any of the given flags, directly or through an AF alias."""
+        return [line for line in lines if flags.intersection(table.parse_flags(parse_dic_line(line)[1]))]
+
+    def run(self) -> str:
+        """Update the index and the merged word list, and return the path to the word list."""
+        table = self.affix_table()
+        flag_hashes = table.flag_hashes()
+        sources = {'main': read_entries(self.variant.dic(), self.sample_size),
+                   'compounds': read_entries(self.variant.compounds(), self.sample_size)}
+        index = self.index or IncrementalIndex.load(self.variant.incremental_index())
+        if index is None or index.header_hash != table.header_hash() or index.tokeniser != self.tokeniser:
+            LOGGER.info(f"No usable incremental index for {self.variant}, expanding all lines...")
+            entries = {kind: self.expand(lines, kind == 'compounds') for kind, lines in sources.items()}
+            index = IncrementalIndex(table.header_hash(), flag_hashes, self.tokeniser, entries)
+            counts = index.counts()
+        else:
+            counts = self.counts if self.index is index and self.counts is not None else index.counts()
+            edited_flags = {flag for flag in set(flag_hashes) | set(index.flag_hashes)
+                            if flag_hashes.get(flag) != index.flag_hashes.get(flag)}
+            edited_flags = table.with_dependents(edited_flags)
+            if edited_flags:
+                LOGGER.info(f"Affix flags edited in {self.variant.aff()}: {sorted(edited_flags)}")
+            for kind, lines in sources.items():
+                entries = index.entries.setdefault(kind, {})
+                current = set(lines)
+                removed = [line for line in entries if line not in current]
+                added = [line for line in lines if line not in entries]
+                stale = self.affected_lines((line for line in entries if line in current), table, edited_flags)
+                LOGGER.info(f"{self.variant} {kind}: {len(added)} lines added, {len(removed)} removed, "
+                            f"{len(stale)} affected by edited flags.")
+                for line in removed + stale:
+                    for form in entries.pop(line):
+                        counts[form] -= 1
+                        if counts[form] <= 0:
+                            del counts[form]
+                for line, forms in self.expand(added + stale, kind == 'compounds').items():
+                    entries[line] = forms
+                    counts.update(forms)
+            index.flag_hashes = flag_hashes
+        self.index, self.counts = index, counts
+        words = sorted(form for form, count in counts.items() if count > 0)
+        wordlist_path = self.variant.incremental_wordlist()
+        os.makedirs(path.dirname(wordlist_path), exist_ok=True)
+        with open(wordlist_path, 'w', encoding='utf-8') as wordlist:
+            wordlist.write("\n".join(words))
+        index.save(self.variant.incremental_index())
+        LOGGER.info(f"Wrote {len(words)} unique forms for {self.variant} to {wordlist_path}.")
+        return wordlist_path
@@ -0,0 +1,127 @@
+"""Faster startup for the short-lived JVMs we launch, using Class Data Sharing (AppCDS) archives.
+
+The first JVM run on a given classpath dumps the classes it loaded into a dynamic archive; later runs on the same
+classpath map that archive instead of loading and verifying the classes from the jars again. Archives are keyed by a
+fingerprint of the jars and of the JDK, so a rebuilt LT jar or a new JDK gets a new archive.
+"""
+import hashlib
+import os
+import re
+import subprocess
+from contextlib import contextmanager
+from os import path
+from typing import Optional
+
+import lib.global_dirs as gd
+from lib.logger import LOGGER
+
+# Dynamic archives (-XX:ArchiveClassesAtExit) were added in JDK 13.
+MIN_JAVA_VERSION = 13
+# Flags for JVMs that only live for a few seconds: C1 only, no parallel GC threads, no perf data file.
+SHORT_LIVED_FLAGS = "-XX:TieredStopAtLevel=1 -XX:+UseSerialGC -XX:-UsePerfData"
+SHORT_LIVED_KINDS = frozenset(['tokenise', 'dump'])
+# HotSpot logs its warnings (e.g. "[warning][cds] Skipping ..." while dumping an archive, or an archive mismatch) to
+# stdout, which the tokeniser's output is read from; send them to stderr instead.
+LOG_FLAGS = "-Xlog:disable -Xlog:all=warning:stderr"
+
+
+def java_version() -> Optional[str]:
+    """The output of `java -version`, or None if there is no java on the path."""
+    try:
+        result = subprocess.run(['java', '-version'], capture_output=True, text=True)
+    except FileNotFoundError:
+        return None
+    return result.stderr.strip()
+
+
+def java_major_version(version: Optional[str] = None) -> Optional[int]:
+    match = re.search(r'version "(\d+)(?:\.(\d+))?', version if version is not None else java_version() or "")
+    if match is None:
+        return None
+    major = int(match.group(1))
+    return int(match.group(2)) if major == 1 else major  # "1.8.0" is Java 8
+
+
+def classpath_fingerprint(classpath: str, version: str = "") -> str:
+    """A short hash of the JDK version, and of the path, size and modification time of every entry in the classpath."""
+    digest = hashlib.sha1(version.encode())
+    for entry in classpath.split(':'):
+        digest.update(path.abspath(entry).encode())
+        if path.exists(entry):
+            stat = os.stat(entry)
+            digest.update(f"{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()[:16]
+
+
+class JvmStartup:
+    """Builds the startup flags for LT tool invocations and manages the CDS archives they use.
+
+    Attributes:
+        enabled (bool): whether CDS archives and the tuned startup flags are used at all
+    """
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._supported: Optional[bool] = None
+        self._version: Optional[str] = None
+
+    def version(self) -> str:
+        if self._version is None:
+            self._version = java_version() or ""
+        return self._version
+
+    def supported(self) -> bool:
+        if self._supported is None:
+            version = java_major_version(self.version())
+            self._supported = version is not None and version >= MIN_JAVA_VERSION
+            if not self._supported:
+                LOGGER.info(f"Java version {version} does not support dynamic CDS archives, not using them.")
+        return self._supported
+
+    def archive_path(self, classpath: str) -> str:
+        return path.join(gd.DIRS.CDS_DIR, f"{classpath_fingerprint(classpath, self.version())}.jsa")
+
+    @staticmethod
+    def clear() -> None:
+        """Remove all archives, e.g. after LT has been recompiled and the old ones can no longer be used."""
+        if not path.isdir(gd.DIRS.CDS_DIR):
+            return
+        for filename in os.listdir(gd.DIRS.CDS_DIR):
+            os.remove(path.join(gd.DIRS.CDS_DIR, filename))
+        LOGGER.debug(f"Cleared CDS archives in {gd.DIRS.CDS_DIR}.")
+
+    @contextmanager
+    def flags(self, classpath: str, kind: str):
+        """Yield the JVM flags for one run of a tool of the given kind on the given classpath.
+
+        If there is no archive for this classpath yet, one JVM (and only one, even with many running concurrently) is
+        asked to dump one when it exits. It is written to a temp path and renamed once the JVM has exited, so that other
+        JVMs never map a half-written archive.
+        """
+        if not self.enabled or not self.supported():
+            yield ""
+            return
+        startup_flags = f"{SHORT_LIVED_FLAGS} {LOG_FLAGS}" if kind in SHORT_LIVED_KINDS else LOG_FLAGS
+        archive = self.archive_path(classpath)
+        if path.exists(archive):
+            yield f"-Xshare:auto -XX:SharedArchiveFile={archive} {startup_flags}"
+            return
+        os.makedirs(gd.DIRS.CDS_DIR, exist_ok=True)
+        lock_path = f"{archive}.lock"
+        try:
+            os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        except FileExistsError:  # another JVM is already dumping the archive
+            yield startup_flags
+            return
+        tmp_archive = f"{archive}.{os.getpid()}.tmp"
+        LOGGER.debug(f"Creating CDS archive {archive} for {classpath} ...")
+        try:
+            yield f"-XX:ArchiveClassesAtExit={tmp_archive} {startup_flags}"
+            if path.exists(tmp_archive):
+                os.replace(tmp_archive, archive)
+        finally:
+            if path.exists(tmp_archive):
+                os.remove(tmp_archive)
+            os.remove(lock_path)
+
+
+JVM_STARTUP = JvmStartup()
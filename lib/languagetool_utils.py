@@ -1,18 +1,39 @@
 import re
 from tempfile import NamedTemporaryFile
-from typing import List
+from typing import List, Optional
 
-from lib.constants import LATIN_1_ENCODING, LT_VER
+from lib.constants import LATIN_1_ENCODING
 import lib.global_dirs as gd
+from lib.jvm_startup import JVM_STARTUP
 from lib.logger import LOGGER
+from lib.resource_governor import GOVERNOR
 from lib.shell_command import ShellCommand
 from lib.variant import Variant
+from lib.word_lists import merge_sorted_forms, sort_unique_forms
+from lib.word_tokeniser import bypass_characters, can_split
 
 
 class LanguageToolUtils:
-    def __init__(self, variant: Variant, delete_tmp: bool = False):
+    def __init__(self, variant: Variant, delete_tmp: bool = False, bypass: bool = True):
         self.variant = variant
         self.delete_tmp = delete_tmp
+        self.bypass = bypass
+
+    @staticmethod
+    def run_java(kind: str, main_class: str, args: str, classpath: str = None,
+                 input_data: str = None) -> Optional[str]:
+        """Run one of the LT tools once the governor admits it, with the heap size it expects for this kind of tool and
+        the JVM startup flags (including the CDS archive) for this classpath.
+
+        If `input_data` is given, it is piped to the tool and its output is returned; otherwise, the output is logged.
+        """
+        classpath = classpath or gd.DIRS.LT_JAR_PATH
+        with GOVERNOR.acquire(kind), JVM_STARTUP.flags(classpath, kind) as startup_flags:
+            cmd = f"java {GOVERNOR.xmx(kind)} {startup_flags} -cp {classpath} {main_class} {args}"
+            if input_data is None:
+                ShellCommand(cmd).run_with_output()
+                return None
+            return ShellCommand(cmd).run_with_input(input_data)
 
     def tokenise(self, unmunched_file: NamedTemporaryFile) -> NamedTemporaryFile:
         """Tokenise each line of an unmunched file, write it to another temp file and return it.
@@ -28,6 +49,10 @@ class LanguageToolUtils:
             "á"
         This may look iffy, but later in the process we will sort and dedupe these files, so don't panic.
 
+        Most forms contain none of the characters that can trigger a split, so unless `bypass` is False, only the forms
+        that do are piped through the JVM; the others are written to the output as they are. Since the output is
+        deduped later anyway, the merged word list is the same as when every form goes through the tokeniser.
+
         Args:
             unmunched_file: the NamedTemporaryFile object for the unmunched file we'll be tokenising
 
@@ -39,16 +64,27 @@ class LanguageToolUtils:
         prefix = chunk_pattern.findall(unmunched_file.name.split('/')[-1])[0] + "_tokenised_"
         tokenised_tmp = NamedTemporaryFile(delete=self.delete_tmp, mode='w', prefix=prefix)
         LOGGER.debug(f"Tokenising {unmunched_file.name} into {tokenised_tmp.name} ...")
-        tokenise_cmd = (
-            f"java -cp {gd.DIRS.LT_JAR_PATH}:"
-            f"{gd.DIRS.LT_DIR}/languagetool-dev/target/languagetool-dev-{LT_VER}-jar-with-dependencies.jar "
-            f"org.languagetool.dev.archive.WordTokenizer {self.variant.lang}"
-        )
         with open(unmunched_file.name, 'r', encoding=LATIN_1_ENCODING) as u:
             unmunched_str = u.read()
         unmunched_file.close()
-        tokenisation_result = ShellCommand(tokenise_cmd).run_with_input(unmunched_str)
-        tokenised_tmp.write(tokenisation_result)
+        if self.bypass:
+            chars = bypass_characters(self.variant.lang)
+            splittable = []
+            for form in unmunched_str.split("\n"):
+                if not form:
+                    continue
+                if can_split(form, chars):
+                    splittable.append(form)
+                else:
+                    tokenised_tmp.write(form + "\n")
+            LOGGER.debug(f"{len(splittable)} forms in {unmunched_file.name} need to go through the tokeniser.")
+            unmunched_str = "\n".join(splittable) + "\n" if splittable else ""
+        if unmunched_str:
+            tokenisation_result = self.run_java('tokenise', "org.languagetool.dev.archive.WordTokenizer",
+                                                self.variant.lang,
+                                                classpath=f"{gd.DIRS.LT_JAR_PATH}:{gd.DIRS.LT_JAR_WITH_DEPS_PATH}",
+                                                input_data=unmunched_str)
+            tokenised_tmp.write(tokenisation_result)
         tokenised_tmp.flush()
         LOGGER.debug(f"Done tokenising {unmunched_file.name}!")
         return tokenised_tmp
@@ -70,74 +106,65 @@ class LanguageToolUtils:
         LOGGER.info(f"Building spelling binary for {self.variant}...")
         megatemp = NamedTemporaryFile(delete=self.delete_tmp, mode='w',
                                       encoding='utf-8')  # Open the file with UTF-8 encoding
-        lines = set()
-        for tmp in tokenised_temps:
-            with open(tmp.name, 'r', encoding='utf-8') as t:
-                lines.update(t.read().split("\n"))
-        megatemp.write("\n".join(sorted(lines)))
-        LOGGER.debug(f"Found {len(lines)} unique unmunched and tokenised forms for {self.variant}.")
-        cmd_build = (
-            f"java -cp {gd.DIRS.LT_JAR_PATH} "
-            f"org.languagetool.tools.SpellDictionaryBuilder "
-            f"-i {megatemp.name} "
+        sorted_paths = [sort_unique_forms(tmp.name) for tmp in tokenised_temps]
+        count = merge_sorted_forms(sorted_paths, megatemp.name)
+        LOGGER.debug(f"Found {count} unique unmunched and tokenised forms for {self.variant}.")
+        self.compile_spelling_binary(megatemp.name)
+        megatemp.close()
+
+    def compile_spelling_binary(self, wordlist_path: str) -> None:
+        """Build the Morfologik SPELLING dictionary from a merged, UTF-8 encoded word list."""
+        args = (
+            f"-i {wordlist_path} "
             f"-info {self.variant.info('source')} "
             f"-freq {self.variant.freq()} "
             f"-o {self.variant.dict()}"
         )
-        ShellCommand(cmd_build).run_with_output()
+        self.run_java('spelling_build', "org.languagetool.tools.SpellDictionaryBuilder", args)
         LOGGER.info(f"Done compiling {self.variant} spelling dictionary!")
         self.variant.copy_spell_info()
-        megatemp.close()
 
     def build_pos_binary(self, use_freq: bool = False) -> None:
         LOGGER.info(f"Building part-of-speech binary for {self.variant}...")
-        cmd_build = (
-            f"java -cp {gd.DIRS.LT_JAR_PATH} "
-            f"org.languagetool.tools.POSDictionaryBuilder "
+        args = (
             f"-i {gd.DIRS.RESULT_POS_DICT_FILEPATH} "
             f"-info {self.variant.pos_info_java_input_path()} "
             f"-o {self.variant.pos_dict_java_output_path()}"
         )
         if use_freq:
-            cmd_build += f" -freq {self.variant.freq()}"
-        ShellCommand(cmd_build).run_with_output()
+            args += f" -freq {self.variant.freq()}"
+        self.run_java('pos_build', "org.languagetool.tools.POSDictionaryBuilder", args)
         LOGGER.info(f"Done compiling {self.variant} part-of-speech dictionary!")
         self.variant.copy_pos_info()
 
     def build_synth_binary(self) -> None:
         LOGGER.info(f"Building synthesiser binary for {self.variant}...")
-        cmd_build = (
-            f"java -cp {gd.DIRS.LT_JAR_PATH} "
-            f"org.languagetool.tools.SynthDictionaryBuilder "
+        args = (
             f"-i {gd.DIRS.RESULT_POS_DICT_FILEPATH} "
             f"-info {self.variant.synth_info_java_input_path()} "
             f"-o {self.variant.synth_dict_java_output_path()}"
         )
-        ShellCommand(cmd_build).run_with_output()
+        self.run_java('synth_build', "org.languagetool.tools.SynthDictionaryBuilder", args)
         LOGGER.info(f"Done compiling {self.variant} synthesiser dictionary!")
         self.variant.copy_synth_info()
         self.variant.rename_synth_tag_files()
 
     def dump_pos_dictionary(self) -> None:
         LOGGER.info(f"Dumping dictionary for {self.variant}...")
-        cmd_dump = (
-            f"java -cp {gd.DIRS.LT_JAR_PATH} "
-            f"org.languagetool.tools.DictionaryExporter "
+        args = (
             f"-i {self.variant.pos_dict_java_output_path()} "
             f"-info {self.variant.pos_info_java_input_path()} "
             f"-o {self.variant.pos_dump_dict_java_output_path()}"
         )
-        ShellCommand(cmd_dump).run_with_output()
+        self.run_java('dump', "org.languagetool.tools.DictionaryExporter", args)
         LOGGER.info(f"Done dumping {self.variant} POS dictionary!")
 
     def dump_synth_dictionary(self) -> None:
         LOGGER.info(f"Dumping dictionary for {self.variant}...")
-        cmd_dump = (
-            f"java -cp {gd.DIRS.LT_JAR_PATH} "
-            f"org.languagetool.tools.DictionaryExporter "
+        args = (
             f"-i {self.variant.synth_dict_java_output_path()} "
             f"-info {self.variant.synth_info_java_input_path()} "
             f"-o {self.variant.synth_dump_dict_java_output_path()}"
         )
-        ShellCommand(cmd_dump).run_with_output()
+        self.run_java('dump', "org.languagetool.tools.DictionaryExporter", args)
         LOGGER.info(f"Done dumping {self.variant} synth dictionary!")
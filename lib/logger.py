@@ -1,17 +1,23 @@
+import atexit
+import json
 import logging
+import multiprocessing.util
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener
 from sys import stdout
+from typing import Dict, Tuple
 
 from termcolor import colored
 
 
 class Logger(logging.Logger):
+    """Our logger only puts records on a queue; formatting and writing them happens on the listener's thread, so that
+    logging never blocks the threads draining subprocess pipes."""
     def __init__(self, name):
         super().__init__(name)
         self.setLevel(logging.DEBUG)  # Set global logging level to DEBUG
-
-        ch = logging.StreamHandler(stdout)
-        ch.setFormatter(ColorizedFormatter())
-        self.addHandler(ch)
+        self.addHandler(QUEUE_HANDLER)
 
 
 class ColorizedFormatter(logging.Formatter):
@@ -23,11 +29,181 @@ class ColorizedFormatter(logging.Formatter):
         'CRITICAL': 'red',
     }
 
+    def __init__(self, use_colours: bool = True):
+        super().__init__()
+        self.use_colours = use_colours
+
     def format(self, record):
         log_message = super().format(record)
+        if not self.use_colours:
+            return log_message
         return colored(log_message, self.COLORS.get(record.levelname))
 
 
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, for log files meant to be read by tools rather than people."""
+    def format(self, record):
+        return json.dumps({
+            'time': record.created,
+            'level': record.levelname,
+            'thread': record.threadName,
+            'subprocess': getattr(record, 'subprocess', False),
+            'message': record.getMessage(),
+        }, ensure_ascii=False)
+
+
+class SubprocessLineFilter(logging.Filter):
+    """Summarises repeated subprocess output lines and caps how many are written per second.
+
+    Only records logged with `extra={'subprocess': True}` are affected. State is kept per thread, since every thread
+    drains its own subprocess. Repeated and dropped lines are reported in a summary record of their own, emitted to
+    `handler` right before the next line that gets through (or when the listener stops), so that the records other
+    handlers get are left as they were logged.
+    """
+    def __init__(self, handler: logging.Handler, max_per_second: int = 200):
+        super().__init__()
+        self.handler = handler
+        self.max_per_second = max_per_second
+        # thread ID -> [last record, its message, times repeated, current second, lines in this second, lines dropped]
+        self.state: Dict[int, list] = {}
+
+    def filter(self, record):
+        if not getattr(record, 'subprocess', False):
+            return True
+        message = record.getMessage()
+        last, last_message, repeated, second, count, dropped = self.state.get(record.thread,
+                                                                              (None, None, 0, 0, 0, 0))
+        if message == last_message:
+            self.state[record.thread] = [last, last_message, repeated + 1, second, count, dropped]
+            return False
+        now = int(record.created)
+        if now != second:
+            second, count = now, 0
+        if count >= self.max_per_second:
+            self.state[record.thread] = [last, last_message, repeated, second, count, dropped + 1]
+            return False
+        self.emit_summary(last, repeated, dropped)
+        self.state[record.thread] = [record, message, 0, second, count + 1, 0]
+        return True
+
+    def emit_summary(self, record: logging.LogRecord, repeated: int, dropped: int) -> None:
+        notes = []
+        if repeated:
+            notes.append(f"(previous line repeated {repeated} more times)")
+        if dropped:
+            notes.append(f"({dropped} lines not shown, over {self.max_per_second} lines/s)")
+        if notes:
+            summary = logging.makeLogRecord(record.__dict__)
+            summary.msg, summary.args = "\n".join(notes), None
+            self.handler.emit(summary)
+
+    def flush_pending(self) -> None:
+        """Emit the summaries of the lines repeated or dropped since the last line that got through."""
+        for thread, (last, last_message, repeated, second, count, dropped) in list(self.state.items()):
+            self.emit_summary(last, repeated, dropped)
+            self.state[thread] = [last, last_message, 0, second, count, 0]
+
+
+class BatchingStreamHandler(logging.StreamHandler):
+    """Buffers formatted records and writes them in batches; the listener flushes it whenever its queue is idle."""
+    def __init__(self, stream=None, capacity: int = 256):
+        super().__init__(stream)
+        self.capacity = capacity
+        self.buffer = []
+
+    def emit(self, record):
+        try:
+            self.buffer.append(self.format(record))
+        except Exception:
+            self.handleError(record)
+            return
+        if len(self.buffer) >= self.capacity or record.levelno >= logging.ERROR:
+            self.flush()
+
+    def flush(self):
+        self.acquire()
+        try:
+            if self.buffer and self.stream:
+                self.stream.write("\n".join(self.buffer) + self.terminator)
+                self.buffer = []
+                self.stream.flush()
+        finally:
+            self.release()
+
+
+class BatchingQueueListener(QueueListener):
+    """A QueueListener that flushes its handlers whenever it has nothing to dequeue for `flush_interval` seconds."""
+    def __init__(self, log_queue, *handlers, flush_interval: float = 0.2):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.flush_interval = flush_interval
+
+    def dequeue(self, block):
+        while True:
+            try:
+                return self.queue.get(block, timeout=self.flush_interval)
+            except queue.Empty:
+                self.flush()
+
+    def flush(self):
+        for handler in self.handlers:
+            handler.flush()
+
+    def stop(self):
+        if self._thread is not None:
+            super().stop()
+        for handler in self.handlers:
+            for line_filter in handler.filters:
+                if isinstance(line_filter, SubprocessLineFilter):
+                    line_filter.flush_pending()
+        self.flush()
+
+
+def console_handler() -> Tuple[logging.Handler, ...]:
+    handler = BatchingStreamHandler(stdout)
+    handler.setFormatter(ColorizedFormatter(use_colours=stdout.isatty()))
+    handler.addFilter(SubprocessLineFilter(handler))
+    return handler,
+
+
+def add_json_log_file(filepath: str) -> None:
+    """Also write every record, subprocess lines included, to a file of JSON objects."""
+    handler = logging.FileHandler(filepath, encoding='utf-8')
+    handler.setFormatter(JsonFormatter())
+    LISTENER.handlers = LISTENER.handlers + (handler,)
+
+
+def _restart_listener_in_child() -> None:
+    """The listener thread does not survive a fork, so forked processes get a fresh queue and listener. The lines the
+    parent had buffered but not written yet are the parent's to write, so they are dropped here."""
+    global LISTENER
+    for handler in LISTENER.handlers:
+        if isinstance(handler, BatchingStreamHandler):
+            handler.buffer = []
+    QUEUE_HANDLER.queue = queue.SimpleQueue()
+    LISTENER = BatchingQueueListener(QUEUE_HANDLER.queue, *LISTENER.handlers)
+    LISTENER.start()
+
+
+def _stop_listener(*_) -> None:
+    LISTENER.stop()
+
+
+def _stop_listener_at_process_exit(*_) -> None:
+    """Processes started by multiprocessing (pool workers included) leave with os._exit, which skips atexit, but they
+    do run the finalizers registered in them; this one runs last, so the records logged by the others are written."""
+    multiprocessing.util.Finalize(None, _stop_listener, exitpriority=-100)
+
+
+QUEUE_HANDLER = QueueHandler(queue.SimpleQueue())
+LISTENER = BatchingQueueListener(QUEUE_HANDLER.queue, *console_handler())
+LISTENER.start()
+atexit.register(_stop_listener)
+os.register_at_fork(after_in_child=_restart_listener_in_child)
+# multiprocessing clears the finalizers a forked process inherits, then runs its after-fork callbacks; a process that
+# imports this module itself (e.g. with the spawn start method) registers the finalizer right away.
+multiprocessing.util.register_after_fork(QUEUE_HANDLER, _stop_listener_at_process_exit)
+_stop_listener_at_process_exit()
+
 logging.setLoggerClass(Logger)
 LOGGER = logging.getLogger('dictionary_tools')
 LOGGER.setLevel(logging.DEBUG)
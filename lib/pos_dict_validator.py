@@ -0,0 +1,137 @@
+"""A pre-flight check of the plaintext tagger dictionary, so that malformed lines are reported with their line numbers
+before POSDictionaryBuilder or SynthDictionaryBuilder get to fail on them (or, worse, quietly build a broken binary).
+
+The file is split into byte ranges that start at line boundaries, and each range is checked by its own worker process
+in a single streaming pass.
+"""
+import concurrent.futures
+import os
+import re
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from lib.logger import LOGGER
+
+# Two-byte UTF-8 sequences read as Latin-1, e.g. "Ã£" for "ã": the usual sign of text that was encoded twice.
+MOJIBAKE_PATTERN = re.compile("[\u00c2\u00c3][\u0080-\u00bf]")
+
+
+def read_info(info_path: str) -> Dict[str, str]:
+    """Parse a Morfologik .info file into a dict of its properties."""
+    properties = {}
+    with open(info_path, 'r', encoding='utf-8') as info_file:
+        for line in info_file:
+            line = line.strip()
+            if not line or line.startswith('#') or '=' not in line:
+                continue
+            key, value = line.split('=', 1)
+            properties[key.strip()] = value.strip()
+    return properties
+
+
+def read_tag_inventory(tags_path: str) -> FrozenSet[str]:
+    """Read a list of valid tags, one per line."""
+    with open(tags_path, 'r', encoding='utf-8') as tags_file:
+        return frozenset(line.strip() for line in tags_file if line.strip() and not line.startswith('#'))
+
+
+class ValidationRules:
+    """What a valid line looks like, given the .info files it will be built with.
+
+    Attributes:
+        encoding (str): the encoding every line must decode with
+        separators (FrozenSet[str]): the characters Morfologik uses internally, which must not appear in any field
+        tags (FrozenSet[str]): the valid tags; None means tags are not checked
+    """
+    def __init__(self, info_paths: List[str], tags: Optional[FrozenSet[str]] = None):
+        infos = [read_info(info_path) for info_path in info_paths]
+        encodings = {info.get('fsa.dict.encoding', 'utf-8').lower() for info in infos}
+        if len(encodings) > 1:
+            raise ValueError(f"The .info files {info_paths} disagree on the encoding: {encodings}")
+        self.encoding = encodings.pop() if encodings else 'utf-8'
+        self.separators = frozenset(info.get('fsa.dict.separator', '+') for info in infos)
+        self.tags = tags
+
+    def check(self, raw_line: bytes) -> List[str]:
+        """Return the problems with a single line; an empty list means the line is fine."""
+        try:
+            line = raw_line.decode(self.encoding)
+        except UnicodeDecodeError as e:
+            return [f"not valid {self.encoding}: {e.reason} at byte {e.start}"]
+        problems = []
+        if self.encoding in ('utf-8', 'utf8') and MOJIBAKE_PATTERN.search(line):
+            problems.append("looks double-encoded (UTF-8 read as Latin-1)")
+        elif self.encoding not in ('utf-8', 'utf8') and not raw_line.isascii():
+            try:
+                raw_line.decode('utf-8')
+                problems.append(f"looks like UTF-8, but the dictionary is {self.encoding}")
+            except UnicodeDecodeError:
+                pass
+        fields = line.split('\t')
+        if len(fields) != 3:
+            return problems + [f"expected 3 tab-separated columns, found {len(fields)}"]
+        for name, field in zip(('form', 'lemma', 'tag'), fields):
+            if not field:
+                problems.append(f"empty {name}")
+            elif field != field.strip():
+                problems.append(f"{name} \"{field}\" has leading or trailing whitespace")
+            for separator in self.separators:
+                if separator in field:
+                    problems.append(f"{name} \"{field}\" contains the .info separator \"{separator}\"")
+        tag = fields[2]
+        if self.tags is not None and tag and tag not in self.tags:
+            problems.append(f"tag \"{tag}\" is not in the tag inventory")
+        return problems
+
+
+def check_range(filepath: str, start: int, end: int, rules: ValidationRules) -> Tuple[int, List[Tuple[int, str]]]:
+    """Check the lines between two byte offsets, which must both be at line boundaries.
+
+    Returns:
+        the number of lines in the range, and the problems found as (line number within the range, message) tuples
+    """
+    problems = []
+    line_count = 0
+    with open(filepath, 'rb') as dict_file:
+        dict_file.seek(start)
+        while dict_file.tell() < end:
+            raw_line = dict_file.readline()
+            line_count += 1
+            for problem in rules.check(raw_line.rstrip(b'\n')):
+                problems.append((line_count, problem))
+    return line_count, problems
+
+
+def line_boundaries(filepath: str, parts: int) -> List[int]:
+    """Byte offsets splitting a file into roughly equal parts, each starting at the beginning of a line."""
+    size = os.path.getsize(filepath)
+    boundaries = [0]
+    with open(filepath, 'rb') as dict_file:
+        for index in range(1, parts):
+            dict_file.seek(size * index // parts)
+            dict_file.readline()
+            if boundaries[-1] < dict_file.tell() < size:
+                boundaries.append(dict_file.tell())
+    boundaries.append(size)
+    return boundaries
+
+
+def validate_pos_dict(filepath: str, rules: ValidationRules,
+                      max_workers: Optional[int] = None) -> List[Tuple[int, str]]:
+    """Check every line of a plaintext tagger dictionary.
+
+    Returns:
+        all problems found, as (line number, message) tuples sorted by line number
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    boundaries = line_boundaries(filepath, max_workers)
+    LOGGER.info(f"Validating {filepath} in {len(boundaries) - 1} parts...")
+    problems = []
+    first_line = 0
+    with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(check_range, [filepath] * (len(boundaries) - 1), boundaries[:-1], boundaries[1:],
+                               [rules] * (len(boundaries) - 1))
+        for line_count, range_problems in results:
+            problems.extend((first_line + line_number, message) for line_number, message in range_problems)
+            first_line += line_count
+    LOGGER.info(f"Checked {first_line} lines of {filepath}, found {len(problems)} problems.")
+    return problems
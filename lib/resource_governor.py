@@ -0,0 +1,165 @@
+"""Admission control for the external processes we launch, so that concurrent JVMs and unmunch runs do not push the
+machine into swap or get killed by the OOM killer."""
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+from lib.logger import LOGGER
+
+# Java heap sizes we pass with -Xmx, in MiB, for the JVMs whose needs don't grow much with the size of the dictionary.
+HEAP_MB: Dict[str, int] = {
+    'tokenise': 1024,
+    'dump': 2048,
+}
+# The JVMs building the binaries ('spelling_build', 'pos_build' and 'synth_build') get what the JVM would give them by
+# default, a quarter of the physical memory, unless set with --build-heap or this environment variable.
+BUILD_HEAP_ENV_VAR = 'DICT_BUILD_HEAP_MB'
+BUILD_HEAP_FRACTION = 4
+# Assumed for the footprint of a build where the physical memory can't be read, in which case no -Xmx is passed.
+UNKNOWN_BUILD_HEAP_MB = 4096
+# Rough resident footprint of the processes that aren't JVMs, in MiB.
+FOOTPRINT_MB: Dict[str, int] = {
+    'unmunch': 512,
+    'maven': 2048,
+}
+# What a JVM takes beyond its heap: metaspace, code cache and so on.
+JVM_OVERHEAD_MB = 384
+
+
+def read_meminfo(meminfo_path: str = '/proc/meminfo') -> Optional[Dict[str, int]]:
+    """Parse /proc/meminfo into a mapping of field name to MiB; returns None where it does not exist (e.g. macOS)."""
+    try:
+        with open(meminfo_path, 'r') as meminfo:
+            lines = meminfo.readlines()
+    except OSError:
+        return None
+    fields = {}
+    for line in lines:
+        name, _, value = line.partition(':')
+        parts = value.split()
+        if parts and parts[0].isdigit():
+            fields[name] = int(parts[0]) // 1024 if parts[-1] == 'kB' else int(parts[0])
+    return fields
+
+
+class ResourceGovernor:
+    """Decides when a new process may be started, based on its expected footprint and the current state of the system.
+
+    A process is admitted only if MemAvailable, minus the footprints of processes admitted too recently to show up in
+    it yet, minus a reserve for the rest of the system, still leaves room for it, and if the load average is below the
+    limit. Since this is re-evaluated against live values every time, the effective concurrency adapts during a run:
+    it drops when memory gets tight and goes back up as it frees. At least one process is always admitted, so the
+    build cannot deadlock on a machine that is simply too small.
+
+    Every decision to make a process wait, every change in what it is waiting for, and every admission after a wait
+    is logged; `throttled` counts how many processes of each kind had to wait.
+
+    Attributes:
+        enabled (bool): if False, every process is admitted immediately
+        reserve_mb (int): memory to always leave free for the rest of the system
+        max_load (float): the 1-minute load average above which new processes wait
+        settle_seconds (float): how long a new process takes to show up in MemAvailable
+        poll_interval (float): how often throttled processes re-check the system state
+        meminfo_path (str): where to read memory information from
+        build_heap_mb (int): the heap of the JVMs building binaries; if None, see BUILD_HEAP_ENV_VAR
+        throttled (Counter): the number of processes of each kind that had to wait before being admitted
+    """
+    def __init__(self, enabled: bool = True, reserve_mb: int = 1024, max_load: Optional[float] = None,
+                 settle_seconds: float = 15, poll_interval: float = 1.0, meminfo_path: str = '/proc/meminfo',
+                 build_heap_mb: Optional[int] = None):
+        self.enabled = enabled
+        self.reserve_mb = reserve_mb
+        self.max_load = max_load or (os.cpu_count() or 1) * 1.5
+        self.settle_seconds = settle_seconds
+        self.poll_interval = poll_interval
+        self.meminfo_path = meminfo_path
+        self.build_heap_mb = build_heap_mb
+        self.condition = threading.Condition()
+        self.admitted: List[Tuple[str, float]] = []  # kind and admission time of each running process
+        self.throttled = Counter()
+
+    def configure(self, enabled: bool, reserve_mb: int, max_load: Optional[float],
+                  build_heap_mb: Optional[int] = None) -> None:
+        self.enabled = enabled
+        self.reserve_mb = reserve_mb
+        self.max_load = max_load or self.max_load
+        self.build_heap_mb = build_heap_mb or self.build_heap_mb
+
+    def heap_mb(self, kind: str) -> Optional[int]:
+        """The -Xmx of a kind of JVM in MiB, or None if it should be left to the JVM."""
+        if kind in HEAP_MB:
+            return HEAP_MB[kind]
+        if self.build_heap_mb:
+            return self.build_heap_mb
+        if os.environ.get(BUILD_HEAP_ENV_VAR):
+            return int(os.environ[BUILD_HEAP_ENV_VAR])
+        meminfo = read_meminfo(self.meminfo_path)
+        if meminfo is not None and 'MemTotal' in meminfo:
+            return meminfo['MemTotal'] // BUILD_HEAP_FRACTION
+        return None
+
+    def xmx(self, kind: str) -> str:
+        heap = self.heap_mb(kind)
+        return f"-Xmx{heap}m" if heap else ""
+
+    def footprint_mb(self, kind: str) -> int:
+        if kind in FOOTPRINT_MB:
+            return FOOTPRINT_MB[kind]
+        return (self.heap_mb(kind) or UNKNOWN_BUILD_HEAP_MB) + JVM_OVERHEAD_MB
+
+    def _unsettled_mb(self, now: float) -> int:
+        return sum(self.footprint_mb(kind) for kind, admitted_at in self.admitted
+                   if now - admitted_at < self.settle_seconds)
+
+    def _check(self, kind: str) -> Tuple[Optional[str], Optional[str]]:
+        """What keeps a process of the given kind from starting ('memory' or 'load') and why, or (None, None)."""
+        if not self.enabled or not self.admitted:
+            return None, None
+        meminfo = read_meminfo(self.meminfo_path)
+        if meminfo is not None and 'MemAvailable' in meminfo:
+            unsettled = self._unsettled_mb(time.time())
+            room = meminfo['MemAvailable'] - unsettled - self.reserve_mb
+            footprint = self.footprint_mb(kind)
+            if room < footprint:
+                return 'memory', (f"needs ~{footprint} MiB, but only {meminfo['MemAvailable']} MiB are available "
+                                  f"({unsettled} MiB promised to new processes, {self.reserve_mb} MiB reserved)")
+        load = os.getloadavg()[0]
+        if load > self.max_load:
+            return 'load', f"load average is {load:.1f}, above the limit of {self.max_load:.1f}"
+        return None, None
+
+    def blocker(self, kind: str) -> Optional[str]:
+        """The reason a process of the given kind cannot be started right now, or None if it can."""
+        return self._check(kind)[1]
+
+    @contextmanager
+    def acquire(self, kind: str):
+        """Block until a process of the given kind may be started, and hold its place until the block exits."""
+        with self.condition:
+            cause, reason = self._check(kind)
+            throttled_since = time.time() if cause else None
+            logged_cause = None
+            while cause:
+                if cause != logged_cause:  # log each change of what we wait for, not each poll
+                    LOGGER.info(f"Throttling {kind} ({len(self.admitted)} processes running): {reason}")
+                    logged_cause = cause
+                self.condition.wait(self.poll_interval)
+                cause, reason = self._check(kind)
+            if throttled_since is not None:
+                self.throttled[kind] += 1
+                LOGGER.info(f"Admitting {kind} after {time.time() - throttled_since:.0f}s of throttling "
+                            f"({self.throttled[kind]} {kind} processes throttled so far).")
+            entry = (kind, time.time())
+            self.admitted.append(entry)
+        try:
+            yield
+        finally:
+            with self.condition:
+                self.admitted.remove(entry)
+                self.condition.notify_all()
+
+
+GOVERNOR = ResourceGovernor()
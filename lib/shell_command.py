@@ -68,12 +68,23 @@ class ShellCommand:
             if output == b'' and process.poll() is not None:
                 break
             if output:
-                LOGGER.debug(output.decode().strip())
+                LOGGER.debug(output.decode().strip(), extra={'subprocess': True})
             err = process.stderr.readline()
             if err:
-                LOGGER.warn(err.decode().strip())
+                LOGGER.warning(err.decode().strip(), extra={'subprocess': True})
         rc = process.poll()
         remaining_err = process.stderr.read()
         if remaining_err:
-            LOGGER.warn(remaining_err.decode().strip())
+            LOGGER.warning(remaining_err.decode().strip(), extra={'subprocess': True})
         self.check_status(rc, process.stderr.read())
+
+    def run_with_files(self, input_path: str, output_path: str) -> None:
+        """Execute the shell command with a file as its stdin, writing its stdout to another file."""
+        LOGGER.debug(f"Running command: {self.command_str} < {input_path} > {output_path}")
+        try:
+            with open(input_path, 'rb') as input_file, open(output_path, 'wb') as output_file:
+                result = subprocess.run(self.split_cmd, stdin=input_file, stdout=output_file, stderr=subprocess.PIPE,
+                                        env=self.env, cwd=self.cwd)
+        except FileNotFoundError:
+            raise ShellCommandException(255, "Command or file not found.")
+        self.check_status(result.returncode, result.stderr)
@@ -0,0 +1,134 @@
+"""A Python implementation of the stage of `build-lt.sh` that gathers the tagger dictionary sources into `dict.txt`.
+
+Sources in TAGGER_DICT_DIR come in two flavours: `.txt` files already in LT's tab-separated format (form, lemma, tag),
+and `.fdic` files that must be converted by the perl tools in `fdic-to-lt`. Those tools live with `build-lt.sh` in the
+per-language repositories, so they are still what converts the `.fdic` files; what runs in parallel is one conversion
+per source file, each in its own worker process and streamed from file to file. The results are appended to the output
+in the order of the source files, so the result does not depend on the number of workers.
+
+The LT change files in LT_CHANGES_DIR are only applied by `build-lt.sh`; the `parity` mode of build_tagger_dicts.py
+checks whether the two gatherings are identical for a given language before this one is relied on.
+"""
+import concurrent.futures
+import difflib
+import os
+import shutil
+from itertools import zip_longest
+from os import path
+from tempfile import NamedTemporaryFile
+from typing import Iterable, Iterator, List, Optional, Set
+
+from lib.logger import LOGGER
+from lib.shell_command import ShellCommand
+
+SOURCE_EXTENSIONS = ('.txt', '.fdic')
+
+
+def source_files(source_dir: str) -> List[str]:
+    """The tagger source files in a directory, in the same (byte) order the shell glob would list them."""
+    return sorted(path.join(source_dir, filename) for filename in os.listdir(source_dir)
+                  if filename.endswith(SOURCE_EXTENSIONS))
+
+
+def normalise_lines(lines: Iterable[str]) -> Iterator[str]:
+    """Drop carriage returns, blank lines and comments, as the shell pipeline does."""
+    for line in lines:
+        line = line.rstrip("\n").rstrip("\r")
+        if line.strip() and not line.startswith("#"):
+            yield line + "\n"
+
+
+def convert_source(filepath: str, fdic_command: str) -> str:
+    """Convert a single source file into LT format and return the path to a temp file holding the result.
+
+    This runs in a worker process, so it only takes and returns paths and strings.
+    """
+    prefix = f"{path.basename(filepath)}_converted_"
+    raw_path = None
+    if filepath.endswith('.fdic'):
+        with NamedTemporaryFile(delete=False, prefix=f"{prefix}raw_") as raw:
+            raw_path = raw.name
+        ShellCommand(fdic_command).run_with_files(filepath, raw_path)
+    try:
+        with open(raw_path or filepath, 'r', encoding='utf-8') as source, \
+                NamedTemporaryFile(mode='w', encoding='utf-8', delete=False, prefix=prefix) as converted:
+            converted.writelines(normalise_lines(source))
+    finally:
+        if raw_path is not None:
+            os.remove(raw_path)
+    return converted.name
+
+
+def sort_unique(input_path: str, output_path: str) -> int:
+    """Equivalent to `LC_ALL=C sort -u`; code point order is the same as byte order for UTF-8."""
+    with open(input_path, 'r', encoding='utf-8') as input_file:
+        lines: Set[str] = set(input_file.read().splitlines())
+    with open(output_path, 'w', encoding='utf-8') as output_file:
+        output_file.writelines(line + "\n" for line in sorted(lines))
+    return len(lines)
+
+
+class TaggerSourceBuilder:
+    """Builds the plaintext tagger dictionary from its sources.
+
+    Attributes:
+        source_dir (str): the directory holding the tagger sources (TAGGER_DICT_DIR)
+        fdic_command (str): the command that converts an .fdic file from stdin into LT format on stdout
+        max_workers (int): the number of worker processes
+    """
+    def __init__(self, source_dir: str, fdic_command: str, max_workers: Optional[int] = None):
+        self.source_dir = source_dir
+        self.fdic_command = fdic_command
+        self.max_workers = max_workers
+
+    def build(self, result_path: str, sorted_path: str, old_path: Optional[str] = None,
+              diff_path: Optional[str] = None) -> None:
+        """Write the gathered sources to `result_path`, and their sorted and deduplicated lines to `sorted_path`.
+
+        If `old_path` and `diff_path` are given, the previous sorted dictionary is kept in `old_path` and the
+        differences between it and the new one are written to `diff_path`.
+        """
+        sources = source_files(self.source_dir)
+        LOGGER.info(f"Gathering {len(sources)} tagger source files from {self.source_dir} ...")
+        if old_path is not None and path.exists(sorted_path):
+            shutil.copyfile(sorted_path, old_path)
+        os.makedirs(path.dirname(result_path), exist_ok=True)
+        with concurrent.futures.ProcessPoolExecutor(max_workers=self.max_workers) as executor, \
+                open(result_path, 'w', encoding='utf-8') as result:
+            converted_paths = executor.map(convert_source, sources, [self.fdic_command] * len(sources))
+            for source, converted_path in zip(sources, converted_paths):
+                LOGGER.debug(f"Appending {source} to {result_path} ...")
+                with open(converted_path, 'r', encoding='utf-8') as converted:
+                    shutil.copyfileobj(converted, result)
+                os.remove(converted_path)
+        count = sort_unique(result_path, sorted_path)
+        LOGGER.info(f"Gathered {count} unique tagger dictionary lines into {result_path}.")
+        if old_path is not None and diff_path is not None and path.exists(old_path):
+            write_diff(old_path, sorted_path, diff_path)
+
+
+def write_diff(old_path: str, new_path: str, diff_path: str) -> None:
+    with open(old_path, 'r', encoding='utf-8') as old, open(new_path, 'r', encoding='utf-8') as new:
+        diff = difflib.unified_diff(old.readlines(), new.readlines(), fromfile=old_path, tofile=new_path)
+        with open(diff_path, 'w', encoding='utf-8') as diff_file:
+            diff_file.writelines(diff)
+
+
+def compare_dicts(expected_path: str, actual_path: str) -> int:
+    """Compare two plaintext dictionaries line by line, in order, and log the first line where they differ.
+
+    Returns:
+        the number of line positions at which the two files differ (a missing line counts as a difference)
+    """
+    differences = 0
+    with open(expected_path, 'r', encoding='utf-8') as expected, open(actual_path, 'r', encoding='utf-8') as actual:
+        for line_number, (expected_line, actual_line) in enumerate(zip_longest(expected, actual), start=1):
+            if expected_line == actual_line:
+                continue
+            if not differences:
+                LOGGER.warning(f"{actual_path} first differs from {expected_path} at line {line_number}: expected "
+                               f"{expected_line!r}, got {actual_line!r}")
+            differences += 1
+    if not differences:
+        LOGGER.info(f"{actual_path} is identical to {expected_path}.")
+    return differences
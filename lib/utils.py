@@ -1,12 +1,16 @@
 import codecs
 import shutil
 from datetime import timedelta
-from os import path
+from os import environ, path
 from tempfile import NamedTemporaryFile
 from typing import Optional
+from xml.etree import ElementTree
 
 from lib.constants import LATIN_1_ENCODING
+from lib.dict_packaging import DictPackager, PackagingError
 import lib.global_dirs as gd
+from lib.jvm_startup import JVM_STARTUP
+from lib.resource_governor import GOVERNOR
 from lib.shell_command import ShellCommand
 from lib.logger import LOGGER
 
@@ -15,25 +19,42 @@ def compile_lt_dev():
     """Build with maven in the languagetool-dev directory."""
     LOGGER.info("Compiling LT dev...")
     wd = path.join(gd.DIRS.LT_DIR, "languagetool-dev")
-    ShellCommand("mvn clean compile assembly:single", cwd=wd).run()
+    with GOVERNOR.acquire('maven'):
+        ShellCommand("mvn clean compile assembly:single", cwd=wd).run()
+    JVM_STARTUP.clear()  # the jars have changed, so the CDS archives must be regenerated
 
 
 def compile_lt():
     """Build with maven in the languagetool-dev directory."""
     LOGGER.info("Compiling LT...")
-    ShellCommand("mvn clean install -DskipTests", cwd=gd.DIRS.LT_DIR).run()
+    with GOVERNOR.acquire('maven'):
+        ShellCommand("mvn clean install -DskipTests", cwd=gd.DIRS.LT_DIR).run()
+    JVM_STARTUP.clear()  # the jars have changed, so the CDS archives must be regenerated
 
 
-def install_dictionaries(custom_version: Optional[tuple[str, str]]):
-    """Install our dictionaries to the local ~/.m2."""
+def install_dictionaries(custom_version: Optional[tuple[str, str]], maven: bool = False):
+    """Install our dictionaries to the local ~/.m2.
+
+    Unless `maven` is True, the jar is packaged and installed in Python (see lib.dict_packaging), which is much faster
+    than `mvn clean install`; Maven is still used if the project's pom needs anything we can't do ourselves.
+    """
     LOGGER.info("Installing dictionaries...")
     env: dict = {}
-    if custom_version is not None:
+    if custom_version is not None and custom_version[1] is not None:
         LOGGER.info(f"Installing custom version \"{custom_version[1]}\"")
         env[custom_version[0]] = custom_version[1]
-    else:
-        LOGGER.info(f"Installing environment-defined version \"{env['PT_DICT_VERSION']}\"")
-    ShellCommand("mvn clean install", env=env, cwd=gd.DIRS.JAVA_RESULTS_DIR).run()
+    elif custom_version is not None:
+        LOGGER.info(f"Installing environment-defined version \"{environ.get(custom_version[0])}\"")
+    if not maven:
+        try:
+            packager = DictPackager(gd.DIRS.JAVA_RESULTS_DIR, env)
+            packager.package()
+            packager.install()
+            return
+        except (PackagingError, OSError, ElementTree.ParseError) as e:
+            LOGGER.warning(f"Could not install the dictionaries without Maven ({e}), falling back to Maven.")
+    with GOVERNOR.acquire('maven'):
+        ShellCommand("mvn clean install", env=env, cwd=gd.DIRS.JAVA_RESULTS_DIR).run()
 
 
 def convert_to_utf8(tmp_file: NamedTemporaryFile, delete_tmp: bool = False) -> NamedTemporaryFile:
@@ -1,6 +1,6 @@
 import shutil
 from os import path
-from typing import Literal
+from typing import Dict, List, Literal, Set
 
 import lib.global_dirs as gd
 
@@ -63,6 +63,18 @@ class Variant:
             filename = f"{self.lang}_wordlist.xml"
         return path.join(gd.DIRS.SPELLING_DICT_DIR, filename)
 
+    def spelling_sources(self) -> List[str]:
+        """Paths to all the files the spelling binary of this variant is built from."""
+        return [self.aff(), self.dic(), self.compounds(), self.info('source'), self.freq()]
+
+    def incremental_index(self) -> str:
+        """Path to the index of .dic lines and their forms kept between incremental builds."""
+        return path.join(gd.DIRS.INCREMENTAL_DIR, f"{self.underscored}.json.gz")
+
+    def incremental_wordlist(self) -> str:
+        """Path to the merged word list of the last incremental build."""
+        return path.join(gd.DIRS.INCREMENTAL_DIR, f"{self.underscored}.txt")
+
     def java_output_dir(self) -> str:
         return path.join(gd.DIRS.JAVA_RESULTS_DIR, "src/main/resources/org/languagetool/resource", self.lang)
 
@@ -131,3 +143,13 @@ VARIANT_MAPPING = {
     'es': [ES_ES],
     'en': [EN_GB, EN_US],
 }
+
+
+def variants_by_source(variants: List[Variant]) -> Dict[str, Set[Variant]]:
+    """Map the absolute path of every spelling source to the variants built from it; some, like the frequency list of
+    pt-PT, are shared by several variants."""
+    sources: Dict[str, Set[Variant]] = {}
+    for variant in variants:
+        for filepath in variant.spelling_sources():
+            sources.setdefault(path.abspath(filepath), set()).add(variant)
+    return sources
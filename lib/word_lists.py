@@ -0,0 +1,54 @@
+"""The CPU-bound steps of merging unmunched and tokenised chunks into one word list per variant.
+
+These are plain module-level functions that take and return file paths, so that they can run in a process pool as well
+as in a thread pool without pickling any large strings.
+"""
+import heapq
+import os
+from contextlib import ExitStack
+from tempfile import NamedTemporaryFile
+from typing import List
+
+from lib.logger import LOGGER
+
+
+def sort_unique_forms(input_path: str, encoding: str = 'utf-8') -> str:
+    """Write the distinct non-empty lines of a chunk's output, sorted and in UTF-8, to a new temp file.
+
+    The input may be the tokenised output of a chunk, or (for compounds) the Latin-1 output of unmunch, which is
+    converted to UTF-8 on the way.
+
+    Returns:
+        the path to the new temp file; it is up to the caller to remove it
+    """
+    with open(input_path, 'r', encoding=encoding) as input_file:
+        forms = set(input_file.read().split("\n"))
+    forms.discard('')
+    with NamedTemporaryFile(mode='w', encoding='utf-8', delete=False, prefix="sorted_forms_") as output_file:
+        output_file.writelines(form + "\n" for form in sorted(forms))
+    return output_file.name
+
+
+def merge_sorted_forms(input_paths: List[str], output_path: str, remove_inputs: bool = True) -> int:
+    """Merge files written by `sort_unique_forms` into one sorted list of distinct forms.
+
+    The files are merged as streams, so memory use does not grow with the size of the word list.
+
+    Returns:
+        the number of distinct forms written
+    """
+    count = 0
+    with ExitStack() as stack, open(output_path, 'w', encoding='utf-8') as output_file:
+        inputs = [stack.enter_context(open(input_path, 'r', encoding='utf-8')) for input_path in input_paths]
+        previous = None
+        # Compare without the newline, as `sort_unique_forms` does: forms may contain characters below "\n", e.g. tabs
+        for form in heapq.merge(*inputs, key=lambda line: line.rstrip("\n")):
+            if form != previous:
+                output_file.write(form)
+                previous = form
+                count += 1
+    if remove_inputs:
+        for input_path in input_paths:
+            os.remove(input_path)
+    LOGGER.debug(f"Merged {len(input_paths)} files into {count} unique forms in {output_path}.")
+    return count
@@ -0,0 +1,140 @@
+"""A pure-Python port of the rules LT's word tokenisers apply to dictionary forms, so that tokenisation of unmunched
+files does not need a JVM or a build of languagetool-dev.
+
+Only the character-level rules are copied here. LT's tokenisers occasionally consult the tagger dictionary (e.g. to keep
+some hyphenated Portuguese compounds together), which this port cannot do; `scripts/check_tokeniser_parity.py` reports
+where the two tokenisers disagree on a sample.
+"""
+from os import path
+import re
+from tempfile import NamedTemporaryFile
+from typing import Dict, FrozenSet, List, Set
+
+from lib.constants import LATIN_1_ENCODING
+from lib.logger import LOGGER
+from lib.variant import Variant
+
+# The characters org.languagetool.tokenizers.WordTokenizer splits on.
+TOKENISING_CHARACTERS: FrozenSet[str] = frozenset(
+    "\u0020\u00A0\u115f\u1160\u1680"
+    "\u2000\u2001\u2002\u2003\u2004\u2005\u2006\u2007\u2008\u2009\u200A\u200B\u200c\u200d\u200e\u200f"
+    "\u2012\u2013\u2014\u2015\u2022\u2028\u2029\u202a\u202b\u202c\u202d\u202e\u202f"
+    "\u205F\u2060\u2061\u2062\u2063\u206A\u206b\u206c\u206d\u206E\u206F\u3000\u3164\ufeff\uffa0"
+    ",.;()[]{}=*#\u2217\u00d7\u00b7+\u00f7<>!?:~/\\\"'"
+    "\u00ab\u00bb\u201e\u201d\u201c\u2018\u2019`\u00b4\u2026\u00bf\u00a1"
+    "\t\n\r-|"
+)
+APOSTROPHES: FrozenSet[str] = frozenset("'\u2019")
+
+# Per-language adjustments to the base table: characters that do not split words, and characters that additionally do.
+KEPT_CHARACTERS: Dict[str, FrozenSet[str]] = {
+    'de': frozenset('-'),
+    'en': APOSTROPHES,
+    'nl': APOSTROPHES,
+}
+EXTRA_CHARACTERS: Dict[str, FrozenSet[str]] = {
+    'es': frozenset('\u00ad'),
+    'pt': frozenset('\u00ad'),
+}
+SPLIT_CHARACTERS: Dict[str, FrozenSet[str]] = {
+    lang: (TOKENISING_CHARACTERS - KEPT_CHARACTERS.get(lang, frozenset())) | EXTRA_CHARACTERS.get(lang, frozenset())
+    for lang in Variant.LANG_CODES
+}
+# French elided articles and pronouns keep their apostrophe, e.g. "l'homme" -> "l'", "homme"; any other apostrophe
+# between letters is part of the word, e.g. "aujourd'hui".
+FRENCH_ELISIONS: FrozenSet[str] = frozenset(['c', 'd', 'j', 'l', 'm', 'n', 's', 't', 'qu', 'jusqu', 'lorsqu',
+                                             'puisqu', 'quoiqu', 'presqu', 'quelqu'])
+
+
+def split_characters(lang: str) -> FrozenSet[str]:
+    return SPLIT_CHARACTERS.get(lang, TOKENISING_CHARACTERS)
+
+
+def bypass_characters(lang: str) -> FrozenSet[str]:
+    """The characters that may make LT's tokeniser split a form in the given language.
+
+    Unlike `split_characters`, this ignores KEPT_CHARACTERS, since whether LT keeps those together can depend on the
+    tagger dictionary; the table only has to be a superset of what LT may split on.
+    """
+    return TOKENISING_CHARACTERS | EXTRA_CHARACTERS.get(lang, frozenset())
+
+
+def write_parity_record(record_path: str, tokens_by_form: Dict[str, Set[str]]) -> None:
+    """Save the tokens the Java tokeniser produced for each form, one form per line followed by its tokens, all
+    tab-separated; see `scripts/check_tokeniser_parity.py --record`."""
+    with open(record_path, 'w', encoding='utf-8') as record_file:
+        for form in sorted(tokens_by_form):
+            record_file.write("\t".join([form] + sorted(tokens_by_form[form])) + "\n")
+
+
+def read_parity_record(record_path: str) -> Dict[str, Set[str]]:
+    with open(record_path, 'r', encoding='utf-8') as record_file:
+        return {fields[0]: set(fields[1:]) for fields in (line.rstrip("\n").split("\t") for line in record_file)}
+
+
+def can_split(form: str, chars: FrozenSet[str]) -> bool:
+    """Whether a form may be split by the tokeniser; anything that is neither a letter nor a digit is assumed to be able
+    to trigger a split, even if it is not in the table."""
+    return not form.isalnum() or any(char in chars for char in form)
+
+
+class WordTokeniser:
+    """Tokenises unmunched forms the same way `LanguageToolUtils.tokenise` does, but in-process.
+
+    Attributes:
+        variant (Variant): the variant whose language rules are used
+        delete_tmp (bool): whether temp files are deleted when closed
+    """
+    def __init__(self, variant: Variant, delete_tmp: bool = False):
+        self.variant = variant
+        self.delete_tmp = delete_tmp
+        chars = ''.join(sorted(split_characters(variant.lang)))
+        self.pattern = re.compile(f"([{re.escape(chars)}])")
+
+    def tokenise_line(self, line: str) -> List[str]:
+        """Split a single form into tokens; separators are kept as tokens of their own, as in LT."""
+        tokens = [token for token in self.pattern.split(line) if token != '']
+        if self.variant.lang != 'fr':
+            return tokens
+        merged: List[str] = []
+        index = 0
+        while index < len(tokens):
+            token = tokens[index]
+            word_before = merged and not self.pattern.fullmatch(merged[-1])
+            word_after = index + 1 < len(tokens) and not self.pattern.fullmatch(tokens[index + 1])
+            if token in APOSTROPHES and word_before and word_after:
+                if merged[-1].lower() in FRENCH_ELISIONS:
+                    merged[-1] += token
+                else:
+                    merged[-1] += token + tokens[index + 1]
+                    index += 1
+            else:
+                merged.append(token)
+            index += 1
+        return merged
+
+    def format_line(self, line: str) -> str:
+        """Format the tokens of a form like the output of LT's WordTokenizer: one token per line, with separators
+        written as blank lines."""
+        tokens = self.tokenise_line(line)
+        return "".join(('' if self.pattern.fullmatch(token) else token) + "\n" for token in tokens)
+
+    def tokenise(self, unmunched_file: NamedTemporaryFile) -> NamedTemporaryFile:
+        """Tokenise each line of an unmunched file, write it to another temp file and return it.
+
+        Args:
+            unmunched_file: the NamedTemporaryFile object for the unmunched file we'll be tokenising
+
+        Returns:
+            a NamedTemporaryFile with the result of tokenisation written to it, as in `LanguageToolUtils.tokenise`
+        """
+        prefix = path.basename(unmunched_file.name).split('_unmunched_')[0] + "_tokenised_"
+        tokenised_tmp = NamedTemporaryFile(delete=self.delete_tmp, mode='w', prefix=prefix)
+        LOGGER.debug(f"Tokenising {unmunched_file.name} into {tokenised_tmp.name} in Python ...")
+        with open(unmunched_file.name, 'r', encoding=LATIN_1_ENCODING) as u:
+            for line in u:
+                tokenised_tmp.write(self.format_line(line.rstrip("\n")))
+        unmunched_file.close()
+        tokenised_tmp.flush()
+        LOGGER.debug(f"Done tokenising {unmunched_file.name}!")
+        return tokenised_tmp
@@ -0,0 +1,325 @@
+"""A work queue that lives in a shared directory, so chunk jobs can be processed by any number of worker processes, on
+this host or on any other host that mounts the same filesystem."""
+import json
+import os
+import shutil
+import socket
+import threading
+import time
+import uuid
+from os import path
+from typing import Callable, List, Optional, Tuple
+
+from lib.logger import LOGGER
+
+
+class WorkQueue:
+    """A directory-based job queue with atomic claims and expiring leases.
+
+    The layout of the queue directory is:
+        jobs/<job_id>.json      the job payloads, published by the coordinator
+        claims/<job_id>.lease   the lease of the worker currently processing a job
+        results/<job_id>.txt    the result file of a completed job
+        attempts/<job_id>.json  the number of failed attempts at a job so far, and the last error
+        failed/<job_id>.json    the error message of a job that failed too many times
+        SEALED                  written once the coordinator has published all jobs
+        SHUTDOWN                written to ask all workers to stop
+
+    A claim is made by creating the lease file with O_EXCL, so only one worker can hold a job at a time. Workers renew
+    their leases while they work; a lease that is not renewed in time expires and the job can be claimed again by
+    another worker. Lease expiry uses wall-clock time, so the hosts sharing a queue should have synchronised clocks.
+
+    A job that raises an exception, or whose lease expires, goes back to the queue to be claimed again, until it has
+    failed `max_attempts` times; only then is it marked as failed.
+
+    Attributes:
+        queue_dir (str): the shared directory holding the queue
+        lease_seconds (float): how long a claim is valid for before it must be renewed
+        max_attempts (int): how many times a job may fail before it is given up on
+    """
+    def __init__(self, queue_dir: str, lease_seconds: float = 600, max_attempts: int = 3):
+        self.queue_dir = queue_dir
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.jobs_dir = path.join(queue_dir, 'jobs')
+        self.claims_dir = path.join(queue_dir, 'claims')
+        self.results_dir = path.join(queue_dir, 'results')
+        self.attempts_dir = path.join(queue_dir, 'attempts')
+        self.failed_dir = path.join(queue_dir, 'failed')
+        self.sealed_path = path.join(queue_dir, 'SEALED')
+        self.shutdown_path = path.join(queue_dir, 'SHUTDOWN')
+        for directory in self._directories():
+            os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def _write_atomic(filepath: str, data: str) -> None:
+        """Write to a temp file in the same directory and rename it, so readers never see a partial file."""
+        tmp_path = f"{filepath}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as tmp_file:
+            tmp_file.write(data)
+        os.replace(tmp_path, filepath)
+
+    @staticmethod
+    def _read_json(filepath: str) -> Optional[dict]:
+        try:
+            with open(filepath, 'r', encoding='utf-8') as json_file:
+                return json.load(json_file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _directories(self) -> List[str]:
+        return [self.jobs_dir, self.claims_dir, self.results_dir, self.attempts_dir, self.failed_dir]
+
+    def _lease_path(self, job_id: str) -> str:
+        return path.join(self.claims_dir, f"{job_id}.lease")
+
+    def _job_path(self, job_id: str) -> str:
+        return path.join(self.jobs_dir, f"{job_id}.json")
+
+    def _attempts_path(self, job_id: str) -> str:
+        return path.join(self.attempts_dir, f"{job_id}.json")
+
+    def _failed_path(self, job_id: str) -> str:
+        return path.join(self.failed_dir, f"{job_id}.json")
+
+    def result_path(self, job_id: str) -> str:
+        return path.join(self.results_dir, f"{job_id}.txt")
+
+    def reset(self) -> None:
+        """Remove every job, claim, result and marker left over from a previous run."""
+        for directory in self._directories():
+            shutil.rmtree(directory)
+            os.makedirs(directory)
+        for marker in (self.sealed_path, self.shutdown_path):
+            if path.exists(marker):
+                os.remove(marker)
+
+    def publish(self, job_id: str, payload: dict) -> None:
+        """Make a job available to workers."""
+        LOGGER.debug(f"Publishing job {job_id} to {self.queue_dir} ...")
+        self._write_atomic(self._job_path(job_id), json.dumps(payload))
+
+    def seal(self) -> None:
+        """Signal that all jobs have been published, so idle workers may exit once everything is done."""
+        self._write_atomic(self.sealed_path, str(time.time()))
+
+    def shutdown(self) -> None:
+        """Ask all workers to stop after their current job."""
+        self._write_atomic(self.shutdown_path, str(time.time()))
+
+    def job_ids(self) -> List[str]:
+        return sorted(filename[:-len('.json')] for filename in os.listdir(self.jobs_dir) if filename.endswith('.json'))
+
+    def payload(self, job_id: str) -> dict:
+        return self._read_json(self._job_path(job_id))
+
+    def is_done(self, job_id: str) -> bool:
+        return path.exists(self.result_path(job_id))
+
+    def is_failed(self, job_id: str) -> bool:
+        return path.exists(self._failed_path(job_id))
+
+    def failures(self) -> dict:
+        """A mapping of job ID to error message for every failed job."""
+        return {job_id: self._read_json(self._failed_path(job_id)).get('error') for job_id in self.job_ids()
+                if self.is_failed(job_id)}
+
+    def finished(self) -> bool:
+        """Whether all jobs have been published and each one of them is either done or failed."""
+        if not path.exists(self.sealed_path):
+            return False
+        return all(self.is_done(job_id) or self.is_failed(job_id) for job_id in self.job_ids())
+
+    def _new_lease(self, worker_id: str) -> dict:
+        return {'worker': worker_id, 'token': uuid.uuid4().hex, 'expires': time.time() + self.lease_seconds}
+
+    def _try_create_lease(self, job_id: str, worker_id: str) -> Optional[str]:
+        """Create the lease of a job, unless there already is one.
+
+        Returns:
+            the token of the new lease, or None
+        """
+        try:
+            fd = os.open(self._lease_path(job_id), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return None
+        lease = self._new_lease(worker_id)
+        with os.fdopen(fd, 'w', encoding='utf-8') as lease_file:
+            json.dump(lease, lease_file)
+        return lease['token']
+
+    def _try_reclaim(self, job_id: str, worker_id: str) -> Optional[str]:
+        """Take over the lease of a job if it has expired.
+
+        Returns:
+            the token of the new lease, or None
+        """
+        lease_path = self._lease_path(job_id)
+        lease = self._read_json(lease_path)
+        if lease is None or lease['expires'] > time.time():
+            return None
+        # Renaming is atomic, so only one of the workers racing for the same expired lease gets to move it away.
+        stale_path = f"{lease_path}.{uuid.uuid4().hex}.stale"
+        try:
+            os.rename(lease_path, stale_path)
+        except FileNotFoundError:
+            return None
+        moved = self._read_json(stale_path)
+        if moved is None or moved['token'] != lease['token']:
+            # Someone else reclaimed the job between our read and our rename, so put their fresh lease back.
+            try:
+                os.link(stale_path, lease_path)
+            except FileExistsError:
+                pass
+            os.remove(stale_path)
+            return None
+        os.remove(stale_path)
+        LOGGER.warning(f"Lease of {lease['worker']} on job {job_id} has expired, reclaiming it...")
+        # The previous holder may have died because of the job itself (e.g. by running out of memory), so this counts
+        # as a failed attempt too.
+        if self._record_attempt(job_id, f"lease of {lease['worker']} expired") >= self.max_attempts:
+            self._write_atomic(self._failed_path(job_id), json.dumps(self._read_json(self._attempts_path(job_id))))
+            return None
+        return self._try_create_lease(job_id, worker_id)
+
+    def claim(self, worker_id: str) -> Optional[Tuple[str, dict, str]]:
+        """Claim the next job that is neither done, failed, nor held under a valid lease.
+
+        Returns:
+            a tuple of the job ID, its payload and the token of the lease, or None if there is nothing to claim right
+            now
+        """
+        for job_id in self.job_ids():
+            if self.is_done(job_id) or self.is_failed(job_id):
+                continue
+            token = self._try_create_lease(job_id, worker_id) or self._try_reclaim(job_id, worker_id)
+            if token is None:
+                continue
+            if self.is_done(job_id):  # completed by the previous holder right before we claimed it
+                self.release(job_id, token)
+                continue
+            LOGGER.debug(f"Worker {worker_id} claimed job {job_id}.")
+            return job_id, self.payload(job_id), token
+        return None
+
+    def attempts(self, job_id: str) -> int:
+        """The number of failed attempts at a job so far."""
+        record = self._read_json(self._attempts_path(job_id))
+        return record['attempts'] if record else 0
+
+    def _record_attempt(self, job_id: str, error: str) -> int:
+        """Count a failed attempt at a job; only the holder of its lease may call this.
+
+        Returns:
+            the number of failed attempts so far
+        """
+        attempts = self.attempts(job_id) + 1
+        self._write_atomic(self._attempts_path(job_id), json.dumps({'attempts': attempts, 'error': error}))
+        return attempts
+
+    def renew(self, job_id: str, token: str) -> bool:
+        """Extend the lease of a job; returns False if the lease with this token is no longer held."""
+        lease = self._read_json(self._lease_path(job_id))
+        if lease is None or lease['token'] != token:
+            return False
+        lease['expires'] = time.time() + self.lease_seconds
+        self._write_atomic(self._lease_path(job_id), json.dumps(lease))
+        return True
+
+    def release(self, job_id: str, token: str) -> None:
+        """Remove the lease of a job, if it is still the one with this token."""
+        lease = self._read_json(self._lease_path(job_id))
+        if lease is None or lease['token'] != token:
+            return
+        try:
+            os.remove(self._lease_path(job_id))
+        except FileNotFoundError:
+            pass
+
+    def complete(self, job_id: str, result_filepath: str, token: str) -> None:
+        """Copy the result of a job into the queue and release its lease."""
+        tmp_path = f"{self.result_path(job_id)}.{uuid.uuid4().hex}.tmp"
+        shutil.copyfile(result_filepath, tmp_path)
+        os.replace(tmp_path, self.result_path(job_id))
+        self.release(job_id, token)
+
+    def fail(self, job_id: str, error: str, token: str) -> None:
+        """Count a failed attempt at a job, and either put it back in the queue or, after `max_attempts`, mark it as
+        failed."""
+        lease = self._read_json(self._lease_path(job_id))
+        if lease is None or lease['token'] != token:
+            LOGGER.warning(f"Job {job_id} failed after its lease was taken over, leaving it to the new holder.")
+            return
+        attempts = self._record_attempt(job_id, error)
+        if attempts >= self.max_attempts:
+            self._write_atomic(self._failed_path(job_id), json.dumps({'attempts': attempts, 'error': error}))
+        else:
+            LOGGER.warning(f"Job {job_id} failed ({attempts}/{self.max_attempts} attempts), putting it back...")
+        self.release(job_id, token)
+
+    def wait(self, poll_interval: float = 5.0) -> dict:
+        """Block until every job is done or failed, logging progress along the way.
+
+        Returns:
+            the failed jobs, as returned by `failures`
+        """
+        last_done = -1
+        while not self.finished():
+            done = sum(self.is_done(job_id) for job_id in self.job_ids())
+            if done != last_done:
+                LOGGER.info(f"{done}/{len(self.job_ids())} jobs done in {self.queue_dir} ...")
+                last_done = done
+            time.sleep(poll_interval)
+        return self.failures()
+
+    def _heartbeat(self, job_id: str, worker_id: str, token: str, stop: threading.Event) -> None:
+        while not stop.wait(self.lease_seconds / 3):
+            if not self.renew(job_id, token):
+                LOGGER.warning(f"Worker {worker_id} lost its lease on job {job_id}.")
+                return
+
+    def work(self, processor: Callable, worker_id: Optional[str] = None, poll_interval: float = 1.0,
+             on_complete: Optional[Callable[[dict], None]] = None) -> int:
+        """Claim and process jobs until the queue is finished or shut down.
+
+        Args:
+            processor: a callable that takes a job payload and returns a file object whose `name` is the path to the
+                       result; the file is closed once it has been copied into the queue
+            worker_id: a unique name for this worker; defaults to the host name, PID and thread ID
+            poll_interval: how long to wait between claim attempts when there is nothing to claim
+            on_complete: called with the payload of each job once its result is in the queue, e.g. to remove its
+                         input; a job that fails or is reclaimed still needs its input, so this is the only safe place
+
+        Returns:
+            the number of jobs this worker completed
+        """
+        worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{threading.get_ident()}"
+        completed = 0
+        LOGGER.info(f"Worker {worker_id} polling {self.queue_dir} ...")
+        while not path.exists(self.shutdown_path):
+            claimed = self.claim(worker_id)
+            if claimed is None:
+                if self.finished():
+                    break
+                time.sleep(poll_interval)
+                continue
+            job_id, payload, token = claimed
+            stop = threading.Event()
+            heartbeat = threading.Thread(target=self._heartbeat, args=(job_id, worker_id, token, stop), daemon=True)
+            heartbeat.start()
+            try:
+                result = processor(payload)
+                self.complete(job_id, result.name, token)
+                result.close()
+                completed += 1
+            except Exception as e:
+                LOGGER.error(f"Worker {worker_id} failed on job {job_id}: {e}")
+                self.fail(job_id, str(e), token)
+                continue
+            finally:
+                stop.set()
+                heartbeat.join()
+            if on_complete is not None:
+                on_complete(payload)
+        LOGGER.info(f"Worker {worker_id} exiting after completing {completed} jobs.")
+        return completed
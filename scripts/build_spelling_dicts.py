@@ -1,17 +1,35 @@
 """This was translated from shell to python iteratively and interactively using ChatGPT 4."""
 import argparse
 from datetime import datetime
-from typing import List
+from functools import partial
+from glob import glob
+from typing import List, Set, TextIO, Tuple
 import concurrent.futures
+import multiprocessing
+import os
+import shutil
+import sys
+import time
 from tempfile import NamedTemporaryFile
 from os import path
 
+from lib.chunk_runner import ChunkRunner
+from lib.constants import LATIN_1_ENCODING
 from lib.dic_chunk import DicChunk
+from lib.dic_normaliser import DicNormaliser
+from lib.file_watcher import FileWatcher
+from lib.hunspell_aff import AffixTable
+from lib.incremental_build import IncrementalBuild, delimit, split_delimited
 import lib.global_dirs as gd
-from lib.logger import LOGGER
+from lib.logger import LOGGER, add_json_log_file
 from lib.utils import compile_lt_dev, install_dictionaries, convert_to_utf8, pretty_time_delta, compile_lt
-from lib.variant import Variant, VARIANT_MAPPING
+from lib.variant import Variant, VARIANT_MAPPING, variants_by_source
 from lib.languagetool_utils import LanguageToolUtils as LtUtils
+from lib.jvm_startup import JVM_STARTUP
+from lib.resource_governor import GOVERNOR
+from lib.word_lists import merge_sorted_forms, sort_unique_forms
+from lib.word_tokeniser import WordTokeniser, bypass_characters
+from lib.work_queue import WorkQueue
 
 
 class CLI:
@@ -47,28 +65,369 @@ class CLI:
                                  help='Size of the chunks for splitting. Default is 20000.')
         self.parser.add_argument('--max-threads', type=int, default=8,
                                  help='Maximum number of threads to use. Default is 8.')
+        self.parser.add_argument('--no-normalise', action='store_false',
+                                 help='Chunk the .dic lines exactly as they are, without first dropping duplicates\n'
+                                      'and merging the flags of lines with the same stem.')
+        self.parser.add_argument('--retries', type=int, default=2,
+                                 help='How many times to retry a failing chunk before splitting it to find the\n'
+                                      'lines that fail. Default is 2.')
+        self.parser.add_argument('--retry-backoff', type=float, default=5.0,
+                                 help='Seconds to wait before the first retry, doubled on each further retry.\n'
+                                      'Default is 5.')
+        self.parser.add_argument('--max-quarantine', type=int, default=100,
+                                 help='Abort the build if more than this many .dic lines fail. Default is 100.')
+        self.parser.add_argument('--resume', action='store_true',
+                                 help='Reuse the results of chunks completed by a previous run with the same\n'
+                                      'lines, .aff file and tokeniser, instead of processing them again.')
+        self.parser.add_argument('--executor', type=str, choices=['thread', 'process'], default='thread',
+                                 help='Where to sort and merge the output of the chunks: in threads, or in worker\n'
+                                      'processes, which avoids the GIL at the cost of forking. Default is thread.')
         self.parser.add_argument('--no-force-compile', action='store_false',
                                  help='Do NOT force LT compilation.')
         self.parser.add_argument('--force-install', action='store_true',
                                  help='Install resulting binaries to local ~/.m2.')
         self.parser.add_argument("--install-version", type=str, required=False,
                                  help="Custom version for the dictionary installation (overrides $PT_DICT_VERSION).")
+        self.parser.add_argument('--maven-install', action='store_true',
+                                 help='Install with `mvn clean install` instead of packaging the jar in Python.')
         self.parser.add_argument('--verbosity', type=str, choices=['debug', 'info', 'warning', 'error', 'critical'],
                                  default='info', help='Verbosity level. Default is info.')
         self.parser.add_argument("--repo-dir", type=str, required=False)
+        self.parser.add_argument('--log-file', type=str, required=False,
+                                 help='Also write the full log, subprocess output included, to this file as JSON.')
+        self.parser.add_argument('--no-governor', action='store_false',
+                                 help='Start processes as soon as a thread is free, regardless of memory and load.')
+        self.parser.add_argument('--memory-reserve', type=int, default=1024,
+                                 help='MiB of memory to always leave free for the rest of the system. Default is 1024.')
+        self.parser.add_argument('--max-load', type=float, required=False,
+                                 help='Load average above which no new processes are started. Default is 1.5 times\n'
+                                      'the number of CPUs.')
+        self.parser.add_argument('--build-heap', type=int, required=False,
+                                 help='Heap in MiB of the JVMs that build the binaries. Default is\n'
+                                      '$DICT_BUILD_HEAP_MB if set, otherwise a quarter of the physical memory, as\n'
+                                      'the JVM would choose.')
+        self.parser.add_argument('--no-cds', action='store_false',
+                                 help='Do not use Class Data Sharing archives and tuned startup flags for LT tools.')
+        self.parser.add_argument('--queue-dir', type=str, required=False,
+                                 help='Shared directory for a multi-node work queue. If set, this process acts as\n'
+                                      'the coordinator: it publishes the chunk jobs there and waits for workers to\n'
+                                      'process them, instead of processing them in its own threads.')
+        self.parser.add_argument('--worker', action='store_true',
+                                 help='Run as a worker that processes chunk jobs from --queue-dir.')
+        self.parser.add_argument('--lease-seconds', type=int, default=600,
+                                 help='How long a worker may hold a job without renewing its lease. Default is 600.')
+        self.parser.add_argument('--job-attempts', type=int, default=3,
+                                 help='How many times a queue job may fail (or have its lease expire) before it is\n'
+                                      'given up on. Default is 3.')
+        self.parser.add_argument('--python-tokeniser', action='store_true',
+                                 help='Tokenise with the pure-Python port of the LT word tokeniser instead of the\n'
+                                      'Java WordTokenizer. This also skips compiling languagetool-dev. Check it\n'
+                                      'against the Java tokeniser with scripts/check_tokeniser_parity.py first.')
+        self.parser.add_argument('--incremental', action='store_true',
+                                 help='Only expand the .dic lines that changed since the last incremental run (and\n'
+                                      'those using affix flags that were edited), and patch the saved word list.\n'
+                                      'The first run, or any change to the .aff header, expands everything.')
+        self.parser.add_argument('--watch', action='store_true',
+                                 help='Keep running, and rebuild (incrementally) the binaries of the variants whose\n'
+                                      'sources change. Implies --incremental.')
+        self.parser.add_argument('--debounce', type=float, default=1.0,
+                                 help='Seconds without further changes to wait before rebuilding in --watch mode.\n'
+                                      'Default is 1.0.')
         self.args = self.parser.parse_args()
+        if self.args.worker and self.args.queue_dir is None:
+            self.parser.error("--worker requires --queue-dir")
+        if (self.args.incremental or self.args.watch) and self.args.queue_dir is not None:
+            self.parser.error("--incremental and --watch cannot be used with --queue-dir")
 
 
-def process_variant(variant: Variant, dic_chunk: DicChunk) -> tuple[Variant, NamedTemporaryFile]:
-    """For each file, runs unmunch, tokenisation (if applicable), and returns a tuple of the Variant and temp file."""
-    unmunched_file = dic_chunk.unmunch(variant.aff(), DELETE_TMP)
-    if dic_chunk.compounds:
+def process_variant(variant: Variant, dic_chunk: DicChunk, aff_path: str = None, keep_order: bool = False,
+                    convert: bool = True, keep_chunk: bool = False) -> tuple[Variant, NamedTemporaryFile]:
+    """For each file, runs unmunch, tokenisation (if applicable), and returns a tuple of the Variant and temp file.
+
+    If `keep_order` is True, the tokenised forms are written in the order unmunch produced them, which means every form
+    goes through the Java tokeniser rather than only those it could split. If `convert` is False, the unmunched forms
+    of compounds are returned in Latin-1, to be converted when they are sorted (see lib.word_lists). If `keep_chunk` is
+    True, the chunk file is left in place even with DELETE_TMP, so that it can be run again if tokenisation fails.
+    """
+    unmunched_file = dic_chunk.unmunch(aff_path or variant.aff(), DELETE_TMP,
+                                       remove_chunk=DELETE_TMP and not keep_chunk)
+    if dic_chunk.compounds and not convert:
+        processed_file = unmunched_file
+    elif dic_chunk.compounds:
         processed_file = convert_to_utf8(unmunched_file, DELETE_TMP)
+    elif PYTHON_TOKENISER:
+        processed_file = WordTokeniser(variant, DELETE_TMP).tokenise(unmunched_file)
     else:
-        processed_file = LtUtils(variant, DELETE_TMP).tokenise(unmunched_file)
+        processed_file = LtUtils(variant, DELETE_TMP, bypass=not keep_order).tokenise(unmunched_file)
     return variant, processed_file
 
 
+def expand_lines(variant: Variant, lines: List[str], compounds: bool) -> dict[int, Set[str]]:
+    """Unmunch and tokenise the given .dic lines in MAX_THREADS threads, and return the forms of each line."""
+    chunk_dir = path.join(TMP_DIR, 'incremental', 'compounds') if compounds else path.join(TMP_DIR, 'incremental')
+    os.makedirs(chunk_dir, exist_ok=True)
+    delimited = delimit(lines)
+    chunk_lines = CHUNK_SIZE * 2  # even, so that every chunk starts with a sentinel
+    chunks = [DicChunk.from_lines(delimited[i:i + chunk_lines], f"{variant.underscored}_chunk{i // chunk_lines}",
+                                  chunk_dir, compounds)
+              for i in range(0, len(delimited), chunk_lines)]
+    LOGGER.info(f"Expanding {len(lines)} lines of {variant} in {len(chunks)} chunks...")
+    forms: dict[int, Set[str]] = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_THREADS) as executor:
+        for _, processed_file in executor.map(lambda chunk: process_variant(variant, chunk, keep_order=True), chunks):
+            forms.update(split_delimited(processed_file.name))
+            processed_file.close()
+    return forms
+
+
+def incremental_builds() -> dict[Variant, IncrementalBuild]:
+    tokeniser = 'python' if PYTHON_TOKENISER else 'java'
+    return {variant: IncrementalBuild(variant, partial(expand_lines, variant), tokeniser, SAMPLE_SIZE)
+            for variant in DIC_VARIANTS}
+
+
+def build_incrementally(builds: dict[Variant, IncrementalBuild], variants: List[Variant]) -> None:
+    """Patch the merged word list of each variant from its index, then compile the binaries from it."""
+    wordlists = {variant: builds[variant].run() for variant in variants}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_THREADS) as executor:
+        executor.map(lambda var: LtUtils(var, DELETE_TMP).compile_spelling_binary(wordlists[var]), variants)
+
+
+def install() -> None:
+    custom_install_env_var_name = DIC_VARIANTS[0].lang.upper() + "_DICT_VERSION"
+    custom_version: tuple[str, str] = (custom_install_env_var_name, CUSTOM_INSTALL_VERSION)
+    install_dictionaries(custom_version, MAVEN_INSTALL)
+
+
+def watch() -> None:
+    """Rebuild the binaries of the variants whose sources change, until interrupted.
+
+    The builds keep their affix tables, indices and reference counts in memory between rebuilds, so a rebuild only costs
+    reading the .dic files, expanding the lines that changed, and compiling the binary.
+    """
+    builds = incremental_builds()
+    build_incrementally(builds, DIC_VARIANTS)
+    sources = variants_by_source(DIC_VARIANTS)
+    directories = [DIRS.HUNSPELL_DIR, DIRS.COMPOUNDS_DIR, DIRS.SPELLING_DICT_DIR, DIRS.TAGGER_DICT_DIR]
+    watcher = FileWatcher(directories, DEBOUNCE_SECONDS)
+    LOGGER.info("Waiting for changes, press Ctrl+C to stop.")
+    try:
+        for changed, first_change in watcher.changes():
+            affected = set().union(*(sources.get(filepath, set()) for filepath in changed))
+            variants = [variant for variant in DIC_VARIANTS if variant in affected]
+            if any(path.dirname(filepath) == path.abspath(DIRS.TAGGER_DICT_DIR) for filepath in changed):
+                LOGGER.warning("Tagger sources changed; they only reach the spelling dictionaries through the LT jar, "
+                               "so rebuild the tagger dictionaries and restart to pick them up.")
+            if not variants:
+                continue
+            LOGGER.info(f"Changed: {', '.join(sorted(path.basename(p) for p in changed))}; rebuilding {variants}...")
+            rebuild_start = time.monotonic()
+            try:
+                build_incrementally(builds, variants)
+                if FORCE_INSTALL:
+                    install()
+            except Exception as e:  # keep watching, the next edit may well fix it
+                LOGGER.error(f"Rebuilding {variants} failed: {e}")
+                continue
+            done = time.monotonic()
+            LOGGER.info(f"Rebuilt {variants} in {done - rebuild_start:.1f}s, "
+                        f"{done - first_change:.1f}s after the first change.")
+    except KeyboardInterrupt:
+        LOGGER.info("Stopped watching.")
+    finally:
+        watcher.close()
+
+
+def job_id(chunk: DicChunk) -> str:
+    return f"{chunk.name}_compounds" if chunk.compounds else chunk.name
+
+
+def process_job(job: dict) -> TextIO:
+    """Process a chunk job claimed from the work queue, with the retries and bisection of a ChunkRunner.
+
+    The shared chunk file is left in place until the job is complete (see `run_worker`). Lines that had to be
+    quarantined are written to QUEUE_DIR/quarantine, for the coordinator to report.
+    """
+    variant = Variant(job['variant'])
+    dic_chunk = DicChunk(job['chunk'], job['name'], job['compounds'])
+    tokeniser = 'python' if PYTHON_TOKENISER else 'java'
+    runner = ChunkRunner(lambda var, chunk: process_variant(var, chunk, job['aff'], keep_chunk=True),
+                         path.join(TMP_DIR, 'results'), options=f"tokeniser={tokeniser},queue", retries=RETRIES,
+                         backoff_seconds=RETRY_BACKOFF, max_quarantine=MAX_QUARANTINE, delete_chunks=DELETE_TMP)
+    result_path = runner.run(variant, dic_chunk, job['aff'], remove_chunk=False)
+    if runner.quarantine:
+        runner.report(path.join(QUEUE_DIR, 'quarantine', f"{job_id(dic_chunk)}.jsonl"))
+    return open(result_path, 'r', encoding='utf-8')
+
+
+def report_quarantine(quarantine_dir: str) -> None:
+    """Gather the lines the workers quarantined into TMP_DIR/quarantine.jsonl, and log them."""
+    report_paths = sorted(glob(path.join(quarantine_dir, '*.jsonl')))
+    if not report_paths:
+        LOGGER.info("No .dic lines were quarantined.")
+        return
+    os.makedirs(TMP_DIR, exist_ok=True)
+    report_path = path.join(TMP_DIR, 'quarantine.jsonl')
+    with open(report_path, 'w', encoding='utf-8') as report_file:
+        for worker_report_path in report_paths:
+            with open(worker_report_path, 'r', encoding='utf-8') as worker_report:
+                shutil.copyfileobj(worker_report, report_file)
+    with open(report_path, 'r', encoding='utf-8') as report_file:
+        count = sum(1 for _ in report_file)
+    LOGGER.warning(f"{count} .dic lines failed and were left out of the build (details in {report_path}).")
+
+
+def publish_and_wait(tasks: List[tuple[Variant, DicChunk]]) -> dict[Variant, List]:
+    """Publish the chunk jobs to the shared work queue, wait for workers to process them, and collect the results."""
+    queue = WorkQueue(QUEUE_DIR, LEASE_SECONDS, JOB_ATTEMPTS)
+    aff_dir = path.join(QUEUE_DIR, 'aff')
+    os.makedirs(aff_dir, exist_ok=True)
+    quarantine_dir = path.join(QUEUE_DIR, 'quarantine')
+    shutil.rmtree(quarantine_dir, ignore_errors=True)
+    os.makedirs(quarantine_dir)
+    for variant in DIC_VARIANTS:
+        shutil.copy(variant.aff(), aff_dir)
+    for variant, chunk in tasks:
+        queue.publish(job_id(chunk), {'variant': variant.hyphenated, 'chunk': chunk.filepath, 'name': chunk.name,
+                                      'compounds': chunk.compounds,
+                                      'aff': path.join(aff_dir, path.basename(variant.aff()))})
+    queue.seal()
+    LOGGER.info(f"Published {len(tasks)} jobs to {QUEUE_DIR}, waiting for workers...")
+    try:
+        failures = queue.wait()
+    finally:  # whether the queue drained or the coordinator was interrupted, idle workers have nothing left to do
+        queue.shutdown()
+    if failures:
+        for failed_job, error in failures.items():
+            LOGGER.error(f"Job {failed_job} failed: {error}")
+        raise RuntimeError(f"{len(failures)} jobs failed in {QUEUE_DIR}.")
+    report_quarantine(path.join(QUEUE_DIR, 'quarantine'))
+    results: dict[Variant, List] = {variant: [] for variant in DIC_VARIANTS}
+    for variant, chunk in tasks:
+        results[variant].append(open(queue.result_path(job_id(chunk)), 'r', encoding='utf-8'))
+    return results
+
+
+def remove_job_chunk(job: dict) -> None:
+    """Remove the shared chunk of a completed job; another worker may have completed it too and removed it already."""
+    try:
+        os.remove(job['chunk'])
+    except FileNotFoundError:
+        pass
+
+
+def run_worker() -> int:
+    """Process jobs from the shared work queue in MAX_THREADS threads until the coordinator's run is finished.
+
+    Returns:
+        the exit status: 1 if any of the threads crashed, 0 otherwise
+    """
+    queue = WorkQueue(QUEUE_DIR, LEASE_SECONDS, JOB_ATTEMPTS)
+    on_complete = remove_job_chunk if DELETE_TMP else None
+    with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_THREADS) as executor:
+        futures = [executor.submit(queue.work, process_job, on_complete=on_complete) for _ in range(MAX_THREADS)]
+    crashed = 0
+    for future in futures:
+        try:
+            future.result()
+        except Exception as e:
+            LOGGER.error(f"Worker thread crashed: {e}")
+            crashed += 1
+    if crashed:
+        LOGGER.error(f"{crashed} of {MAX_THREADS} worker threads crashed.")
+    if DELETE_TMP:  # completed results have been copied into the queue
+        shutil.rmtree(path.join(TMP_DIR, 'results'), ignore_errors=True)
+    return 1 if crashed else 0
+
+
+def normalised_lines(variant: Variant) -> Tuple[List[str], List[str]]:
+    """Read the main and compounds .dic lines of a variant, and drop or merge those that would expand to the same
+    forms (see lib.dic_normaliser)."""
+    lines = {}
+    for kind, dic_path in (('main', variant.dic()), ('compounds', variant.compounds())):
+        read = DicChunk.read_dic_lines(dic_path, SAMPLE_SIZE) if path.exists(dic_path) else []
+        lines[kind] = [line.rstrip("\n") for line in read if line.strip()]
+    normaliser = DicNormaliser(AffixTable.from_file(variant.aff()), bypass_characters(variant.lang))
+    main, compounds, stats = normaliser.normalise(lines['main'], lines['compounds'])
+    LOGGER.info(f"Normalised the .dic lines of {variant}: {stats}.")
+    return [line + "\n" for line in main], [line + "\n" for line in compounds]
+
+
+def chunk_runner() -> ChunkRunner:
+    """A runner for the chunks of this build, which keeps their results in TMP_DIR/results for --resume."""
+    tokeniser = 'python' if PYTHON_TOKENISER else 'java'
+    runner = ChunkRunner(lambda variant, chunk: process_variant(variant, chunk, convert=False, keep_chunk=True),
+                         path.join(TMP_DIR, 'results'), options=f"tokeniser={tokeniser}", retries=RETRIES,
+                         backoff_seconds=RETRY_BACKOFF, max_quarantine=MAX_QUARANTINE, delete_chunks=DELETE_TMP)
+    if not RESUME:
+        runner.clear()
+    return runner
+
+
+def make_executor(kind: str, max_workers: int) -> concurrent.futures.Executor:
+    if kind == 'process':
+        # Workers are started while other threads are running, so they are forked from a clean server process.
+        return concurrent.futures.ProcessPoolExecutor(max_workers=max_workers,
+                                                      mp_context=multiprocessing.get_context('forkserver'))
+    return concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+
+
+def build_from_chunks() -> None:
+    """Split the .dic files into chunks, expand and tokenise them, and build the binaries from the merged results."""
+    tasks = []
+    processed_files: dict[str: List[NamedTemporaryFile]] = {}
+    # TODO: PORTUGUESE – at some point we need to manage the pre and post-agreement distinction here
+    # the whole 'dict_variant' will need to go, and we will just merge all the unmunched files into one big one
+    # and then split them based on the dialectal and pre/post agreement alternation files
+    # With a work queue, chunks must be written to the shared directory so that workers on other hosts can read them.
+    chunk_dir = path.join(QUEUE_DIR, 'chunks') if QUEUE_DIR else TMP_DIR
+    if QUEUE_DIR:
+        WorkQueue(QUEUE_DIR, LEASE_SECONDS, JOB_ATTEMPTS).reset()
+        os.makedirs(path.join(chunk_dir, 'compounds'), exist_ok=True)
+    for variant in DIC_VARIANTS:
+        processed_files[variant] = []
+        main_lines, compound_lines = normalised_lines(variant) if NORMALISE else (None, None)
+        dic_chunks: List[DicChunk] = DicChunk.from_hunspell_dic(variant, CHUNK_SIZE, chunk_dir, SAMPLE_SIZE,
+                                                                lines=main_lines)
+        dic_chunks.extend(DicChunk.from_hunspell_dic(variant, CHUNK_SIZE, chunk_dir, SAMPLE_SIZE, compounds=True,
+                                                     lines=compound_lines))
+        for chunk in dic_chunks:
+            tasks.append((variant, chunk))
+    LOGGER.info("Starting unmunching and tokenisation process...")
+    # Subprocesses are waited on in threads; the sorting and merging of their output runs in the EXECUTOR pool.
+    sorted_paths: dict[Variant, List[concurrent.futures.Future]] = {variant: [] for variant in DIC_VARIANTS}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_THREADS) as executor, \
+            make_executor(EXECUTOR, MAX_THREADS) as cpu_executor:
+        if QUEUE_DIR:
+            processed_files = publish_and_wait(tasks)
+            for variant, file_list in processed_files.items():
+                for file in file_list:
+                    sorted_paths[variant].append(cpu_executor.submit(sort_unique_forms, file.name))
+        else:
+            runner = chunk_runner()
+            futures = [executor.submit(runner.run, variant, chunk) for variant, chunk in tasks]
+            for future, (variant, chunk) in zip(futures, tasks):
+                encoding = LATIN_1_ENCODING if chunk.compounds else 'utf-8'
+                sorted_paths[variant].append(cpu_executor.submit(sort_unique_forms, future.result(), encoding))
+            runner.report(path.join(TMP_DIR, 'quarantine.jsonl'))
+        os.makedirs(TMP_DIR, exist_ok=True)
+        wordlists = {variant: path.join(TMP_DIR, f"{variant.underscored}_wordlist.txt") for variant in DIC_VARIANTS}
+        merges = {variant: cpu_executor.submit(merge_sorted_forms, [future.result() for future in chunk_futures],
+                                               wordlists[variant])
+                  for variant, chunk_futures in sorted_paths.items()}
+        for variant, merge in merges.items():
+            LOGGER.debug(f"Found {merge.result()} unique unmunched and tokenised forms for {variant}.")
+        list(executor.map(lambda var: LtUtils(var, DELETE_TMP).compile_spelling_binary(wordlists[var]),
+                          DIC_VARIANTS))
+    for file_list in processed_files.values():
+        for file in file_list:
+            file.close()
+    if DELETE_TMP:
+        for wordlist in wordlists.values():
+            os.remove(wordlist)
+        shutil.rmtree(path.join(TMP_DIR, 'results'), ignore_errors=True)  # a copy of every chunk's output
+
+
 def main():
     start_time = datetime.now()
     LOGGER.debug(f"Started at {start_time.strftime('%r')}")
@@ -79,42 +438,34 @@ def main():
         f"SAMPLE_SIZE: {SAMPLE_SIZE}\n"
         f"CHUNK_SIZE: {CHUNK_SIZE}\n"
         f"MAX_THREADS: {MAX_THREADS}\n"
+        f"EXECUTOR: {EXECUTOR}\n"
+        f"NORMALISE: {NORMALISE}\n"
         f"FORCE_COMPILE: {FORCE_COMPILE}\n"
         f"FORCE_INSTALL: {FORCE_INSTALL}\n"
         f"CUSTOM_INSTALL_VERSION: {CUSTOM_INSTALL_VERSION}\n"
         f"DIC_VARIANTS: {DIC_VARIANTS}\n"
+        f"QUEUE_DIR: {QUEUE_DIR}\n"
+        f"PYTHON_TOKENISER: {PYTHON_TOKENISER}\n"
+        f"INCREMENTAL: {INCREMENTAL}\n"
+        f"WATCH: {WATCH}\n"
+        f"GOVERNOR: enabled={GOVERNOR.enabled}, reserve={GOVERNOR.reserve_mb} MiB, max load={GOVERNOR.max_load}\n"
     )
     # We might consider *always* compiling, since the spelling dicts depends on the tagger dicts having been *installed*
     # and compiled with LT. The reason we need to also re-build LT is that we need to make sure that OUR tagger dicts
     # are used by the WordTokenizer.
     if FORCE_COMPILE:
         compile_lt()
-        compile_lt_dev()
-    tasks = []
-    processed_files: dict[str: List[NamedTemporaryFile]] = {}
-    # TODO: PORTUGUESE – at some point we need to manage the pre and post-agreement distinction here
-    # the whole 'dict_variant' will need to go, and we will just merge all the unmunched files into one big one
-    # and then split them based on the dialectal and pre/post agreement alternation files
-    for variant in DIC_VARIANTS:
-        processed_files[variant] = []
-        dic_chunks: List[DicChunk] = DicChunk.from_hunspell_dic(variant, CHUNK_SIZE, TMP_DIR, SAMPLE_SIZE)
-        dic_chunks.extend(DicChunk.from_hunspell_dic(variant, CHUNK_SIZE, TMP_DIR, SAMPLE_SIZE, compounds=True))
-        for chunk in dic_chunks:
-            tasks.append((variant, chunk))
-    LOGGER.info("Starting unmunching and tokenisation process...")
-    with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_THREADS) as executor:
-        tmp_files = executor.map(lambda task: process_variant(task[0], task[1]), tasks)
-        for variant, file in tmp_files:
-            processed_files[variant].append(file)
-    with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_THREADS) as executor:
-        executor.map(lambda var: LtUtils(var, DELETE_TMP).build_spelling_binary(processed_files[var]), DIC_VARIANTS)
-    for file_list in processed_files.values():
-        for file in file_list:
-            file.close()
+        if not PYTHON_TOKENISER:  # languagetool-dev is only needed for the Java WordTokenizer
+            compile_lt_dev()
+    if WATCH:
+        watch()
+        return
+    if INCREMENTAL:
+        build_incrementally(incremental_builds(), DIC_VARIANTS)
+    else:
+        build_from_chunks()
     if FORCE_INSTALL:
-        custom_install_env_var_name = DIC_VARIANTS[0].lang.upper() + "_DICT_VERSION"
-        custom_version: tuple[str, str] = (custom_install_env_var_name, CUSTOM_INSTALL_VERSION)
-        install_dictionaries(custom_version)
+        install()
     end_time = datetime.now()
     LOGGER.debug(f"Finished at {end_time.strftime('%r')}. "
                  f"Total time elapsed: {pretty_time_delta(end_time - start_time)}.")
@@ -124,6 +475,10 @@ if __name__ == "__main__":
     cli = CLI()
     args = cli.args
     LOGGER.setLevel(args.verbosity.upper())
+    GOVERNOR.configure(args.no_governor, args.memory_reserve, args.max_load, args.build_heap)
+    JVM_STARTUP.enabled = args.no_cds
+    if args.log_file:
+        add_json_log_file(args.log_file)
     gd.initialise_dir_utils(args.repo_dir)
     DIRS = gd.DIRS
     TMP_DIR = path.join(DIRS.SPELLING_DICT_DIR, args.tmp_dir)
@@ -131,8 +486,25 @@ if __name__ == "__main__":
     SAMPLE_SIZE = args.sample_size
     CHUNK_SIZE = args.chunk_size
     MAX_THREADS = args.max_threads
+    EXECUTOR = args.executor
+    RETRIES = args.retries
+    RETRY_BACKOFF = args.retry_backoff
+    MAX_QUARANTINE = args.max_quarantine
+    RESUME = args.resume
+    NORMALISE = args.no_normalise
     FORCE_COMPILE = args.no_force_compile
     FORCE_INSTALL = args.force_install
     CUSTOM_INSTALL_VERSION = args.install_version
+    MAVEN_INSTALL = args.maven_install
     DIC_VARIANTS = VARIANT_MAPPING.get(args.language)
-    main()
+    QUEUE_DIR = args.queue_dir
+    LEASE_SECONDS = args.lease_seconds
+    JOB_ATTEMPTS = args.job_attempts
+    PYTHON_TOKENISER = args.python_tokeniser
+    INCREMENTAL = args.incremental or args.watch
+    WATCH = args.watch
+    DEBOUNCE_SECONDS = args.debounce
+    if args.worker:
+        sys.exit(run_worker())
+    else:
+        main()
@@ -3,12 +3,19 @@ logic, since most of it remains written in Perl.
 """
 import argparse
 import os
+import sys
 from datetime import datetime
+from os import path
+from tempfile import TemporaryDirectory
 
 from lib.languagetool_utils import LanguageToolUtils
-from lib.logger import LOGGER
+from lib.logger import LOGGER, add_json_log_file
 import lib.global_dirs as gd
+from lib.jvm_startup import JVM_STARTUP
+from lib.resource_governor import GOVERNOR
+from lib.pos_dict_validator import ValidationRules, read_tag_inventory, validate_pos_dict
 from lib.shell_command import ShellCommand
+from lib.tagger_sources import TaggerSourceBuilder, compare_dicts
 from lib.utils import compile_lt_dev, install_dictionaries, pretty_time_delta
 from lib.variant import Variant
 
@@ -33,12 +40,48 @@ class CLI:
                                  help='Install resulting binaries to local ~/.m2.')
         self.parser.add_argument("--install-version", type=str, required=False,
                                  help="Custom version for the dictionary installation (overrides $PT_DICT_VERSION).")
+        self.parser.add_argument('--maven-install', action='store_true',
+                                 help='Install with `mvn clean install` instead of packaging the jar in Python.')
         self.parser.add_argument('--verbosity', type=str, choices=['debug', 'info', 'warning', 'error', 'critical'],
                                  default='info', help='Verbosity level. Default is info.')
         self.parser.add_argument("--repo-dir", type=str, required=False)
+        self.parser.add_argument('--log-file', type=str, required=False,
+                                 help='Also write the full log, subprocess output included, to this file as JSON.')
+        self.parser.add_argument('--no-governor', action='store_false',
+                                 help='Start processes as soon as a thread is free, regardless of memory and load.')
+        self.parser.add_argument('--memory-reserve', type=int, default=1024,
+                                 help='MiB of memory to always leave free for the rest of the system. Default is 1024.')
+        self.parser.add_argument('--max-load', type=float, required=False,
+                                 help='Load average above which no new processes are started. Default is 1.5 times\n'
+                                      'the number of CPUs.')
+        self.parser.add_argument('--build-heap', type=int, required=False,
+                                 help='Heap in MiB of the JVMs that build the binaries. Default is\n'
+                                      '$DICT_BUILD_HEAP_MB if set, otherwise a quarter of the physical memory, as\n'
+                                      'the JVM would choose.')
+        self.parser.add_argument('--no-cds', action='store_false',
+                                 help='Do not use Class Data Sharing archives and tuned startup flags for LT tools.')
         self.parser.add_argument("--spelling", action="store_true", help="POS dict will also be used for spelling.",
                                  required=False)
+        self.parser.add_argument('--tagger-sources', type=str, choices=['shell', 'python', 'parity'], default='shell',
+                                 help='How to gather the tagger sources into dict.txt: with build-lt.sh (shell), with\n'
+                                      'the parallel Python implementation (python), or with both, comparing their\n'
+                                      'results and carrying on with the shell one (parity). Default is shell; only\n'
+                                      'use python once parity passes for the language, since it does not apply the\n'
+                                      'LT change files.')
+        self.parser.add_argument('--fdic-command', type=str, required=False,
+                                 help='Command converting an .fdic file on stdin into LT format on stdout, as\n'
+                                      'build-lt.sh runs it. Required with --tagger-sources python or parity.')
+        self.parser.add_argument('--max-workers', type=int, default=os.cpu_count(),
+                                 help='Number of processes gathering tagger sources in Python. Default is the number\n'
+                                      'of CPUs.')
+        self.parser.add_argument('--skip-validation', action='store_true',
+                                 help='Do not validate dict.txt against the .info files before building the binaries.')
+        self.parser.add_argument('--tag-inventory', type=str, required=False,
+                                 help='A file listing every valid tag, one per line; if set, tags in dict.txt are\n'
+                                      'checked against it.')
         self.args = self.parser.parse_args()
+        if self.args.tagger_sources != 'shell' and self.args.fdic_command is None:
+            self.parser.error(f"--tagger-sources {self.args.tagger_sources} requires --fdic-command")
 
 
 def set_shell_env():
@@ -61,19 +104,62 @@ def run_shell_script() -> None:
     ShellCommand(f"bash {DIRS.TAGGER_BUILD_SCRIPT_PATH}", env=SHELL_ENV).run_with_output()
 
 
+def run_python_gathering(result_dir: str = None) -> None:
+    """Gathers the tagger dict source files with the Python implementation, into `result_dir` if given, otherwise into
+    the same files as the shell script."""
+    builder = TaggerSourceBuilder(DIRS.TAGGER_DICT_DIR, FDIC_COMMAND, MAX_WORKERS)
+    if result_dir is None:
+        if path.isdir(DIRS.LT_CHANGES_DIR) and os.listdir(DIRS.LT_CHANGES_DIR):
+            LOGGER.warning(f"The files in {DIRS.LT_CHANGES_DIR} are only applied by build-lt.sh; check with "
+                           f"--tagger-sources parity that they make no difference to dict.txt.")
+        builder.build(DIRS.RESULT_POS_DICT_FILEPATH, DIRS.SORTED_POS_DICT_FILEPATH, DIRS.OLD_POS_DICT_FILEPATH,
+                      DIRS.POS_DICT_DIFF_FILEPATH)
+    else:
+        builder.build(path.join(result_dir, 'dict.txt'), path.join(result_dir, 'dict_sorted.txt'))
+
+
+def gather_tagger_sources() -> None:
+    if TAGGER_SOURCES == 'python':
+        run_python_gathering()
+        return
+    run_shell_script()
+    if TAGGER_SOURCES == 'parity':
+        with TemporaryDirectory() as tmp_dir:
+            run_python_gathering(tmp_dir)
+            differences = compare_dicts(DIRS.RESULT_POS_DICT_FILEPATH, path.join(tmp_dir, 'dict.txt'))
+        if differences:
+            LOGGER.warning(f"The Python gathering differs from build-lt.sh at {differences} lines; using the shell "
+                           f"result.")
+
+
+def validate_tagger_dict() -> None:
+    """Check dict.txt against the .info files it will be built with, and stop before any JVM starts if it is broken."""
+    tags = read_tag_inventory(TAG_INVENTORY) if TAG_INVENTORY else None
+    rules = ValidationRules([LANGUAGE.pos_info_java_input_path(), LANGUAGE.synth_info_java_input_path()], tags)
+    problems = validate_pos_dict(DIRS.RESULT_POS_DICT_FILEPATH, rules, MAX_WORKERS)
+    for line_number, message in problems:
+        LOGGER.error(f"{DIRS.RESULT_POS_DICT_FILEPATH}:{line_number}: {message}")
+    if problems:
+        LOGGER.critical(f"Found {len(problems)} problems in {DIRS.RESULT_POS_DICT_FILEPATH}, not building binaries. "
+                        f"Use --skip-validation to build anyway.")
+        sys.exit(1)
+
+
 def main():
     start_time = datetime.now()
     LOGGER.debug(f"Started at {start_time.strftime('%r')}")
     if FORCE_COMPILE:
         compile_lt_dev()
-    run_shell_script()
+    gather_tagger_sources()
+    if not SKIP_VALIDATION:
+        validate_tagger_dict()
     lt = LanguageToolUtils(LANGUAGE)
     lt.build_pos_binary(use_freq=SPELLING)
     lt.build_synth_binary()
     if FORCE_INSTALL:
         custom_install_env_var_name = LANGUAGE.lang.upper() + "_DICT_VERSION"
         custom_version: tuple[str, str] = (custom_install_env_var_name, CUSTOM_INSTALL_VERSION)
-        install_dictionaries(custom_version)
+        install_dictionaries(custom_version, MAVEN_INSTALL)
     if LOGGER.level == 10:  # DEBUG
         lt.dump_pos_dictionary()
         lt.dump_synth_dictionary()
@@ -87,10 +173,20 @@ if __name__ == "__main__":
     gd.initialise_dir_utils(cli.args.repo_dir)
     DIRS = gd.DIRS
     LOGGER.setLevel(cli.args.verbosity.upper())
+    GOVERNOR.configure(cli.args.no_governor, cli.args.memory_reserve, cli.args.max_load, cli.args.build_heap)
+    JVM_STARTUP.enabled = cli.args.no_cds
+    if cli.args.log_file:
+        add_json_log_file(cli.args.log_file)
     FORCE_INSTALL = cli.args.force_install
     FORCE_COMPILE = cli.args.no_force_compile
     SPELLING = cli.args.spelling
     CUSTOM_INSTALL_VERSION = cli.args.install_version
+    MAVEN_INSTALL = cli.args.maven_install
     LANGUAGE = Variant(cli.args.language)
     SHELL_ENV = set_shell_env()
+    TAGGER_SOURCES = cli.args.tagger_sources
+    FDIC_COMMAND = cli.args.fdic_command
+    MAX_WORKERS = cli.args.max_workers
+    SKIP_VALIDATION = cli.args.skip_validation
+    TAG_INVENTORY = cli.args.tag_inventory
     main()
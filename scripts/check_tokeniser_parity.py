@@ -0,0 +1,143 @@
+"""Compares the pure-Python word tokeniser with LT's Java WordTokenizer on a sample of unmunched forms."""
+import argparse
+import random
+import sys
+from os import path
+from tempfile import NamedTemporaryFile
+from typing import Dict, List, Set
+
+from lib.constants import LATIN_1_ENCODING
+from lib.dic_chunk import DicChunk
+import lib.global_dirs as gd
+from lib.incremental_build import delimit, split_delimited
+from lib.languagetool_utils import LanguageToolUtils as LtUtils
+from lib.logger import LOGGER
+from lib.variant import Variant
+from lib.word_tokeniser import WordTokeniser, write_parity_record
+
+
+class CLI:
+    prog_name = "poetry run python check_tokeniser_parity.py"
+    epilogue = "In case of problems when running this script, address a Github issue to the repository maintainer."
+    description = ("This script unmunches a sample of a variant's Hunspell dictionary, tokenises the forms with both\n"
+                   "the Java WordTokenizer and the Python port, and reports the tokens on which they disagree.\n"
+                   "It exits with a non-zero status if there are any differences.")
+
+    def __init__(self):
+        self.parser = argparse.ArgumentParser(
+            prog=self.prog_name,
+            description=self.description,
+            epilog=self.epilogue,
+            formatter_class=argparse.RawTextHelpFormatter
+        )
+        self.parser.add_argument('--variant', type=str, required=True,
+                                 help='Variant code (e.g. pt-BR, en-US) whose .dic and .aff files are sampled.')
+        self.parser.add_argument('--input', type=str, required=False,
+                                 help='A UTF-8 file with one form per line to use instead of unmunching a sample.')
+        self.parser.add_argument('--sample-size', type=int, default=5000,
+                                 help='Number of .dic lines to sample. Default is 5000.')
+        self.parser.add_argument('--record', type=str, required=False,
+                                 help='Also save the Java tokens of every sampled form to this file, e.g.\n'
+                                      'tests/data/tokeniser_parity/fr-FR.tsv, for the tests of the Python tokeniser.')
+        self.parser.add_argument('--max-examples', type=int, default=20,
+                                 help='Maximum number of differing tokens to print per side. Default is 20.')
+        self.parser.add_argument('--tmp-dir', default="tmp", required=False,
+                                 help='Temporary directory for the sample chunk, inside SPELLING_DICT_DIR.')
+        self.parser.add_argument('--verbosity', type=str, choices=['debug', 'info', 'warning', 'error', 'critical'],
+                                 default='info', help='Verbosity level. Default is info.')
+        self.parser.add_argument("--repo-dir", type=str, required=False)
+        self.args = self.parser.parse_args()
+
+
+def sample_forms(variant: Variant, sample_size: int, tmp_dir: str) -> List[str]:
+    """Unmunch a random sample of lines from the variant's .dic file and return the resulting forms."""
+    with open(variant.dic(), 'r', encoding=LATIN_1_ENCODING) as dic_file:
+        lines = [line for line in dic_file.readlines()[1:] if not line.startswith("#")]
+    if 0 < sample_size < len(lines):
+        lines = random.sample(lines, sample_size)
+    chunk_path = path.join(tmp_dir, f"{variant.underscored}_chunk0.dic")
+    with open(chunk_path, 'w', encoding=LATIN_1_ENCODING) as chunk_file:
+        chunk_file.write(f"{len(lines)}\n")
+        chunk_file.writelines(lines)
+    unmunched = DicChunk(chunk_path, f"{variant.underscored}_chunk0").unmunch(variant.aff(), delete_tmp=True)
+    with open(unmunched.name, 'r', encoding=LATIN_1_ENCODING) as unmunched_file:
+        forms = unmunched_file.read().splitlines()
+    unmunched.close()
+    return forms
+
+
+def tokens_of(tokenised_text: str) -> Set[str]:
+    return {line for line in tokenised_text.split("\n") if line}
+
+
+def latin_1_forms(forms: List[str]) -> List[str]:
+    """The forms that can be written to an unmunched file, which is Latin-1 like the Hunspell files; the others are
+    logged and skipped."""
+    encodable, skipped = [], []
+    for form in forms:
+        try:
+            form.encode(LATIN_1_ENCODING)
+            encodable.append(form)
+        except UnicodeEncodeError:
+            skipped.append(form)
+    if skipped:
+        LOGGER.warning(f"Skipping {len(skipped)} forms that can't be encoded in Latin-1, e.g.: {skipped[:10]}")
+    return encodable
+
+
+def java_tokens_by_form(variant: Variant, forms: List[str]) -> Dict[str, Set[str]]:
+    """Tokenise the forms with the Java tokeniser in one run, with sentinels between them to tell whose tokens are
+    whose."""
+    unmunched = NamedTemporaryFile(mode='w', encoding=LATIN_1_ENCODING,
+                                   prefix=f"{variant.underscored}_chunk0_unmunched_")
+    unmunched.writelines(delimit(forms))
+    unmunched.flush()
+    tokenised = LtUtils(variant, delete_tmp=True, bypass=False).tokenise(unmunched)
+    tokens = split_delimited(tokenised.name)
+    tokenised.close()
+    return {form: tokens.get(index, set()) for index, form in enumerate(forms)}
+
+
+def compare(variant: Variant, forms: List[str], max_examples: int, record_path: str = None) -> int:
+    """Tokenise the forms with both tokenisers and log the differences.
+
+    Returns:
+        the number of tokens produced by only one of the two tokenisers
+    """
+    java_by_form = java_tokens_by_form(variant, forms)
+    if record_path:
+        write_parity_record(record_path, java_by_form)
+        LOGGER.info(f"Saved the Java tokens of {len(java_by_form)} forms to {record_path}.")
+    java_tokens = set().union(*java_by_form.values())
+    python = WordTokeniser(variant)
+    forms_by_token: Dict[str, List[str]] = {}
+    for form in forms:
+        for token in tokens_of(python.format_line(form)):
+            forms_by_token.setdefault(token, []).append(form)
+    python_tokens = set(forms_by_token.keys())
+    only_java = sorted(java_tokens - python_tokens)
+    only_python = sorted(python_tokens - java_tokens)
+    LOGGER.info(f"Tokenised {len(forms)} forms: {len(java_tokens)} Java tokens, {len(python_tokens)} Python tokens.")
+    if only_java:
+        LOGGER.warning(f"{len(only_java)} tokens only produced by Java, e.g.: {only_java[:max_examples]}")
+    for token in only_python[:max_examples]:
+        LOGGER.warning(f"Token \"{token}\" only produced by Python, from forms: {forms_by_token[token][:3]}")
+    if only_python:
+        LOGGER.warning(f"{len(only_python)} tokens only produced by Python.")
+    if not only_java and not only_python:
+        LOGGER.info(f"The Python tokeniser matches the Java one on this sample of {variant}.")
+    return len(only_java) + len(only_python)
+
+
+if __name__ == "__main__":
+    cli = CLI()
+    args = cli.args
+    LOGGER.setLevel(args.verbosity.upper())
+    gd.initialise_dir_utils(args.repo_dir)
+    VARIANT = Variant(args.variant)
+    if args.input:
+        with open(args.input, 'r', encoding='utf-8') as input_file:
+            FORMS = latin_1_forms(input_file.read().splitlines())
+    else:
+        FORMS = sample_forms(VARIANT, args.sample_size, path.join(gd.DIRS.SPELLING_DICT_DIR, args.tmp_dir))
+    sys.exit(1 if compare(VARIANT, FORMS, args.max_examples, args.record) else 0)
@@ -0,0 +1,163 @@
+"""Reports which .dic entries and which .aff flags account for most of the forms a Hunspell dictionary expands to."""
+import argparse
+import concurrent.futures
+import json
+import os
+from os import path
+from typing import List, Tuple
+
+from lib.constants import LATIN_1_ENCODING
+from lib.dic_chunk import DicChunk
+from lib.expansion_profile import Forms, format_table, profile_entries, profile_flags, single_flag_entries
+from lib.hunspell_aff import AffixTable
+from lib.incremental_build import delimit, split_delimited
+import lib.global_dirs as gd
+from lib.languagetool_utils import LanguageToolUtils as LtUtils
+from lib.logger import LOGGER
+from lib.variant import Variant
+from lib.word_tokeniser import WordTokeniser
+
+
+class CLI:
+    prog_name = "poetry run python profile_expansion.py"
+    epilogue = "In case of problems when running this script, address a Github issue to the repository maintainer."
+    description = ("This script unmunches and tokenises a variant's Hunspell dictionary entry by entry, and reports\n"
+                   "how many forms each entry and each affix flag generates, how many distinct tokens are left after\n"
+                   "tokenisation, and how many of those are also produced by other entries. As in the build, the\n"
+                   "entries of the compounds .dic file are unmunched but not tokenised.")
+
+    def __init__(self):
+        self.parser = argparse.ArgumentParser(
+            prog=self.prog_name,
+            description=self.description,
+            epilog=self.epilogue,
+            formatter_class=argparse.RawTextHelpFormatter
+        )
+        self.parser.add_argument('--variant', type=str, required=True,
+                                 help='Variant code (e.g. pt-BR, en-US) whose .dic and .aff files are profiled.')
+        self.parser.add_argument('--sample-size', type=int, default=-1,
+                                 help='Number of .dic lines to profile. Use negative for all lines. Default is -1.')
+        self.parser.add_argument('--top', type=int, default=25,
+                                 help='Number of entries and flags to list. Default is 25.')
+        self.parser.add_argument('--output', type=str, required=False,
+                                 help='Write the full report (every flag, and the top entries) to this JSON file.')
+        self.parser.add_argument('--python-tokeniser', action='store_true',
+                                 help='Tokenise with the Python port instead of LT\'s Java WordTokenizer, which the\n'
+                                      'build uses by default; token counts are then approximate.')
+        self.parser.add_argument('--no-flags', action='store_false',
+                                 help='Skip the per-flag profile, which expands each stem once per flag it uses.')
+        self.parser.add_argument('--chunk-size', type=int, default=20000,
+                                 help='Size of the chunks for splitting. Default is 20000.')
+        self.parser.add_argument('--max-threads', type=int, default=8,
+                                 help='Maximum number of threads to use. Default is 8.')
+        self.parser.add_argument('--tmp-dir', default="tmp", required=False,
+                                 help='Temporary directory for the chunks, inside SPELLING_DICT_DIR.')
+        self.parser.add_argument('--verbosity', type=str, choices=['debug', 'info', 'warning', 'error', 'critical'],
+                                 default='info', help='Verbosity level. Default is info.')
+        self.parser.add_argument("--repo-dir", type=str, required=False)
+        self.args = self.parser.parse_args()
+
+
+def expand_chunk(dic_chunk: DicChunk) -> Tuple[Forms, Forms]:
+    """Unmunch and tokenise a chunk of delimited entries, and return the forms and the tokens of each entry."""
+    unmunched = dic_chunk.unmunch(VARIANT.aff(), delete_tmp=True)
+    generated = split_delimited(unmunched.name, LATIN_1_ENCODING)
+    if dic_chunk.compounds:  # compounds are not tokenised in the build either
+        unmunched.close()
+        return generated, generated
+    if PYTHON_TOKENISER:
+        tokenised = WordTokeniser(VARIANT, delete_tmp=True).tokenise(unmunched)
+    else:
+        tokenised = LtUtils(VARIANT, delete_tmp=True, bypass=False).tokenise(unmunched)
+    tokens = split_delimited(tokenised.name)
+    tokenised.close()
+    return generated, tokens
+
+
+def expand(entries: List[str], name: str, compounds: bool = False) -> Tuple[Forms, Forms]:
+    """Expand the given .dic entries in MAX_THREADS threads, keeping track of which entry produced which forms."""
+    chunk_dir = path.join(TMP_DIR, 'profile', 'compounds') if compounds else path.join(TMP_DIR, 'profile')
+    os.makedirs(chunk_dir, exist_ok=True)
+    delimited = delimit(entries)
+    chunk_lines = CHUNK_SIZE * 2  # even, so that every chunk starts with a sentinel
+    chunks = [DicChunk.from_lines(delimited[i:i + chunk_lines],
+                                  f"{VARIANT.underscored}_{name}_chunk{i // chunk_lines}", chunk_dir, compounds)
+              for i in range(0, len(delimited), chunk_lines)]
+    LOGGER.info(f"Expanding {len(entries)} {name} entries of {VARIANT} in {len(chunks)} chunks...")
+    generated, tokens = {}, {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_THREADS) as executor:
+        for chunk_generated, chunk_tokens in executor.map(expand_chunk, chunks):
+            generated.update(chunk_generated)
+            tokens.update(chunk_tokens)
+    return generated, tokens
+
+
+def expand_both(main: List[str], compounds: List[str], name: str) -> Tuple[Forms, Forms]:
+    """Expand the entries of the main and the compounds .dic files; compound entries come after the main ones."""
+    generated, tokens = expand(main, name)
+    compound_generated, compound_tokens = expand(compounds, f"{name}_compounds", compounds=True)
+    generated.update({len(main) + index: forms for index, forms in compound_generated.items()})
+    tokens.update({len(main) + index: forms for index, forms in compound_tokens.items()})
+    return generated, tokens
+
+
+def read_lines(dic_path: str) -> List[str]:
+    if not path.exists(dic_path):
+        return []
+    return [line.rstrip("\n") for line in DicChunk.read_dic_lines(dic_path, SAMPLE_SIZE) if line.strip()]
+
+
+def profile() -> dict:
+    main_lines, compound_lines = read_lines(VARIANT.dic()), read_lines(VARIANT.compounds())
+    lines = main_lines + compound_lines
+    generated, tokens = expand_both(main_lines, compound_lines, 'entries')
+    entry_profiles, token_counts = profile_entries(lines, generated, tokens)
+    for entry in entry_profiles[len(main_lines):]:
+        entry['compounds'] = True
+    flag_profiles = []
+    if PROFILE_FLAGS:
+        table = AffixTable.from_file(VARIANT.aff())
+        if table.aliases:  # flags can't be written on their own when .dic lines refer to AF aliases
+            LOGGER.warning(f"{VARIANT.aff()} uses AF aliases, skipping the per-flag profile.")
+        else:
+            main_entries, flag_entries = single_flag_entries(main_lines, table)
+            compound_entries, compound_flag_entries = single_flag_entries(compound_lines, table)
+            offset = len(main_entries)
+            flag_entries += [(flag, offset + entry_index, offset + stem_index)
+                             for flag, entry_index, stem_index in compound_flag_entries]
+            flag_generated, flag_tokens = expand_both(main_entries, compound_entries, 'flags')
+            flag_profiles = profile_flags(table, flag_entries, flag_generated, flag_tokens, token_counts)
+    entry_profiles.sort(key=lambda entry: entry['generated'], reverse=True)
+    flag_profiles.sort(key=lambda flag: flag['generated'], reverse=True)
+    return {
+        'variant': VARIANT.hyphenated,
+        'tokeniser': 'python' if PYTHON_TOKENISER else 'java',
+        'lines': len(lines),
+        'generated': sum(entry['generated'] for entry in entry_profiles),
+        'tokens': len(token_counts),
+        'duplicated_tokens': sum(1 for count in token_counts.values() if count > 1),
+        'top_entries': entry_profiles[:TOP],
+        'flags': flag_profiles,
+        'top_flags': flag_profiles[:TOP],
+    }
+
+
+if __name__ == "__main__":
+    cli = CLI()
+    args = cli.args
+    LOGGER.setLevel(args.verbosity.upper())
+    gd.initialise_dir_utils(args.repo_dir)
+    VARIANT = Variant(args.variant)
+    TMP_DIR = path.join(gd.DIRS.SPELLING_DICT_DIR, args.tmp_dir)
+    SAMPLE_SIZE = args.sample_size
+    TOP = args.top
+    PYTHON_TOKENISER = args.python_tokeniser
+    PROFILE_FLAGS = args.no_flags
+    CHUNK_SIZE = args.chunk_size
+    MAX_THREADS = args.max_threads
+    REPORT = profile()
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output_file:
+            json.dump(REPORT, output_file, ensure_ascii=False, indent=2)
+        LOGGER.info(f"Wrote the full report to {args.output}.")
+    print(format_table(REPORT, TOP))
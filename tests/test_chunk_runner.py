@@ -0,0 +1,137 @@
+import concurrent.futures
+import os
+import threading
+from os import path
+from tempfile import NamedTemporaryFile
+
+import pytest
+
+from lib.chunk_runner import ChunkRunner, QuarantineLimitExceeded
+from lib.dic_chunk import DicChunk
+from lib.shell_command import ShellCommandException
+from lib.variant import Variant
+
+
+class FakeProcessor:
+    """Upper-cases the lines of a chunk, and fails on any chunk with a line starting with "bad"."""
+    def __init__(self, transient_failures: int = 0):
+        self.transient_failures = transient_failures
+        self.calls = 0
+
+    def __call__(self, variant, chunk):
+        self.calls += 1
+        if self.transient_failures:
+            self.transient_failures -= 1
+            raise ShellCommandException(137, "Killed")
+        lines = DicChunk.read_dic_lines(chunk.filepath)
+        if any(line.startswith("bad") for line in lines):
+            raise ShellCommandException(1, f"cannot expand {chunk}")
+        output = NamedTemporaryFile(mode='w', delete=False)
+        output.write("".join(line.upper() for line in lines))
+        output.flush()
+        return variant, output
+
+
+class InLockstep(FakeProcessor):
+    """A FakeProcessor called from two threads, which only reads a chunk once both threads have written theirs."""
+    def __init__(self):
+        super().__init__()
+        self.barrier = threading.Barrier(2, timeout=5)
+
+    def __call__(self, variant, chunk):
+        self.barrier.wait()
+        return super().__call__(variant, chunk)
+
+
+class FakeUnmunch:
+    """Stands in for `unmunch`, returning the lines of the chunk it is given, and failing if the chunk is missing."""
+    def __init__(self, cmd: str):
+        self.chunk_path = cmd.split()[1]
+
+    def run(self) -> bytes:
+        if not path.exists(self.chunk_path):
+            raise ShellCommandException(1, f"cannot open {self.chunk_path}")
+        return "".join(DicChunk.read_dic_lines(self.chunk_path)).encode('latin-1')
+
+
+class UnmunchThenTokenise:
+    """Unmunches a chunk as `process_variant` does with --delete-tmp, then fails the tokeniser the first time."""
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, variant, chunk):
+        self.calls += 1
+        unmunched = chunk.unmunch(variant.aff(), delete_tmp=True, remove_chunk=False)
+        if self.calls == 1:
+            unmunched.close()
+            raise ShellCommandException(1, "tokeniser crashed")
+        with open(unmunched.name, 'rb') as unmunched_file:
+            forms = unmunched_file.read().decode('latin-1')
+        unmunched.close()
+        output = NamedTemporaryFile(mode='w', delete=False)
+        output.write(forms.upper())
+        output.flush()
+        return variant, output
+
+
+class TestChunkRunner:
+    """Test the retries, bisection and stored results of the ChunkRunner class."""
+    @staticmethod
+    def setup(tmp_path, lines):
+        (tmp_path / 'pt_BR.aff').write_text("SET ISO8859-1\n")
+        variant = Variant('pt-BR')
+        variant.aff = lambda: str(tmp_path / 'pt_BR.aff')
+        return variant, DicChunk.from_lines([line + "\n" for line in lines], "pt_BR_chunk0", str(tmp_path))
+
+    def test_transient_failure(self, tmp_path):
+        variant, chunk = self.setup(tmp_path, ["casa", "mesa"])
+        processor = FakeProcessor(transient_failures=2)
+        runner = ChunkRunner(processor, str(tmp_path / 'results'), backoff_seconds=0)
+        with open(runner.run(variant, chunk)) as result:
+            assert result.read() == "CASA\nMESA\n"
+        assert processor.calls == 3 and runner.quarantine == []
+
+    def test_tokeniser_failure_with_delete_tmp(self, tmp_path, monkeypatch):
+        monkeypatch.setattr('lib.dic_chunk.ShellCommand', FakeUnmunch)
+        variant, chunk = self.setup(tmp_path, ["casa", "mesa"])
+        processor = UnmunchThenTokenise()
+        runner = ChunkRunner(processor, str(tmp_path / 'results'), backoff_seconds=0, delete_chunks=True)
+        with open(runner.run(variant, chunk)) as result:
+            assert result.read() == "CASA\nMESA\n"
+        assert processor.calls == 2 and runner.quarantine == []
+        assert not path.exists(chunk.filepath)
+
+    def test_bisection_and_resume(self, tmp_path):
+        lines = ["casa", "bad/X", "mesa", "porta", "badly", "janela"]
+        variant, chunk = self.setup(tmp_path, lines)
+        runner = ChunkRunner(FakeProcessor(), str(tmp_path / 'results'), retries=1, backoff_seconds=0)
+        with open(runner.run(variant, chunk)) as result:
+            assert sorted(result.read().split()) == ["CASA", "JANELA", "MESA", "PORTA"]
+        assert [entry['line'] for entry in runner.quarantine] == ["bad/X", "badly"]
+        runner.report(str(tmp_path / 'quarantine.jsonl'))
+        assert "bad/X" in (tmp_path / 'quarantine.jsonl').read_text()
+        processor = FakeProcessor()
+        resumed = ChunkRunner(processor, str(tmp_path / 'results'), retries=1, backoff_seconds=0)
+        resumed.run(variant, chunk)
+        assert processor.calls == 0 and len(resumed.quarantine) == 2
+        resumed.clear()
+        resumed.run(variant, chunk)
+        assert processor.calls > 0
+
+    def test_concurrent_bisections(self, tmp_path):
+        variant, chunk = self.setup(tmp_path, ["casa", "bad1"])
+        os.makedirs(tmp_path / 'compounds')
+        compounds = DicChunk.from_lines(["mesa\n", "bad2\n"], "pt_BR_chunk0", str(tmp_path / 'compounds'), True)
+        runner = ChunkRunner(InLockstep(), str(tmp_path / 'results'), retries=0, delete_chunks=True)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+            results = list(executor.map(runner.run, [variant, variant], [chunk, compounds]))
+        with open(results[0]) as main_result, open(results[1]) as compounds_result:
+            assert (main_result.read(), compounds_result.read()) == ("CASA\n", "MESA\n")
+        assert sorted(entry['line'] for entry in runner.quarantine) == ["bad1", "bad2"]
+        assert os.listdir(runner.bisection_dir) == []
+
+    def test_quarantine_limit(self, tmp_path):
+        variant, chunk = self.setup(tmp_path, ["bad1", "bad2", "casa"])
+        runner = ChunkRunner(FakeProcessor(), str(tmp_path / 'results'), retries=0, max_quarantine=1)
+        with pytest.raises(QuarantineLimitExceeded):
+            runner.run(variant, chunk)
@@ -0,0 +1,46 @@
+from lib.dic_normaliser import DicNormaliser
+from lib.hunspell_aff import AffixTable
+from lib.word_tokeniser import bypass_characters
+
+AFF = """NEEDAFFIX X
+
+SFX S Y 1
+SFX S 0 s .
+
+SFX M Y 1
+SFX M 0 mente .
+
+SFX H N 1
+SFX H 0 -se .
+
+SFX X Y 1
+SFX X 0 inha .
+
+PFX R Y 1
+PFX R 0 re .
+"""
+
+
+class TestDicNormaliser:
+    """Test the merging and dropping of .dic lines before chunking."""
+    normaliser = DicNormaliser(AffixTable.parse(AFF), bypass_characters('pt'))
+
+    def test_duplicates_and_merges(self):
+        main, _, stats = self.normaliser.normalise(["casa/S", "mesa", "casa/S", "casa/M"], [])
+        assert main == ["casa/SM", "mesa"]
+        assert (stats.duplicates, stats.merged, stats.lines_out) == (1, 1, 2)
+
+    def test_unsafe_merges(self):
+        lines = ["casa/S", "casa/R", "mesa/X", "mesa/S", "sol/S", "sol/M po:noun", "lar/Z", "lar/S"]
+        main, _, stats = self.normaliser.normalise(lines, [])
+        # a new PFX x SFX cross product, a special flag, morphology and an unknown flag
+        assert main == lines
+        assert stats.merged == 0
+
+    def test_lines_in_compounds(self):
+        main, compounds, stats = self.normaliser.normalise(["casa/S", "lavar/H", "mesa"], ["casa/S", "lavar/H"])
+        # "lavar-se" may be split by the tokeniser, so the main line stays
+        assert main == ["lavar/H", "mesa"]
+        assert compounds == ["casa/S", "lavar/H"]
+        assert stats.in_compounds == 1
+        assert "5 -> 4 lines" in str(stats)
@@ -0,0 +1,67 @@
+import zipfile
+
+import pytest
+
+from lib.dict_packaging import DictPackager, PackagingError, file_digest
+
+POM = """<?xml version="1.0" encoding="UTF-8"?>
+<project xmlns="http://maven.apache.org/POM/4.0.0">
+  <modelVersion>4.0.0</modelVersion>
+  <groupId>org.languagetool</groupId>
+  <artifactId>portuguese-pos-dict</artifactId>
+  <version>${env.PT_DICT_VERSION}</version>
+</project>
+"""
+
+
+class TestDictPackager:
+    """Test the Maven-free packaging and installation of dictionaries."""
+    @staticmethod
+    def make_project(project_dir, pom=POM):
+        resources = project_dir / 'src' / 'main' / 'resources' / 'org' / 'languagetool' / 'resource' / 'pt'
+        (resources / 'spelling').mkdir(parents=True)
+        (resources / 'portuguese.dict').write_bytes(b'\x5c\xfa binary')
+        (resources / 'spelling' / 'pt-BR.info').write_text("fsa.dict.encoding=utf-8\n")
+        (project_dir / 'pom.xml').write_text(pom)
+        return resources
+
+    def test_package_and_install(self, tmp_path):
+        resources = self.make_project(tmp_path / 'project')
+        repository = tmp_path / 'repository'
+        packager = DictPackager(str(tmp_path / 'project'), {'PT_DICT_VERSION': '1.2.3'}, str(repository))
+        assert packager.package()
+        assert packager.jar_path.endswith('target/portuguese-pos-dict-1.2.3.jar')
+        with zipfile.ZipFile(packager.jar_path) as jar:
+            names = jar.namelist()
+            assert 'org/languagetool/resource/pt/spelling/pt-BR.info' in names
+            assert 'org/languagetool/resource/pt/spelling/' in names
+            pom = jar.read('META-INF/maven/org.languagetool/portuguese-pos-dict/pom.xml').decode()
+            assert "<version>1.2.3</version>" in pom
+        assert not packager.package()  # nothing changed
+        assert packager.install()
+        version_dir = repository / 'org' / 'languagetool' / 'portuguese-pos-dict' / '1.2.3'
+        jar = version_dir / 'portuguese-pos-dict-1.2.3.jar'
+        assert (version_dir / 'portuguese-pos-dict-1.2.3.jar.sha1').read_text() == file_digest(str(jar), 'sha1')
+        assert "<version>1.2.3</version>" in (version_dir / 'portuguese-pos-dict-1.2.3.pom').read_text()
+        assert "<version>1.2.3</version>" in (version_dir.parent / 'maven-metadata-local.xml').read_text()
+        assert not packager.install()
+        (resources / 'portuguese.dict').write_bytes(b'rebuilt')
+        assert packager.package() and packager.install()
+
+    def test_deterministic(self, tmp_path):
+        digests = []
+        for name in ['a', 'b']:
+            self.make_project(tmp_path / name)
+            packager = DictPackager(str(tmp_path / name), {'PT_DICT_VERSION': '1.0'}, str(tmp_path / 'repository'))
+            packager.package()
+            digests.append(file_digest(packager.jar_path, 'sha256'))
+        assert digests[0] == digests[1]
+
+    def test_unsupported(self, tmp_path, monkeypatch):
+        monkeypatch.delenv('PT_DICT_VERSION', raising=False)
+        self.make_project(tmp_path, POM.replace("</project>", "<build><plugins/></build></project>"))
+        with pytest.raises(PackagingError):
+            DictPackager(str(tmp_path), {'PT_DICT_VERSION': '1.0'})
+        (tmp_path / 'pom.xml').write_text(POM)
+        with pytest.raises(PackagingError):
+            DictPackager(str(tmp_path), {})
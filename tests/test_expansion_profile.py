@@ -0,0 +1,39 @@
+from lib.expansion_profile import format_table, histogram, profile_entries, profile_flags, single_flag_entries
+from lib.hunspell_aff import AffixTable
+
+AFF = """SFX S Y 1
+SFX S 0 s .
+
+PFX R Y 1
+PFX R 0 re .
+"""
+
+
+class TestExpansionProfile:
+    """Test the statistics of the expansion profiler."""
+    def test_histogram(self):
+        assert histogram([0, 1, 2, 3, 5, 9]) == {"0": 1, "1": 1, "2-3": 2, "4-7": 1, "8-15": 1}
+
+    def test_single_flag_entries(self):
+        entries, flag_entries = single_flag_entries(["casa/SR", "casa/S", "mesa"], AffixTable.parse(AFF))
+        assert entries == ["casa", "casa/S", "casa/R", "mesa"]
+        assert flag_entries == [('S', 1, 0), ('R', 2, 0), ('S', 1, 0)]
+
+    def test_profiles(self):
+        lines = ["casa/SR", "casas"]
+        generated = {0: {"casa", "casas", "recasa", "recasas"}, 1: {"casas"}}
+        entries, token_counts = profile_entries(lines, generated, generated)
+        assert entries[0] == {'entry': "casa/SR", 'generated': 4, 'tokens': 4, 'duplicates': 1}
+        assert entries[1]['duplicates'] == 1
+        table = AffixTable.parse(AFF)
+        _, flag_entries = single_flag_entries(lines, table)
+        flag_generated = {0: {"casa"}, 1: {"casa", "casas"}, 2: {"casa", "recasa"}}
+        flags = profile_flags(table, flag_entries, flag_generated, flag_generated, token_counts)
+        assert flags[0] == {'flag': 'S', 'kind': 'SFX', 'rules': 1, 'entries': 1, 'generated': 1, 'tokens': 1,
+                            'duplicates': 1, 'max_per_entry': 1, 'histogram': {"1": 1}}
+        assert flags[1]['flag'] == 'R' and flags[1]['duplicates'] == 0
+        report = {'variant': 'pt-BR', 'lines': 2, 'generated': 5, 'tokens': 4, 'top_entries': entries,
+                  'top_flags': flags}
+        assert "casa/SR" in format_table(report, 2)
+        assert "approximate" not in format_table(report, 2)
+        assert "approximate" in format_table({**report, 'tokeniser': 'python'}, 2)
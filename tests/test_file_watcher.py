@@ -0,0 +1,44 @@
+import threading
+import time
+
+import pytest
+
+from lib.file_watcher import FileWatcher, InotifyBackend, PollingBackend
+
+
+class TestFileWatcher:
+    """Test the FileWatcher class and its backends."""
+    def test_polling(self, tmp_path):
+        (tmp_path / 'pt_BR.dic').write_text("1\ncasa/S\n")
+        backend = PollingBackend([str(tmp_path)], poll_interval=0.01)
+        assert backend.poll(0.01) == set()
+        (tmp_path / 'pt_BR.dic').write_text("2\ncasa/S\nmesa/S\n")
+        (tmp_path / 'pt_BR.aff').write_text("SET ISO8859-1\n")
+        assert backend.poll(0.01) == {str(tmp_path / 'pt_BR.dic'), str(tmp_path / 'pt_BR.aff')}
+        (tmp_path / 'pt_BR.aff').unlink()
+        assert backend.poll(0.01) == {str(tmp_path / 'pt_BR.aff')}
+
+    def test_inotify(self, tmp_path):
+        try:
+            backend = InotifyBackend([str(tmp_path)])
+        except (OSError, AttributeError, TypeError):
+            pytest.skip("inotify is not available")
+        (tmp_path / 'pt_BR.dic').write_text("1\ncasa/S\n")
+        assert backend.poll(1) == {str(tmp_path / 'pt_BR.dic')}
+        assert backend.poll(0.01) == set()
+        backend.close()
+
+    def test_debounce(self, tmp_path):
+        watcher = FileWatcher([str(tmp_path), str(tmp_path / 'missing')], debounce_seconds=0.3, use_inotify=False)
+        watcher.backend.poll_interval = 0.05
+        assert watcher.directories == [str(tmp_path)]
+
+        def edit():
+            for name in ['a.dic', 'b.dic', 'c.aff']:
+                (tmp_path / name).write_text(name)
+                time.sleep(0.1)
+        threading.Thread(target=edit).start()
+        changed, first_change = next(watcher.changes())
+        assert changed == {str(tmp_path / name) for name in ['a.dic', 'b.dic', 'c.aff']}
+        assert time.monotonic() - first_change >= 0.3
+        watcher.close()
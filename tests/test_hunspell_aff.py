@@ -0,0 +1,56 @@
+from lib.hunspell_aff import AffixTable, parse_dic_line
+
+AFF = """SET ISO8859-1
+TRY esianrtolcdugmphbyfvkwz
+NEEDAFFIX !
+
+PFX R Y 1
+PFX R 0 re .
+
+SFX S Y 2
+SFX S 0 s [^s]
+SFX S 0 es s
+
+SFX P Y 1
+SFX P 0 s/S .
+"""
+
+
+class TestAffixTable:
+    """Test the parser of Hunspell .aff files."""
+    def test_parse(self):
+        table = AffixTable.parse(AFF)
+        assert table.kind('R') == 'PFX' and table.kind('S') == 'SFX' and table.kind('X') is None
+        assert [(rule.add, rule.condition) for rule in table.rules['S']] == [('s', '[^s]'), ('es', 's')]
+        assert table.rules['P'][0].continuation == 'S'
+        assert table.cross_product == {'R': True, 'S': True, 'P': True}
+        assert table.special_flags == {'NEEDAFFIX': '!'}
+
+    def test_parse_flags(self):
+        assert AffixTable.parse("FLAG long\n").parse_flags("AaBb") == ['Aa', 'Bb']
+        assert AffixTable.parse("FLAG num\n").parse_flags("12,3") == ['12', '3']
+        assert AffixTable.parse("AF 2\nAF RS\nAF P\n").parse_flags("2") == ['P']
+
+    def test_utf8_flags(self):
+        # what AffixTable.from_file and DicChunk.read_dic_lines return: UTF-8 bytes read as Latin-1
+        aff = "SET UTF-8\nSFX é Y 1\nSFX é 0 s .\nFLAG UTF-8\nNEEDAFFIX ñ\n".encode('utf-8').decode('latin-1')
+        dic_flags = "éS".encode('utf-8').decode('latin-1')
+        table = AffixTable.parse(aff)
+        assert table.parse_flags(dic_flags) == ['é', 'S']
+        assert table.kind('é') == 'SFX' and set(table.flag_hashes()) == {'é'}
+        assert table.special_flags == {'NEEDAFFIX': 'ñ'}
+        assert table.format_flags(['é', 'S']) == dic_flags
+
+    def test_hashes(self):
+        table = AffixTable.parse(AFF)
+        edited = AffixTable.parse(AFF.replace("SFX S 0 es s", "SFX S 0 ses s").replace("TRY esi", "TRY ise"))
+        assert table.header_hash() == edited.header_hash()  # suggestion directives don't change any forms
+        changed = {flag for flag, digest in table.flag_hashes().items() if edited.flag_hashes()[flag] != digest}
+        assert changed == {'S'}
+        assert table.with_dependents(changed) == {'S', 'P'}
+        assert AffixTable.parse(AFF.replace("NEEDAFFIX !", "NEEDAFFIX ?")).header_hash() != table.header_hash()
+
+    def test_parse_dic_line(self):
+        assert parse_dic_line("casa/SR") == ("casa", "SR", "")
+        assert parse_dic_line("km\\/h/S po:noun") == ("km\\/h", "S", "po:noun")
+        assert parse_dic_line("casa") == ("casa", "", "")
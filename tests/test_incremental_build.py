@@ -0,0 +1,115 @@
+import lib.global_dirs as gd
+from lib.hunspell_aff import AffixTable, parse_dic_line
+from lib.incremental_build import IncrementalBuild, delimit, sentinel, sentinel_index, split_delimited
+from lib.variant import Variant
+
+AFF = """SET ISO8859-1
+SFX S Y 1
+SFX S 0 s .
+
+SFX D Y 1
+SFX D 0 do .
+"""
+
+
+class FakeExpander:
+    """Expands suffixes without unmunch, and remembers which lines it was asked to expand."""
+    def __init__(self, aff_path):
+        self.aff_path = aff_path
+        self.expanded = []
+
+    def __call__(self, lines, compounds):
+        table = AffixTable.from_file(self.aff_path)
+        self.expanded.extend(lines)
+        forms = {}
+        for index, line in enumerate(lines):
+            stem, flags, _ = parse_dic_line(line)
+            forms[index] = {stem} | {stem + rule.add for flag in table.parse_flags(flags)
+                                     for rule in table.rules.get(flag, [])}
+        return forms
+
+
+class TestIncrementalBuild:
+    """Test the line-level incremental builds of the merged word list."""
+    def setup_dirs(self, tmp_path, monkeypatch):
+        gd.initialise_dir_utils('foo')
+        for name in ['HUNSPELL_DIR', 'COMPOUNDS_DIR', 'INCREMENTAL_DIR']:
+            (tmp_path / name).mkdir()
+            monkeypatch.setattr(gd.DIRS, name, str(tmp_path / name))
+        variant = Variant('pt-BR')
+        (tmp_path / 'HUNSPELL_DIR' / 'pt_BR.aff').write_text(AFF)
+        (tmp_path / 'COMPOUNDS_DIR' / 'pt_BR.dic').write_text("1\nguarda-chuva/S\n")
+        return variant
+
+    @staticmethod
+    def write_dic(variant, lines):
+        with open(variant.dic(), 'w') as dic:
+            dic.write(f"{len(lines)}\n" + "".join(line + "\n" for line in lines))
+
+    @staticmethod
+    def run(variant):
+        expander = FakeExpander(variant.aff())
+        with open(IncrementalBuild(variant, expander, 'python').run()) as wordlist:
+            return wordlist.read().split("\n"), expander.expanded
+
+    def test_sentinels(self, tmp_path):
+        assert sentinel_index(sentinel(1207)) == 1207
+        assert sentinel_index("casas") is None
+        expanded = tmp_path / 'expanded.txt'
+        delimited = delimit(["casa/S", "mesa"])
+        assert delimited[2] == sentinel(1) + "\n"
+        expanded.write_text(f"{sentinel(0)}\ncasa\n\ncasas\n{sentinel(1)}\nmesa\n")
+        assert split_delimited(str(expanded)) == {0: {'casa', 'casas'}, 1: {'mesa'}}
+
+    def test_patching(self, tmp_path, monkeypatch):
+        variant = self.setup_dirs(tmp_path, monkeypatch)
+        self.write_dic(variant, ["casa/S", "mesa/S", "canta/D"])
+        words, expanded = self.run(variant)
+        assert words == ['canta', 'cantado', 'casa', 'casas', 'guarda-chuva', 'guarda-chuvas', 'mesa', 'mesas']
+        assert len(expanded) == 4
+        # Nothing changed, nothing is expanded
+        assert self.run(variant) == (words, [])
+        # "casas" is still produced by the new line, so it must survive the removal of "casa/S"
+        self.write_dic(variant, ["casas", "casa", "mesa/S", "canta/D"])
+        words, expanded = self.run(variant)
+        assert expanded == ["casas", "casa"]
+        assert words == ['canta', 'cantado', 'casa', 'casas', 'guarda-chuva', 'guarda-chuvas', 'mesa', 'mesas']
+        self.write_dic(variant, ["casa", "mesa/S", "canta/D"])
+        words, expanded = self.run(variant)
+        assert expanded == [] and 'casas' not in words
+
+    def test_edited_flags(self, tmp_path, monkeypatch):
+        variant = self.setup_dirs(tmp_path, monkeypatch)
+        self.write_dic(variant, ["casa/S", "canta/D"])
+        self.run(variant)
+        (tmp_path / 'HUNSPELL_DIR' / 'pt_BR.aff').write_text(AFF.replace("0 do .", "0 da ."))
+        words, expanded = self.run(variant)
+        assert expanded == ["canta/D"]
+        assert 'cantada' in words and 'cantado' not in words
+        (tmp_path / 'HUNSPELL_DIR' / 'pt_BR.aff').write_text("FLAG long\n" + AFF)
+        _, expanded = self.run(variant)
+        assert len(expanded) == 3  # a new header means everything is expanded again
+
+    def test_edited_utf8_flag(self, tmp_path, monkeypatch):
+        variant = self.setup_dirs(tmp_path, monkeypatch)
+        aff = "SET UTF-8\nFLAG UTF-8\n" + AFF.replace("SET ISO8859-1\n", "").replace("D", "é")
+        (tmp_path / 'HUNSPELL_DIR' / 'pt_BR.aff').write_text(aff, encoding='utf-8')
+        with open(variant.dic(), 'w', encoding='utf-8') as dic:
+            dic.write("2\ncasa/S\ncanta/é\n")
+        self.run(variant)
+        (tmp_path / 'HUNSPELL_DIR' / 'pt_BR.aff').write_text(aff.replace("0 do .", "0 da ."), encoding='utf-8')
+        words, expanded = self.run(variant)
+        assert expanded == ["canta/é".encode('utf-8').decode('latin-1')]  # .dic lines are read as Latin-1
+        assert 'cantada' in words
+
+    def test_warm_build(self, tmp_path, monkeypatch):
+        variant = self.setup_dirs(tmp_path, monkeypatch)
+        self.write_dic(variant, ["casa/S", "canta/D"])
+        expander = FakeExpander(variant.aff())
+        build = IncrementalBuild(variant, expander, 'python')
+        build.run()
+        (tmp_path / 'INCREMENTAL_DIR' / 'pt_BR.json.gz').unlink()  # the index in memory is used from now on
+        self.write_dic(variant, ["casa/S", "canta/D", "mesa"])
+        with open(build.run()) as wordlist:
+            assert 'mesa' in wordlist.read().split("\n")
+        assert expander.expanded[-1:] == ["mesa"] and len(expander.expanded) == 4
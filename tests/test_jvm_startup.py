@@ -0,0 +1,40 @@
+import os
+
+import lib.global_dirs as gd
+from lib.jvm_startup import LOG_FLAGS, JvmStartup, classpath_fingerprint
+
+
+class TestJvmStartup:
+    """Test the JvmStartup class."""
+    def test_fingerprint_changes_with_jar(self, tmp_path):
+        jar = tmp_path / 'languagetool.jar'
+        jar.write_bytes(b'old')
+        old = classpath_fingerprint(str(jar))
+        jar.write_bytes(b'new jar')
+        assert classpath_fingerprint(str(jar)) != old
+        assert classpath_fingerprint(str(jar), 'openjdk version "21.0.2"') != classpath_fingerprint(str(jar))
+
+    def test_disabled(self):
+        with JvmStartup(enabled=False).flags('foo.jar', 'tokenise') as flags:
+            assert flags == ""
+
+    def test_archive_lifecycle(self, tmp_path, monkeypatch):
+        gd.initialise_dir_utils('foo')
+        monkeypatch.setattr(gd.DIRS, 'CDS_DIR', str(tmp_path))
+        startup = JvmStartup()
+        startup._supported = True
+        startup._version = 'openjdk version "17.0.10"'
+        archive = startup.archive_path('foo.jar')
+        with startup.flags('foo.jar', 'tokenise') as flags:
+            assert "-XX:ArchiveClassesAtExit=" in flags and "-XX:TieredStopAtLevel=1" in flags
+            assert LOG_FLAGS in flags
+            with startup.flags('foo.jar', 'tokenise') as concurrent_flags:  # only one JVM dumps the archive
+                assert "Archive" not in concurrent_flags and LOG_FLAGS in concurrent_flags
+            open(flags.split()[0].split('=')[1], 'w').close()  # what the JVM would do at exit
+        assert os.path.exists(archive)
+        with startup.flags('foo.jar', 'spelling_build') as flags:
+            assert flags.strip() == f"-Xshare:auto -XX:SharedArchiveFile={archive} {LOG_FLAGS}"
+        startup._version = 'openjdk version "21.0.2"'  # a new JDK can't use the old archive
+        assert startup.archive_path('foo.jar') != archive
+        startup.clear()
+        assert os.listdir(tmp_path) == []
@@ -0,0 +1,28 @@
+from tempfile import NamedTemporaryFile
+
+from lib.constants import LATIN_1_ENCODING
+import lib.global_dirs as gd
+from lib.languagetool_utils import LanguageToolUtils
+from lib.variant import Variant
+from lib.word_tokeniser import bypass_characters, can_split
+
+
+class TestLanguageToolUtils:
+    """Test the LanguageToolUtils class."""
+    def test_can_split(self):
+        chars = bypass_characters('pt')
+        assert can_split("far-se-á", chars)
+        assert can_split("d'água", chars)
+        assert not can_split("ação", chars)
+        assert can_split("x\u00ady", chars)  # soft hyphen is a Portuguese extra
+
+    def test_tokenise_bypasses_unsplittable_forms(self):
+        """If no form can be split, the JVM is never started, so this works without LT."""
+        gd.initialise_dir_utils('foo')
+        unmunched = NamedTemporaryFile(mode='w', encoding=LATIN_1_ENCODING, prefix="pt_BR_chunk0_unmunched_")
+        unmunched.write("casa\nação\n")
+        unmunched.flush()
+        tokenised = LanguageToolUtils(Variant('pt-BR'), delete_tmp=True).tokenise(unmunched)
+        with open(tokenised.name, 'r') as t:
+            assert t.read() == "casa\nação\n"
+        tokenised.close()
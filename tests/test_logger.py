@@ -0,0 +1,103 @@
+import io
+import json
+import logging
+import multiprocessing
+import queue
+import sys
+
+import lib.logger
+from lib.logger import (LOGGER, BatchingQueueListener, BatchingStreamHandler, ColorizedFormatter, JsonFormatter,
+                        SubprocessLineFilter, add_json_log_file)
+
+
+def make_record(message: str, created: float = 0, subprocess: bool = True) -> logging.LogRecord:
+    record = logging.LogRecord('dictionary_tools', logging.DEBUG, __file__, 0, message, None, None)
+    record.created = created
+    record.subprocess = subprocess
+    return record
+
+
+class Capture(logging.Handler):
+    """Keeps the messages of the records it is given."""
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+def exit_with_buffer_size() -> None:
+    sys.exit(len(lib.logger.LISTENER.handlers[0].buffer))
+
+
+def log_and_exit() -> None:
+    LOGGER.critical("logged right before exiting")
+
+
+class TestLogger:
+    """Test the logging pipeline's formatters and filters."""
+    def test_repeated_lines_are_summarised(self):
+        capture = Capture()
+        line_filter = SubprocessLineFilter(capture)
+        assert line_filter.filter(make_record("Downloading..."))
+        assert not line_filter.filter(make_record("Downloading..."))
+        assert not line_filter.filter(make_record("Downloading..."))
+        record = make_record("Done")
+        assert line_filter.filter(record)
+        assert record.getMessage() == "Done"
+        assert capture.messages == ["(previous line repeated 2 more times)"]
+
+    def test_rate_limit(self):
+        capture = Capture()
+        line_filter = SubprocessLineFilter(capture, max_per_second=2)
+        assert [line_filter.filter(make_record(str(n))) for n in range(4)] == [True, True, False, False]
+        record = make_record("next second", created=1)
+        assert line_filter.filter(record)
+        assert record.getMessage() == "next second"
+        assert capture.messages == ["(2 lines not shown, over 2 lines/s)"]
+
+    def test_other_records_pass(self):
+        line_filter = SubprocessLineFilter(Capture(), max_per_second=0)
+        assert line_filter.filter(make_record("Building...", subprocess=False))
+
+    def test_summaries_only_reach_their_handler(self):
+        console_stream, json_stream = io.StringIO(), io.StringIO()
+        console = BatchingStreamHandler(console_stream)
+        console.addFilter(SubprocessLineFilter(console))
+        json_handler = logging.StreamHandler(json_stream)
+        json_handler.setFormatter(JsonFormatter())
+        log_queue = queue.SimpleQueue()
+        listener = BatchingQueueListener(log_queue, console, json_handler)
+        listener.start()
+        for message in ["a", "a", "b", "b", "b"]:
+            log_queue.put(make_record(message))
+        listener.stop()  # the repeats of "b" are still pending when it stops
+        assert console_stream.getvalue() == ("a\n(previous line repeated 1 more times)\nb\n"
+                                             "(previous line repeated 2 more times)\n")
+        json_messages = [json.loads(line)['message'] for line in json_stream.getvalue().splitlines()]
+        assert json_messages == ["a", "a", "b", "b", "b"]
+
+    def test_formatters(self):
+        assert ColorizedFormatter(use_colours=False).format(make_record("plain")) == "plain"
+        assert json.loads(JsonFormatter().format(make_record("línea")))['message'] == "línea"
+
+    def test_forked_process(self, tmp_path):
+        fork = multiprocessing.get_context('fork')
+        handlers = lib.logger.LISTENER.handlers
+        console = handlers[0]
+        with console.lock:  # so that the listener can't write the line out before the fork
+            console.buffer.append("written by the parent only")
+            child = fork.Process(target=exit_with_buffer_size)
+            child.start()
+            console.buffer.remove("written by the parent only")
+        child.join()
+        assert child.exitcode == 0
+        add_json_log_file(str(tmp_path / 'log.json'))
+        try:
+            child = fork.Process(target=log_and_exit)
+            child.start()
+            child.join()
+        finally:
+            lib.logger.LISTENER.handlers = handlers
+        assert "logged right before exiting" in (tmp_path / 'log.json').read_text()
@@ -0,0 +1,44 @@
+from lib.pos_dict_validator import ValidationRules, line_boundaries, validate_pos_dict
+
+
+def make_rules(tmp_path, encoding: str = 'utf-8', tags=None) -> ValidationRules:
+    info_path = tmp_path / 'portuguese.info'
+    info_path.write_text(f"# comment\nfsa.dict.separator=+\nfsa.dict.encoding={encoding}\n")
+    return ValidationRules([str(info_path)], tags)
+
+
+class TestPosDictValidator:
+    """Test the validation of plaintext tagger dictionaries."""
+    def test_check(self, tmp_path):
+        rules = make_rules(tmp_path, tags=frozenset(['NCFS000']))
+        assert rules.check("casa\tcasa\tNCFS000".encode()) == []
+        assert rules.check(b"casa\tcasa") == ["expected 3 tab-separated columns, found 2"]
+        assert rules.check(b"casa\t\tNCFS000") == ["empty lemma"]
+        assert rules.check(b"casa+\tcasa\tNCFS000") == ["form \"casa+\" contains the .info separator \"+\""]
+        assert rules.check(b"casa\tcasa\tXXX") == ["tag \"XXX\" is not in the tag inventory"]
+        assert rules.check(b"casa\tcasa\tNCFS000\r") == ["tag \"NCFS000\r\" has leading or trailing whitespace",
+                                                         "tag \"NCFS000\r\" is not in the tag inventory"]
+        assert rules.check("mÃ£e\tmÃ£e\tNCFS000".encode()) == [
+            "looks double-encoded (UTF-8 read as Latin-1)"]
+        assert rules.check(b"m\xe3e\tm\xe3e\tNCFS000")[0].startswith("not valid utf-8")
+
+    def test_check_latin_1(self, tmp_path):
+        rules = make_rules(tmp_path, encoding='iso-8859-1')
+        assert rules.check(b"m\xe3e\tm\xe3e\tNCFS000") == []
+        assert rules.check("mãe\tmãe\tNCFS000".encode()) == ["looks like UTF-8, but the dictionary is iso-8859-1"]
+
+    def test_line_boundaries(self, tmp_path):
+        dict_path = tmp_path / 'dict.txt'
+        dict_path.write_bytes(b"a\tb\tc\n" * 10)
+        boundaries = line_boundaries(str(dict_path), 3)
+        assert boundaries[0] == 0 and boundaries[-1] == 60
+        assert all(offset % 6 == 0 for offset in boundaries)
+
+    def test_validate_reports_line_numbers(self, tmp_path):
+        dict_path = tmp_path / 'dict.txt'
+        lines = [f"form{n}\tlemma{n}\tNCFS000" for n in range(1000)]
+        lines[10] = "broken"
+        lines[777] = "form\t\tNCFS000"
+        dict_path.write_text("\n".join(lines) + "\n")
+        assert validate_pos_dict(str(dict_path), make_rules(tmp_path), max_workers=4) == [
+            (11, "expected 3 tab-separated columns, found 1"), (778, "empty lemma")]
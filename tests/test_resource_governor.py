@@ -0,0 +1,44 @@
+from lib.resource_governor import BUILD_HEAP_ENV_VAR, ResourceGovernor, read_meminfo
+
+
+def write_meminfo(tmp_path, available_kb: int) -> str:
+    meminfo_path = tmp_path / 'meminfo'
+    meminfo_path.write_text(f"MemTotal:       16000000 kB\nMemAvailable:   {available_kb} kB\n")
+    return str(meminfo_path)
+
+
+class TestResourceGovernor:
+    """Test the ResourceGovernor class."""
+    def test_read_meminfo(self, tmp_path):
+        assert read_meminfo(write_meminfo(tmp_path, 2048000)) == {'MemTotal': 15625, 'MemAvailable': 2000}
+        assert read_meminfo(str(tmp_path / 'missing')) is None
+
+    def test_first_process_always_admitted(self, tmp_path):
+        governor = ResourceGovernor(meminfo_path=write_meminfo(tmp_path, 0), max_load=1000)
+        assert governor.blocker('spelling_build') is None
+
+    def test_throttles_on_memory(self, tmp_path):
+        governor = ResourceGovernor(reserve_mb=0, meminfo_path=write_meminfo(tmp_path, 3000 * 1024), max_load=1000)
+        with governor.acquire('tokenise'):
+            # the tokeniser was just admitted, so its footprint is subtracted from MemAvailable
+            assert governor.blocker('tokenise') is None
+            assert governor.blocker('spelling_build') is not None
+        assert governor.admitted == []
+
+    def test_disabled(self, tmp_path):
+        governor = ResourceGovernor(enabled=False, meminfo_path=write_meminfo(tmp_path, 0))
+        with governor.acquire('unmunch'):
+            assert governor.blocker('spelling_build') is None
+
+    def test_build_heap(self, tmp_path, monkeypatch):
+        monkeypatch.delenv(BUILD_HEAP_ENV_VAR, raising=False)
+        governor = ResourceGovernor(meminfo_path=write_meminfo(tmp_path, 0))
+        assert governor.xmx('tokenise') == "-Xmx1024m"
+        assert governor.xmx('spelling_build') == "-Xmx3906m"  # a quarter of MemTotal
+        assert governor.footprint_mb('spelling_build') == 3906 + 384
+        # left to the JVM where the physical memory can't be read
+        assert ResourceGovernor(meminfo_path=str(tmp_path / 'missing')).xmx('synth_build') == ""
+        monkeypatch.setenv(BUILD_HEAP_ENV_VAR, "8000")
+        assert governor.xmx('pos_build') == "-Xmx8000m"
+        governor.configure(True, 1024, None, build_heap_mb=12000)
+        assert governor.xmx('pos_build') == "-Xmx12000m"
@@ -11,6 +11,11 @@ class TestShellCommand:
     def test_run_with_input(self):
         assert ShellCommand("tr 'o' 'a'").run_with_input("foo") == "faa"
 
+    def test_run_with_files(self, tmp_path):
+        (tmp_path / 'input').write_text("foo")
+        ShellCommand("tr 'o' 'a'").run_with_files(str(tmp_path / 'input'), str(tmp_path / 'output'))
+        assert (tmp_path / 'output').read_text() == "faa"
+
     def test_run_with_output(self, caplog):
         """Test the run_with_output method: shell command output is redirected to the logger on the debug level."""
         LOGGER.setLevel("DEBUG")
@@ -0,0 +1,38 @@
+from lib.tagger_sources import TaggerSourceBuilder, compare_dicts, normalise_lines, source_files
+
+
+class TestTaggerSources:
+    """Test the Python gathering of tagger sources."""
+    def test_normalise_lines(self):
+        assert list(normalise_lines(["casa\tcasa\tNCFS000\r\n", "# comment\n", "\n"])) == ["casa\tcasa\tNCFS000\n"]
+
+    def test_source_files(self, tmp_path):
+        for filename in ['b.txt', 'a.fdic', 'portuguese.info']:
+            (tmp_path / filename).write_text("")
+        assert [f.split('/')[-1] for f in source_files(str(tmp_path))] == ['a.fdic', 'b.txt']
+
+    def test_build(self, tmp_path):
+        source_dir = tmp_path / 'src'
+        source_dir.mkdir()
+        (source_dir / 'a.txt').write_text("porta\tporta\tNCFS000\ncasa\tcasa\tNCFS000\n")
+        (source_dir / 'b.fdic').write_text("casa\tcasa\tncfs000\n")
+        result, sorted_result = tmp_path / 'dict.txt', tmp_path / 'dict_sorted.txt'
+        old, diff = tmp_path / 'dict.old', tmp_path / 'dict.diff'
+        builder = TaggerSourceBuilder(str(source_dir), "tr a-z A-Z", max_workers=2)
+        builder.build(str(result), str(sorted_result), str(old), str(diff))
+        assert result.read_text() == "porta\tporta\tNCFS000\ncasa\tcasa\tNCFS000\nCASA\tCASA\tNCFS000\n"
+        assert sorted_result.read_text() == "CASA\tCASA\tNCFS000\ncasa\tcasa\tNCFS000\nporta\tporta\tNCFS000\n"
+        (source_dir / 'b.fdic').unlink()
+        builder.build(str(result), str(sorted_result), str(old), str(diff))
+        assert "-CASA\tCASA\tNCFS000" in diff.read_text()
+        assert compare_dicts(str(old), str(sorted_result)) == 3
+
+    def test_compare_dicts_in_order(self, tmp_path):
+        expected, actual = tmp_path / 'expected.txt', tmp_path / 'actual.txt'
+        expected.write_text("a\nb\nb\n")
+        actual.write_text("b\na\nb\n")
+        assert compare_dicts(str(expected), str(actual)) == 2
+        actual.write_text("a\nb\n")
+        assert compare_dicts(str(expected), str(actual)) == 1
+        actual.write_text("a\nb\nb\n")
+        assert compare_dicts(str(expected), str(actual)) == 0
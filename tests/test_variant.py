@@ -1,4 +1,6 @@
-from lib.variant import Variant
+import os
+
+from lib.variant import Variant, variants_by_source
 import lib.global_dirs as gd
 
 
@@ -24,3 +26,10 @@ class TestVariant:
         assert variant.lang == 'pt'
         assert variant.country == 'PT'
         assert variant.agreement == '45'
+
+    def test_shared_sources(self):
+        gd.initialise_dir_utils('foo')
+        pt_45, pt_90 = Variant('pt-PT-45'), Variant('pt-PT-90')
+        sources = variants_by_source([pt_45, pt_90])
+        assert sources[os.path.abspath(pt_45.freq())] == {pt_45, pt_90}
+        assert sources[os.path.abspath(pt_45.dic())] == {pt_45}
@@ -0,0 +1,38 @@
+import concurrent.futures
+import multiprocessing
+
+from lib.constants import LATIN_1_ENCODING
+from lib.word_lists import merge_sorted_forms, sort_unique_forms
+
+
+class TestWordLists:
+    """Test the sorting and merging of chunk outputs."""
+    def test_sort_and_merge(self, tmp_path):
+        tokenised = tmp_path / 'pt_BR_chunk0_tokenised'
+        tokenised.write_text("far\n\nse\n\ná\ncasa\nfar\n", encoding='utf-8')
+        compounds = tmp_path / 'pt_BR_chunk0_unmunched'
+        compounds.write_text("guarda-chuva\ná\n", encoding=LATIN_1_ENCODING)
+        sorted_paths = [sort_unique_forms(str(tokenised)), sort_unique_forms(str(compounds), LATIN_1_ENCODING)]
+        with open(sorted_paths[0], encoding='utf-8') as sorted_file:
+            assert sorted_file.read() == "casa\nfar\nse\ná\n"
+        output = tmp_path / 'wordlist.txt'
+        assert merge_sorted_forms(sorted_paths, str(output)) == 5
+        assert output.read_text(encoding='utf-8') == "casa\nfar\nguarda-chuva\nse\ná\n"
+
+    def test_forms_below_newline(self, tmp_path):
+        (tmp_path / 'chunk0').write_text("a\tb\na\n", encoding='utf-8')
+        (tmp_path / 'chunk1').write_text("a\tb\n", encoding='utf-8')
+        sorted_paths = [sort_unique_forms(str(tmp_path / 'chunk0')), sort_unique_forms(str(tmp_path / 'chunk1'))]
+        output = tmp_path / 'wordlist.txt'
+        assert merge_sorted_forms(sorted_paths, str(output)) == 2
+        assert output.read_text(encoding='utf-8') == "a\na\tb\n"
+
+    def test_in_process_pool(self, tmp_path):
+        paths = []
+        for index in range(4):
+            (tmp_path / f"chunk{index}").write_text(f"form{index}\nform{index + 1}\n")
+            paths.append(str(tmp_path / f"chunk{index}"))
+        context = multiprocessing.get_context('forkserver')
+        with concurrent.futures.ProcessPoolExecutor(max_workers=2, mp_context=context) as executor:
+            sorted_paths = list(executor.map(sort_unique_forms, paths))
+            assert executor.submit(merge_sorted_forms, sorted_paths, str(tmp_path / 'merged')).result() == 5
@@ -0,0 +1,70 @@
+from glob import glob
+from os import path
+from tempfile import NamedTemporaryFile
+
+import pytest
+
+from lib.constants import LATIN_1_ENCODING
+from lib.variant import Variant
+from lib.word_tokeniser import WordTokeniser, read_parity_record, write_parity_record
+
+# Output of the Java tokeniser, saved with `scripts/check_tokeniser_parity.py --record`; one file per variant.
+PARITY_DIR = path.join(path.dirname(__file__), 'data', 'tokeniser_parity')
+# Tokens LT's Java tokenisers produce for a few forms, for when no recorded output is checked in; the forms avoid the
+# cases where LT consults the tagger dictionary.
+JAVA_TOKENS = {
+    'pt-BR': {"casa": {"casa"}, "far-se-á": {"far", "se", "á"}, "km/h": {"km", "h"}, "(de)": {"de"}},
+    'de-DE': {"Haus": {"Haus"}, "E-Mail": {"E-Mail"}, "km/h": {"km", "h"}},
+    'en-US': {"house": {"house"}, "km/h": {"km", "h"}, "(of)": {"of"}},
+    'fr-FR': {"maison": {"maison"}, "l'homme": {"l'", "homme"}, "jusqu'ici": {"jusqu'", "ici"},
+              "aujourd'hui": {"aujourd'hui"}, "km/h": {"km", "h"}},
+}
+
+
+def python_tokens(variant: str, form: str) -> set:
+    return {token for token in WordTokeniser(Variant(variant)).format_line(form).split("\n") if token}
+
+
+class TestWordTokeniser:
+    """Test the WordTokeniser class."""
+    def test_tokenise_line(self):
+        tokeniser = WordTokeniser(Variant('pt-BR'))
+        assert tokeniser.tokenise_line("far-se-á") == ["far", "-", "se", "-", "á"]
+        assert tokeniser.tokenise_line("casa") == ["casa"]
+
+    def test_format_line(self):
+        """Separators are written as blank lines, like the output of LT's WordTokenizer."""
+        assert WordTokeniser(Variant('pt-BR')).format_line("far-se-á") == "far\n\nse\n\ná\n"
+
+    def test_language_rules(self):
+        assert WordTokeniser(Variant('de-DE')).tokenise_line("E-Mail") == ["E-Mail"]
+        assert WordTokeniser(Variant('en-US')).tokenise_line("don't") == ["don't"]
+        assert WordTokeniser(Variant('fr-FR')).tokenise_line("l'homme") == ["l'", "homme"]
+
+    @pytest.mark.parametrize('variant', sorted(JAVA_TOKENS))
+    def test_parity(self, variant):
+        """The Python tokeniser produces the same tokens as the Java one for each form."""
+        for form, java_tokens in JAVA_TOKENS[variant].items():
+            assert python_tokens(variant, form) == java_tokens, form
+
+    @pytest.mark.parametrize('record_path', sorted(glob(path.join(PARITY_DIR, '*.tsv'))))
+    def test_recorded_parity(self, record_path):
+        """The Python tokeniser produces the same tokens as the Java one did for each recorded form."""
+        variant = path.basename(record_path)[:-len('.tsv')]
+        for form, java_tokens in read_parity_record(record_path).items():
+            assert python_tokens(variant, form) == java_tokens, form
+
+    def test_parity_record(self, tmp_path):
+        record = {"far-se-á": {"far", "se", "á"}, "casa": {"casa"}}
+        write_parity_record(str(tmp_path / 'pt-BR.tsv'), record)
+        assert read_parity_record(str(tmp_path / 'pt-BR.tsv')) == record
+
+    def test_tokenise(self):
+        unmunched = NamedTemporaryFile(mode='w', encoding=LATIN_1_ENCODING, prefix="pt_BR_chunk0_unmunched_")
+        unmunched.write("far-se-á\ncasa\n")
+        unmunched.flush()
+        tokenised = WordTokeniser(Variant('pt-BR'), delete_tmp=True).tokenise(unmunched)
+        assert tokenised.name.split('/')[-1].startswith("pt_BR_chunk0_tokenised_")
+        with open(tokenised.name, 'r') as t:
+            assert t.read() == "far\n\nse\n\ná\ncasa\n"
+        tokenised.close()
@@ -0,0 +1,92 @@
+import multiprocessing
+import time
+from functools import partial
+from tempfile import NamedTemporaryFile
+
+from lib.work_queue import WorkQueue
+
+
+def square(result_dir: str, job: dict) -> NamedTemporaryFile:
+    result = NamedTemporaryFile(mode='w', delete=False, dir=result_dir)
+    result.write(str(job['n'] ** 2))
+    result.flush()
+    return result
+
+
+def run_worker(queue_dir: str, result_dir: str) -> None:
+    WorkQueue(queue_dir).work(partial(square, result_dir), poll_interval=0.05)
+
+
+class TestWorkQueue:
+    """Test the WorkQueue class."""
+    def test_claim_is_exclusive(self, tmp_path):
+        queue = WorkQueue(str(tmp_path))
+        queue.publish('job0', {'n': 0})
+        assert queue.claim('worker0')[:2] == ('job0', {'n': 0})
+        assert queue.claim('worker1') is None
+
+    def test_expired_lease_is_reclaimed(self, tmp_path):
+        queue = WorkQueue(str(tmp_path), lease_seconds=0.05)
+        queue.publish('job0', {'n': 0})
+        _, _, old_token = queue.claim('worker0')
+        time.sleep(0.1)
+        job_id, payload, token = queue.claim('worker0')  # the same worker, as after a restart on the same host
+        assert (job_id, payload) == ('job0', {'n': 0})
+        assert not queue.renew('job0', old_token)
+        assert queue.renew('job0', token)
+        assert queue.attempts('job0') == 1
+
+    def test_finished_requires_seal(self, tmp_path):
+        queue = WorkQueue(str(tmp_path))
+        assert not queue.finished()
+        queue.seal()
+        assert queue.finished()
+
+    def test_shutdown(self, tmp_path):
+        queue = WorkQueue(str(tmp_path))
+        queue.publish('job0', {'n': 0})
+        queue.shutdown()  # unsealed and not done, so only the shutdown makes an idle worker exit
+        assert queue.work(partial(square, str(tmp_path)), poll_interval=0.01) == 0
+
+    def test_failed_job(self, tmp_path):
+        queue = WorkQueue(str(tmp_path), max_attempts=2)
+        queue.publish('job0', {})
+        queue.seal()
+        assert queue.work(partial(square, str(tmp_path)), worker_id='worker0', poll_interval=0.01) == 0
+        assert list(queue.failures().keys()) == ['job0']
+        assert queue.attempts('job0') == 2
+
+    def test_job_is_retried(self, tmp_path):
+        calls = []
+
+        def flaky_square(job: dict) -> NamedTemporaryFile:
+            calls.append(job)
+            if len(calls) == 1:
+                raise OSError("transient")
+            return square(str(tmp_path), job)
+
+        completed = []
+        queue = WorkQueue(str(tmp_path))
+        queue.publish('job0', {'n': 3})
+        queue.seal()
+        assert queue.work(flaky_square, poll_interval=0.01, on_complete=completed.append) == 1
+        assert queue.failures() == {} and completed == [{'n': 3}]
+        with open(queue.result_path('job0')) as result:
+            assert result.read() == "9"
+
+    def test_several_worker_processes(self, tmp_path):
+        queue = WorkQueue(str(tmp_path / 'queue'))
+        for n in range(20):
+            queue.publish(f"job{n:02d}", {'n': n})
+        workers = [multiprocessing.Process(target=run_worker, args=(str(tmp_path / 'queue'), str(tmp_path)))
+                   for _ in range(4)]
+        for worker in workers:
+            worker.start()
+        queue.seal()
+        assert queue.wait(poll_interval=0.05) == {}
+        for worker in workers:
+            worker.join(timeout=10)
+            assert worker.exitcode == 0
+        for n in range(20):
+            with open(queue.result_path(f"job{n:02d}")) as result:
+                assert result.read() == str(n ** 2)